@@ -0,0 +1,275 @@
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def parse_query_count(server_timing):
+    '''
+    Returns the number of queries reported in a Server-Timing header, or
+    None if the header is missing or has no query count.
+    '''
+    match = QUERIES.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServer:
+    '''
+    Threaded WSGI server running this project in a background thread,
+    on a free port of the loopback interface.
+
+    Attributes:
+        url (str): The base URL of the server.
+    '''
+
+    def __init__(self):
+        self.httpd = ThreadedWSGIServer(
+            ('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+        self.httpd.set_app(get_wsgi_application())
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, name='benchmark-server',
+            daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ServerProcess:
+    '''
+    Gunicorn serving this project from a subprocess on a free port of
+    the loopback interface, for benchmarks of the production servers.
+    The subprocess inherits the environment, so it uses the same
+    database, with the Server-Timing header turned on.
+
+    Attributes:
+        url (str): The base URL of the server.
+        args (list): The gunicorn arguments after the application.
+        timeout (float): Seconds to wait for the server to listen.
+    '''
+
+    def __init__(self, application, args=(), timeout=30):
+        port = get_free_port()
+        self.url = f'http://127.0.0.1:{port}'
+        self.command = [
+            sys.executable, '-m', 'gunicorn', application,
+            '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+            *args,
+        ]
+        self.port = port
+        self.timeout = timeout
+
+    def __enter__(self):
+        env = {**os.environ, 'REQUEST_METRICS_SERVER_TIMING': '1'}
+        self.log = tempfile.TemporaryFile(mode='w+')
+        self.process = subprocess.Popen(
+            self.command, env=env, stdout=subprocess.DEVNULL,
+            stderr=self.log)
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.log.seek(0)
+                error = self.log.read().strip()
+                self.log.close()
+                raise RuntimeError(
+                    f'{" ".join(self.command)} exited: {error}')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), 1).close()
+            except OSError:
+                time.sleep(0.1)
+            else:
+                return self
+        self.__exit__()
+        raise RuntimeError(
+            f'{" ".join(self.command)} did not listen in {self.timeout}s.')
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
+
+
+class LoadClient:
+    '''
+    HTTP client of one simulated user, keeping its connection and
+    authentication between requests.
+
+    Attributes:
+        url (str): The base URL of the server.
+        session (Session): The requests session holding the cookies.
+    '''
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.session = requests.Session()
+
+    def login(self, username, password):
+        '''
+        Logs in through dj-rest-auth. The session cookie authenticates
+        the following requests in DEV, and the access token, sent as a
+        bearer token, with the JWT cookie authentication of production.
+        '''
+        response = self.session.post(
+            f'{self.url}/dj-rest-auth/login/',
+            json={'username': username, 'password': password})
+        if response.status_code != 200:
+            raise ValueError(
+                f'Logging in as {username} failed with status '
+                f'{response.status_code}.')
+        access = response.json().get('access')
+        if access:
+            self.session.headers['Authorization'] = f'Bearer {access}'
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def request(self, method, path, params=None, data=None):
+        '''
+        Sends a request and returns the status code, the latency in
+        seconds and the number of queries the server reported, or None.
+        Unsafe requests carry the CSRF token the session authentication
+        expects.
+        '''
+        headers = {}
+        if method not in ('GET', 'HEAD', 'OPTIONS'):
+            token = self.session.cookies.get('csrftoken')
+            if token:
+                headers['X-CSRFToken'] = token
+        started = time.perf_counter()
+        response = self.session.request(
+            method, f'{self.url}{path}', params=params, json=data,
+            headers=headers)
+        response.content
+        elapsed = time.perf_counter() - started
+        return (
+            response.status_code, elapsed,
+            parse_query_count(response.headers.get('Server-Timing')))
+
+
+def run_scenario(clients, path, requests_count, warmup=0):
+    '''
+    Sends requests_count GET requests to path, spread over the clients,
+    each client sending from its own thread, after warmup unmeasured
+    requests per client.
+
+    Returns:
+        dict: The summary of the measured requests, see summarize().
+    '''
+    for client in clients:
+        for _ in range(warmup):
+            client.get(path)
+
+    samples = []
+    lock = threading.Lock()
+    shares = [
+        requests_count // len(clients) + (n < requests_count % len(clients))
+        for n in range(len(clients))
+    ]
+
+    def work(client, count):
+        results = [client.get(path) for _ in range(count)]
+        with lock:
+            samples.extend(results)
+
+    threads = [
+        threading.Thread(target=work, args=(client, count))
+        for client, count in zip(clients, shares)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, time.perf_counter() - started)
+
+
+def summarize(samples, elapsed):
+    '''
+    Summarizes (status, seconds, queries) samples measured over elapsed
+    seconds of wall time.
+    '''
+    latencies = [seconds for _, seconds, _ in samples]
+    queries = [count for _, _, count in samples if count is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(status >= 400 for status, _, _ in samples),
+        'throughput': round(len(samples) / elapsed, 1) if elapsed else None,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries': (
+            round(statistics.mean(queries), 2) if queries else None),
+        'max_queries': max(queries) if queries else None,
+    }
+
+
+def compare_results(baseline, current, threshold):
+    '''
+    Compares the scenarios of two benchmark results.
+
+    A scenario regresses if its p95 latency grew by more than threshold,
+    a fraction of the baseline, if it makes more queries on average, or
+    if it has errors the baseline did not have.
+
+    Returns:
+        tuple: The (name, baseline, current) rows of the scenarios in
+        both results and the list of regression messages.
+    '''
+    rows = []
+    regressions = []
+    for name, after in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        rows.append((name, before, after))
+        if after['p95_ms'] > before['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {before["p95_ms"]}ms -> {after["p95_ms"]}ms')
+        if None not in (before['queries'], after['queries']) and (
+            after['queries'] > before['queries']
+        ):
+            regressions.append(
+                f'{name}: queries {before["queries"]} -> '
+                f'{after["queries"]}')
+        if after['errors'] > before['errors']:
+            regressions.append(
+                f'{name}: errors {before["errors"]} -> {after["errors"]}')
+    return rows, regressions
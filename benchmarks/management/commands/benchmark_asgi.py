@@ -0,0 +1,160 @@
+import json
+from contextlib import ExitStack
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from benchmarks.loadtest import LoadClient, ServerProcess, run_scenario
+from benchmarks.management.commands.benchmark_http import get_commit
+from benchmarks.management.commands.seed_dataset import SEED_PASSWORD
+from posts.models import Post
+from profiles.models import Profile
+
+ENDPOINTS = (
+    ('posts', '/posts/?pagination=cursor'),
+    ('post-detail', '/posts/{post_id}'),
+    ('profiles', '/profiles/'),
+    ('profile-detail', '/profiles/{profile_id}'),
+    ('comments', '/posts/{post_id}/comments/'),
+)
+
+
+class Command(BaseCommand):
+    '''
+    Compares the throughput of the DRF views served by gunicorn's
+    threaded workers (wsgi) with the same views served by gunicorn's
+    uvicorn workers (asgi), which moving production to ASGI would do,
+    at high concurrency.
+
+    Both servers are started as subprocesses on the configured database
+    with the same number of --workers, the WSGI workers running
+    --threads threads each. Every endpoint is then requested by
+    --concurrency users logged in as the seed_dataset users, first from
+    the WSGI server and then from the ASGI one. Anonymous users are not
+    benchmarked, since the views serve them from the response cache.
+
+    --wsgi-url and --asgi-url benchmark running servers instead. --save
+    writes the results as JSON. uvicorn and uvicorn-worker are only
+    listed in requirements-dev.txt.
+    '''
+    help = 'Compares WSGI and ASGI throughput of the read endpoints.'
+    servers = ('wsgi', 'asgi')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Measured requests per endpoint and server.')
+        parser.add_argument('--concurrency', type=int, default=64)
+        parser.add_argument(
+            '--warmup', type=int, default=2,
+            help='Unmeasured requests per endpoint and client.')
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Threads per WSGI worker.')
+        parser.add_argument(
+            '--wsgi-url', help='Base URL of a running WSGI server.')
+        parser.add_argument(
+            '--asgi-url', help='Base URL of a running ASGI server.')
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Log in as the users named <prefix>_<n>.')
+        parser.add_argument('--password', default=SEED_PASSWORD)
+        parser.add_argument(
+            '--endpoint', action='append', choices=[
+                name for name, _ in ENDPOINTS],
+            help='Only benchmark this endpoint; can be repeated.')
+        parser.add_argument('--save', help='Write the results to this file.')
+
+    def handle(self, *args, **options):
+        post_id = (
+            Post.objects.order_by('-comments_count', '-id')
+            .values_list('id', flat=True).first())
+        profile_id = (
+            Profile.objects.order_by('-followers_count', '-id')
+            .values_list('id', flat=True).first())
+        if post_id is None:
+            raise CommandError('There are no posts; run seed_dataset first.')
+        usernames = list(
+            User.objects.filter(username__startswith=f'{options["prefix"]}_')
+            .order_by('id').values_list('username', flat=True)
+            [:options['concurrency']])
+        if not usernames:
+            raise CommandError(
+                f'There are no users named {options["prefix"]}_<n>; run '
+                f'seed_dataset first.')
+
+        endpoints = [
+            (name, path.format(post_id=post_id, profile_id=profile_id))
+            for name, path in ENDPOINTS
+            if not options['endpoint'] or name in options['endpoint']
+        ]
+        workers = ['--workers', str(options['workers'])]
+        servers = (
+            ('wsgi', options['wsgi_url'], 'techstables_backend.wsgi', [
+                *workers, '--worker-class', 'gthread',
+                '--threads', str(options['threads'])]),
+            ('asgi', options['asgi_url'], 'techstables_backend.asgi', [
+                *workers, '--worker-class', 'uvicorn_worker.UvicornWorker']),
+        )
+        scenarios = {}
+        for server, url, application, args in servers:
+            with ExitStack() as stack:
+                if url is None:
+                    try:
+                        url = stack.enter_context(
+                            ServerProcess(application, args)).url
+                    except RuntimeError as error:
+                        raise CommandError(str(error))
+                clients = self.log_in(
+                    url, usernames, options['password'],
+                    options['concurrency'])
+                for name, path in endpoints:
+                    result = run_scenario(
+                        clients, path, options['requests'],
+                        options['warmup'])
+                    scenarios.setdefault(name, {})[server] = {
+                        'path': path, **result}
+
+        for name, result in scenarios.items():
+            self.report(name, result)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump({
+                    'meta': {
+                        'commit': get_commit(),
+                        'created_at': timezone.now().isoformat(),
+                        'database': connection.vendor,
+                        'requests': options['requests'],
+                        'concurrency': options['concurrency'],
+                        'workers': options['workers'],
+                        'threads': options['threads'],
+                    },
+                    'scenarios': scenarios,
+                }, file, indent=2)
+            self.stdout.write(f'Saved the results to {options["save"]}.')
+
+    def log_in(self, url, usernames, password, count):
+        clients = []
+        for n in range(count):
+            client = LoadClient(url)
+            try:
+                client.login(usernames[n % len(usernames)], password)
+            except ValueError as error:
+                raise CommandError(str(error))
+            clients.append(client)
+        return clients
+
+    def report(self, name, results):
+        wsgi = results['wsgi']['throughput']
+        ratio = results['asgi']['throughput'] / wsgi if wsgi else 0
+        self.stdout.write(f'{name} (req/s on ASGI vs WSGI: {ratio:.2f}x)')
+        for server in self.servers:
+            result = results[server]
+            self.stdout.write(
+                f'  {server:<4} {result["throughput"]:>8.1f} req/s  '
+                f'p50 {result["p50_ms"]:>7.2f}ms  '
+                f'p95 {result["p95_ms"]:>7.2f}ms  '
+                f'p99 {result["p99_ms"]:>7.2f}ms  '
+                f'errors {result["errors"]}')
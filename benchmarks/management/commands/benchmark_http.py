@@ -0,0 +1,194 @@
+import json
+import subprocess
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from benchmarks.loadtest import (
+    LoadClient, LocalServer, compare_results, run_scenario,
+)
+from benchmarks.management.commands.seed_dataset import SEED_PASSWORD
+from posts.models import Post
+from comments.models import Comment
+from likes.models import Like
+from followers.models import Follower
+
+ENDPOINTS = (
+    ('posts', '/posts/'),
+    ('post-detail', '/posts/{post_id}'),
+    ('profiles', '/profiles/'),
+    ('comments', '/comments/'),
+    ('likes', '/likes/'),
+    ('followers', '/followers/'),
+)
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    '''
+    Benchmarks the main read endpoints end to end over HTTP.
+
+    Each endpoint is requested by anonymous users and by users logged in
+    as the seed_dataset users, from --concurrency threads with their own
+    connection. The command reports the throughput, the p50, p95 and p99
+    latencies and the mean number of queries per request, taken from the
+    Server-Timing header.
+
+    Without --url the project is served in-process by a threaded WSGI
+    server on the configured database, SQLite in DEV or the DATABASE_URL
+    Postgres otherwise, with the Server-Timing header turned on. Anonymous
+    list responses are cached after the warmup requests, as in
+    production.
+
+    --save writes the results as JSON. --compare compares the results
+    with a saved baseline, e.g. from the previous commit, and fails if a
+    p95 latency grew by more than --threshold, the queries per request
+    grew or new errors appeared.
+    '''
+    help = 'Benchmarks the read endpoints over HTTP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server; by default one is started.')
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Measured requests per endpoint and user type.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--warmup', type=int, default=2,
+            help='Unmeasured requests per endpoint and client.')
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Log in as the users named <prefix>_<n>.')
+        parser.add_argument('--password', default=SEED_PASSWORD)
+        parser.add_argument(
+            '--endpoint', action='append', choices=[
+                name for name, _ in ENDPOINTS],
+            help='Only benchmark this endpoint; can be repeated.')
+        parser.add_argument(
+            '--anonymous-only', action='store_true',
+            help='Do not benchmark authenticated users.')
+        parser.add_argument('--save', help='Write the results to this file.')
+        parser.add_argument(
+            '--compare', help='Compare with the results in this file.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed p95 latency growth, as a fraction.')
+
+    def handle(self, *args, **options):
+        post_id = (
+            Post.objects.order_by('-likes_count', '-id')
+            .values_list('id', flat=True).first())
+        if post_id is None:
+            raise CommandError('There are no posts; run seed_dataset first.')
+        usernames = list(
+            User.objects.filter(username__startswith=f'{options["prefix"]}_')
+            .order_by('id').values_list('username', flat=True)
+            [:options['concurrency']])
+        if not usernames and not options['anonymous_only']:
+            raise CommandError(
+                f'There are no users named {options["prefix"]}_<n>; run '
+                f'seed_dataset first or pass --anonymous-only.')
+
+        endpoints = [
+            (name, path.format(post_id=post_id)) for name, path in ENDPOINTS
+            if not options['endpoint'] or name in options['endpoint']
+        ]
+        with ExitStack() as stack:
+            url = options['url']
+            if url is None:
+                stack.enter_context(override_settings(REQUEST_METRICS={
+                    **settings.REQUEST_METRICS, 'SERVER_TIMING': True}))
+                url = stack.enter_context(LocalServer()).url
+            users = {'anonymous': [
+                LoadClient(url) for _ in range(options['concurrency'])]}
+            if not options['anonymous_only']:
+                users['authenticated'] = self.log_in(
+                    url, usernames, options['password'],
+                    options['concurrency'])
+            scenarios = {}
+            for name, path in endpoints:
+                for user, clients in users.items():
+                    result = run_scenario(
+                        clients, path, options['requests'],
+                        options['warmup'])
+                    scenarios[f'{name}/{user}'] = {'path': path, **result}
+                    self.report(f'{name}/{user}', result)
+
+        results = {
+            'meta': {
+                'commit': get_commit(),
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'server': options['url'] or 'in-process',
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'rows': {
+                    'posts': Post.objects.count(),
+                    'comments': Comment.objects.count(),
+                    'likes': Like.objects.count(),
+                    'followers': Follower.objects.count(),
+                },
+            },
+            'scenarios': scenarios,
+        }
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Saved the results to {options["save"]}.')
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            self.compare(baseline, results, options['threshold'])
+
+    def log_in(self, url, usernames, password, count):
+        clients = []
+        for n in range(count):
+            client = LoadClient(url)
+            try:
+                client.login(usernames[n % len(usernames)], password)
+            except ValueError as error:
+                raise CommandError(str(error))
+            clients.append(client)
+        return clients
+
+    def report(self, name, result):
+        queries = (
+            '-' if result['queries'] is None else f'{result["queries"]:g}')
+        self.stdout.write(
+            f'{name:<26} {result["throughput"]:>8.1f} req/s  '
+            f'p50 {result["p50_ms"]:>7.2f}ms  '
+            f'p95 {result["p95_ms"]:>7.2f}ms  '
+            f'p99 {result["p99_ms"]:>7.2f}ms  '
+            f'queries {queries}  errors {result["errors"]}')
+
+    def compare(self, baseline, results, threshold):
+        self.stdout.write(
+            f'Compared with {baseline["meta"].get("commit") or "baseline"}:')
+        rows, regressions = compare_results(baseline, results, threshold)
+        for name, before, after in rows:
+            change = (
+                (after['p95_ms'] - before['p95_ms']) / before['p95_ms']
+                if before['p95_ms'] else 0)
+            self.stdout.write(
+                f'{name:<26} p95 {before["p95_ms"]:>7.2f}ms -> '
+                f'{after["p95_ms"]:>7.2f}ms ({change:+.0%})  '
+                f'req/s {before["throughput"]:.1f} -> '
+                f'{after["throughput"]:.1f}')
+        if regressions:
+            raise CommandError(
+                'Regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
@@ -0,0 +1,122 @@
+import json
+import statistics
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from benchmarks.loadtest import LoadClient, LocalServer, percentile
+from benchmarks.management.commands.seed_dataset import SEED_PASSWORD
+from benchmarks.replay import Replayer, load_traffic
+
+
+class Command(BaseCommand):
+    '''
+    Replays a traffic capture log recorded by TrafficCaptureMiddleware
+    against a local instance and reports how the latency was distributed
+    across the views.
+
+    Requests are sent at their recorded pace multiplied by --speedup, or
+    as fast as possible with --speedup 0, from --concurrency workers.
+    Anonymous records are sent anonymously and authenticated ones as one
+    of the seed_dataset users. Writes are replayed as recorded, so ids
+    missing from the local database show up as errors; --reads-only
+    leaves them out.
+
+    Without --url the project is served in-process by a threaded WSGI
+    server, as in benchmark_http.
+    '''
+    help = 'Replays captured traffic and reports latency per view.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('log', help='The traffic capture JSONL file.')
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server; by default one is started.')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--speedup', type=float, default=1.0,
+            help='Replay this many times faster; 0 replays without pauses.')
+        parser.add_argument(
+            '--limit', type=int, help='Only replay the first records.')
+        parser.add_argument('--reads-only', action='store_true')
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Send authenticated records as the users <prefix>_<n>.')
+        parser.add_argument('--password', default=SEED_PASSWORD)
+        parser.add_argument('--save', help='Write the report to this file.')
+
+    def handle(self, *args, **options):
+        try:
+            records = load_traffic(
+                options['log'], options['reads_only'], options['limit'])
+        except (OSError, ValueError, KeyError) as error:
+            raise CommandError(f'Cannot read {options["log"]}: {error}')
+        if not records:
+            raise CommandError('There are no records to replay.')
+        mix = Counter(record['authenticated'] for record in records)
+        usernames = list(
+            User.objects.filter(username__startswith=f'{options["prefix"]}_')
+            .order_by('id').values_list('username', flat=True)
+            [:options['concurrency']])
+        if mix[True] and not usernames:
+            raise CommandError(
+                f'The log has authenticated requests but there are no users '
+                f'named {options["prefix"]}_<n>; run seed_dataset first.')
+        self.stdout.write(
+            f'Replaying {len(records)} requests, {mix[True]} authenticated, '
+            f'at {options["speedup"]:g}x.')
+
+        with ExitStack() as stack:
+            url = options['url']
+            if url is None:
+                stack.enter_context(override_settings(REQUEST_METRICS={
+                    **settings.REQUEST_METRICS, 'SERVER_TIMING': True}))
+                url = stack.enter_context(LocalServer()).url
+            workers = []
+            for n in range(options['concurrency']):
+                authenticated = LoadClient(url)
+                if usernames:
+                    try:
+                        authenticated.login(
+                            usernames[n % len(usernames)],
+                            options['password'])
+                    except ValueError as error:
+                        raise CommandError(str(error))
+                workers.append((LoadClient(url), authenticated))
+            replayer = Replayer(workers, options['speedup'])
+            elapsed = replayer.run(records)
+
+        views = replayer.report(elapsed)
+        for view, result in views.items():
+            queries = (
+                '-' if result['queries'] is None
+                else f'{result["queries"]:g}')
+            self.stdout.write(
+                f'{view:<42} {result["requests"]:>6}  '
+                f'{result["share"]:>6.1%}  '
+                f'p50 {result["p50_ms"]:>7.2f}ms  '
+                f'p95 {result["p95_ms"]:>7.2f}ms  '
+                f'p99 {result["p99_ms"]:>7.2f}ms  '
+                f'queries {queries}  errors {result["errors"]}')
+        lag = replayer.lag
+        if lag:
+            self.stdout.write(
+                f'Sent late by p50 {percentile(lag, 0.5) * 1000:.1f}ms, '
+                f'p99 {percentile(lag, 0.99) * 1000:.1f}ms, mean '
+                f'{statistics.mean(lag) * 1000:.1f}ms.')
+        self.stdout.write(
+            f'Replayed {len(records)} requests in {elapsed:.1f}s '
+            f'({len(records) / elapsed:.1f} req/s).')
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump({
+                    'log': options['log'],
+                    'speedup': options['speedup'],
+                    'concurrency': options['concurrency'],
+                    'elapsed': round(elapsed, 3),
+                    'views': views,
+                }, file, indent=2)
+            self.stdout.write(f'Saved the report to {options["save"]}.')
@@ -0,0 +1,195 @@
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from techstables_backend.cache import get_response_cache
+from benchmarks.seeding import (
+    PowerLawSampler, bulk_insert, manual_timestamps, random_text,
+    random_time_after, spread,
+)
+from profiles.models import Profile, new_profile
+from posts.models import Post
+from comments.models import Comment
+from likes.models import Like
+from followers.models import Follower
+
+SEED_PASSWORD = 'seed-pass-1234'
+
+# Rows generated per unit of --scale.
+USERS = 1000
+POSTS_PER_USER = 5
+COMMENTS_PER_POST = 4
+LIKES_PER_USER = 50
+FOLLOWS_PER_USER = 20
+
+
+class Command(BaseCommand):
+    '''
+    Generates a synthetic dataset of users, profiles, posts, comments,
+    likes and follows for local load testing.
+
+    --scale 1 writes about 100,000 rows and --scale 100 about 10 million.
+    How much users post, like and follow, and how popular posts and
+    users are, follow power laws with the given --exponent, so a few
+    posts and authors get most of the likes and followers. Timestamps
+    are spread over the last --days days.
+
+    Rows are written with bulk_create in streaming batches. No signals
+    are sent: profiles are built by new_profile(), like the sign-up
+    signal builds them, and the derived data (counters, search index,
+    trending scores and timelines) is rebuilt by the existing commands
+    afterwards. The cached responses are then cleared.
+
+    The users are named <prefix>_<n> and share the --password, so load
+    tests can log in as any of them. The run is reproducible with the
+    same --seed.
+    '''
+    help = 'Generates a synthetic dataset at a configurable scale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1.0,
+            help='Multiplier of the dataset size; 1 is about 100,000 rows.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--exponent', type=float, default=1.0,
+            help='Power law exponent of activity and popularity.')
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help='Spread the timestamps over this many days.')
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--password', default=SEED_PASSWORD)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Do not rebuild counters, search, trending and timelines.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Run even when DEBUG is off.')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'seed_dataset writes synthetic data; run it with DEBUG on '
+                'or pass --force.')
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(
+                f'Users named {prefix}_<n> already exist; choose another '
+                f'--prefix.')
+
+        self.rng = random.Random(options['seed'])
+        self.exponent = options['exponent']
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.days = options['days']
+        scale = options['scale']
+        started = time.perf_counter()
+
+        with manual_timestamps(Post, Comment, Like, Follower):
+            user_ids = self.insert(
+                User, self.users(prefix, options['password'],
+                                 max(2, round(USERS * scale))))
+            self.insert(Profile, (
+                new_profile(user_id) for user_id in user_ids))
+            posts = self.insert_posts(
+                user_ids, round(len(user_ids) * POSTS_PER_USER), prefix)
+            self.insert(Comment, self.comments(
+                user_ids, posts, round(len(posts) * COMMENTS_PER_POST)))
+            self.insert(Like, self.likes(
+                user_ids, posts, round(len(user_ids) * LIKES_PER_USER)))
+            self.insert(Follower, self.follows(
+                user_ids, round(len(user_ids) * FOLLOWS_PER_USER)))
+
+        if not options['skip_derived']:
+            for command, kwargs in (
+                ('rebuild_post_counters', {}),
+                ('reconcile_profile_counters', {}),
+                ('rebuild_search_index', {}),
+                ('refresh_trending', {'full': True}),
+                ('rebuild_timelines', {}),
+            ):
+                self.timed(command, lambda: call_command(
+                    command, stdout=self.stdout, **kwargs))
+        get_response_cache().clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded the dataset in {time.perf_counter() - started:.1f}s.'))
+
+    def timed(self, label, func):
+        started = time.perf_counter()
+        result = func()
+        self.stdout.write(f'{label}: {time.perf_counter() - started:.1f}s')
+        return result
+
+    def insert(self, model, objects):
+        def run():
+            with transaction.atomic():
+                return bulk_insert(model, objects, self.batch_size)
+        ids = self.timed(f'{model._meta.label}', run)
+        self.stdout.write(f'  {len(ids)} rows')
+        return ids
+
+    def users(self, prefix, password, count):
+        password = make_password(password)
+        for n in range(count):
+            yield User(username=f'{prefix}_{n}', password=password)
+
+    def insert_posts(self, user_ids, count, prefix):
+        '''
+        Inserts the posts and returns their (id, created_at) pairs.
+        '''
+        authors = PowerLawSampler(user_ids, self.exponent, self.rng)
+        created = []
+
+        def posts():
+            for n, author_id in enumerate(authors.sample(count)):
+                created_at = spread(self.rng, self.now, self.days)
+                created.append(created_at)
+                yield Post(
+                    owner_id=author_id,
+                    title=f'{random_text(self.rng, 4).capitalize()} '
+                          f'({prefix}-{n})',
+                    content=random_text(self.rng, 40),
+                    created_at=created_at, updated_at=created_at)
+        return list(zip(self.insert(Post, posts()), created))
+
+    def comments(self, user_ids, posts, count):
+        commenters = PowerLawSampler(user_ids, self.exponent, self.rng)
+        popular = PowerLawSampler(range(len(posts)), self.exponent, self.rng)
+        for owner_id, index in zip(
+            commenters.sample(count), popular.sample(count)
+        ):
+            post_id, posted_at = posts[index]
+            created_at = random_time_after(self.rng, posted_at, self.now)
+            yield Comment(
+                owner_id=owner_id, post_id=post_id,
+                content=random_text(self.rng, 12),
+                created_at=created_at, updated_at=created_at)
+
+    def likes(self, user_ids, posts, count):
+        likers = PowerLawSampler(user_ids, self.exponent, self.rng)
+        popular = PowerLawSampler(range(len(posts)), self.exponent, self.rng)
+        for owner_id, likes in likers.counts(count):
+            for index in popular.sample_distinct(likes):
+                post_id, posted_at = posts[index]
+                yield Like(
+                    owner_id=owner_id, post_id=post_id,
+                    created_at=random_time_after(
+                        self.rng, posted_at, self.now))
+
+    def follows(self, user_ids, count):
+        followers = PowerLawSampler(user_ids, self.exponent, self.rng)
+        popular = PowerLawSampler(user_ids, self.exponent, self.rng)
+        for owner_id, follows in followers.counts(count):
+            for followed_id in popular.sample_distinct(
+                follows, exclude=owner_id
+            ):
+                yield Follower(
+                    owner_id=owner_id, followed_id=followed_id,
+                    created_at=spread(self.rng, self.now, self.days))
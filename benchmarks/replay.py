@@ -0,0 +1,127 @@
+import json
+import queue
+import re
+import threading
+import time
+
+import requests
+
+from .loadtest import summarize
+
+PARAMETER = re.compile(r'<(?:[^>:]+:)?([^>]+)>')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def load_traffic(path, reads_only=False, limit=None):
+    '''
+    Reads a traffic capture log and returns its records in time order,
+    skipping the writes if reads_only.
+    '''
+    records = []
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if reads_only and record['method'] not in SAFE_METHODS:
+                continue
+            records.append(record)
+    records.sort(key=lambda record: record['ts'])
+    return records[:limit] if limit else records
+
+
+def build_path(route, kwargs):
+    '''
+    Returns the path of a URL pattern, e.g. 'posts/<int:pk>', with its
+    parameters filled in from kwargs.
+    '''
+    return '/' + PARAMETER.sub(lambda match: str(kwargs[match[1]]), route)
+
+
+class Replayer:
+    '''
+    Replays captured traffic against a server with a pool of worker
+    threads.
+
+    A dispatcher releases each record at its recorded offset from the
+    first record, divided by the speed-up factor, or as fast as the
+    workers take them with a speed-up of 0. Every worker has an
+    anonymous client and an authenticated one and sends each record with
+    the client matching its recorded auth state.
+
+    Attributes:
+        workers (list): The (anonymous, authenticated) client pairs.
+        speedup (float): How many times faster than recorded to replay.
+        samples (dict): The (status, seconds, queries) samples per view.
+        lag (list): How many seconds each request was sent late, when
+            the workers could not keep up with the schedule.
+    '''
+
+    def __init__(self, workers, speedup):
+        self.workers = workers
+        self.speedup = speedup
+        self.samples = {}
+        self.lag = []
+        self.lock = threading.Lock()
+
+    def run(self, records):
+        '''
+        Replays the records and returns the elapsed seconds.
+        '''
+        pending = queue.Queue(maxsize=len(self.workers) * 2)
+        threads = [
+            threading.Thread(target=self.work, args=(pending, *clients))
+            for clients in self.workers
+        ]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        first = records[0]['ts'] if records else 0
+        for record in records:
+            due = started
+            if self.speedup:
+                due += (record['ts'] - first) / self.speedup
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pending.put((due, record))
+        for _ in threads:
+            pending.put(None)
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def work(self, pending, anonymous, authenticated):
+        while (item := pending.get()) is not None:
+            due, record = item
+            client = authenticated if record['authenticated'] else anonymous
+            lag = time.perf_counter() - due
+            try:
+                sample = client.request(
+                    record['method'],
+                    build_path(record['route'], record['kwargs']),
+                    params=record['query'], data=record['body'])
+            except requests.RequestException:
+                sample = (599, 0.0, None)
+            with self.lock:
+                self.samples.setdefault(record['view'], []).append(sample)
+                if self.speedup:
+                    self.lag.append(lag)
+
+    def report(self, elapsed):
+        '''
+        Returns the summary of each view, see summarize(), with the
+        share of the total latency spent in the view, sorted by share.
+        '''
+        total = sum(
+            seconds for samples in self.samples.values()
+            for _, seconds, _ in samples) or 1
+        views = {}
+        for view, samples in self.samples.items():
+            views[view] = {
+                **summarize(samples, elapsed),
+                'share': round(
+                    sum(seconds for _, seconds, _ in samples) / total, 4),
+            }
+        return dict(sorted(
+            views.items(), key=lambda item: -item[1]['share']))
@@ -0,0 +1,125 @@
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.db import models
+
+WORDS = (
+    'django', 'python', 'react', 'api', 'cache', 'query', 'index', 'docker',
+    'deploy', 'latency', 'database', 'postgres', 'sqlite', 'rust', 'linux',
+    'keyboard', 'monitor', 'laptop', 'setup', 'desk', 'cloud', 'serverless',
+    'testing', 'refactor', 'review', 'release', 'startup', 'frontend',
+    'backend', 'security', 'typescript', 'kernel', 'compiler', 'network',
+)
+
+
+class PowerLawSampler:
+    '''
+    Draws ids with a probability proportional to 1 / rank ** exponent,
+    so a few ids are drawn very often and most rarely, as with the
+    popularity of posts or the follower counts of users.
+
+    The ranks are assigned in random order, so popularity does not
+    follow the ids.
+
+    Attributes:
+        ids (list): The ids to draw from, in rank order.
+        cum_weights (list): The cumulative weight of each rank.
+    '''
+
+    def __init__(self, ids, exponent, rng):
+        self.rng = rng
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.ids) + 1)))
+
+    def sample(self, k):
+        '''
+        Returns k ids drawn with replacement.
+        '''
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+    def sample_distinct(self, k, exclude=None, attempts=8):
+        '''
+        Returns a set of up to k distinct ids, leaving out exclude. Fewer
+        ids are returned when the most popular ones keep being drawn
+        again.
+        '''
+        k = min(k, len(self.ids) - (exclude is not None))
+        chosen = set()
+        for _ in range(attempts):
+            if len(chosen) >= k:
+                break
+            chosen.update(self.sample(k - len(chosen)))
+            chosen.discard(exclude)
+        return chosen
+
+    def counts(self, total):
+        '''
+        Spreads total over the ids along the power law and returns the
+        (id, count) pairs of the ids that got any.
+        '''
+        counts = {}
+        for item in self.sample(total):
+            counts[item] = counts.get(item, 0) + 1
+        return counts.items()
+
+
+def random_time_after(rng, start, end, skew=3):
+    '''
+    Returns a time between start and end, most likely close to start,
+    as engagement is highest right after a post is published.
+    '''
+    return start + (end - start) * rng.random() ** skew
+
+
+def random_text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+@contextmanager
+def manual_timestamps(*model_classes):
+    '''
+    Lets the given models be saved with explicit created_at and
+    updated_at values by turning off auto_now and auto_now_add on their
+    date fields for the duration of the block.
+    '''
+    changed = []
+    for model in model_classes:
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.DateField) and (
+                field.auto_now or field.auto_now_add
+            ):
+                changed.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in changed:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def bulk_insert(model, objects, batch_size):
+    '''
+    Inserts the objects yielded by an iterable with bulk_create, one
+    batch at a time, so at most batch_size objects are held in memory.
+    Signals are not sent.
+
+    Returns:
+        list: The primary keys of the inserted rows.
+    '''
+    ids = []
+    objects = iter(objects)
+    while batch := list(islice(objects, batch_size)):
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        ids.extend(obj.pk for obj in batch)
+    return ids
+
+
+def spread(rng, now, days):
+    '''
+    Returns a random time within the given number of days before now.
+    '''
+    return now - timedelta(seconds=rng.random() * days * 86400)
@@ -0,0 +1,251 @@
+import json
+import os
+import random
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F, Q
+from django.test import LiveServerTestCase, SimpleTestCase, TestCase
+
+from profiles.models import Profile
+from posts.models import Post
+from comments.models import Comment
+from likes.models import Like
+from followers.models import Follower
+from trending.models import TrendingScore
+from .loadtest import compare_results, parse_query_count, summarize
+from .replay import build_path, load_traffic
+from .seeding import PowerLawSampler
+
+
+def seed(**options):
+    options.setdefault("scale", 0.02)
+    call_command("seed_dataset", force=True, stdout=StringIO(), **options)
+
+
+class PowerLawSamplerTests(TestCase):
+    def test_draws_are_skewed_towards_the_top_ranks(self):
+        sampler = PowerLawSampler(range(1000), 1.0, random.Random(0))
+        counts = dict(sampler.counts(10000))
+        top = sampler.ids[0]
+        self.assertGreater(counts[top], 10000 / 1000 * 50)
+        self.assertLess(len(counts), 1000)
+
+    def test_distinct_samples_exclude_the_given_id(self):
+        sampler = PowerLawSampler(range(10), 2.0, random.Random(0))
+        chosen = sampler.sample_distinct(20, exclude=3)
+        self.assertNotIn(3, chosen)
+        self.assertLessEqual(len(chosen), 9)
+
+
+class SeedDatasetTests(TestCase):
+    def test_seeds_consistent_dataset(self):
+        seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Profile.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 400)
+        self.assertTrue(Like.objects.exists())
+        self.assertTrue(Follower.objects.exists())
+        self.assertFalse(Follower.objects.filter(owner=F("followed")).exists())
+        self.assertFalse(Like.objects.filter(
+            created_at__lt=F("post__created_at")).exists())
+
+        drifted = Post.objects.annotate(
+            actual=Count("likes", distinct=True),
+        ).filter(~Q(likes_count=F("actual")))
+        self.assertFalse(drifted.exists())
+        top = Profile.objects.order_by("-followers_count").first()
+        self.assertEqual(
+            top.followers_count,
+            Follower.objects.filter(followed=top.owner).count())
+        self.assertTrue(TrendingScore.objects.exists())
+        self.assertTrue(self.client.login(
+            username="seed_0", password="seed-pass-1234"))
+
+    def test_seeded_profiles_match_signed_up_profiles(self):
+        seed(scale=0.002, skip_derived=True)
+        signed_up = User.objects.create_user(username="fresh", password="x")
+        skipped = {"id", "owner", "created_at", "updated_at",
+                   "counters_updated_at"}
+        fields = [field.attname for field in Profile._meta.concrete_fields
+                  if field.name not in skipped]
+        seeded = Profile.objects.filter(
+            owner__username__startswith="seed_").values(*fields)
+        expected = Profile.objects.values(*fields).get(owner=signed_up)
+        self.assertTrue(seeded)
+        for row in seeded:
+            self.assertEqual(row, expected)
+
+    def test_same_seed_gives_same_dataset(self):
+        seed(prefix="a")
+        seed(prefix="b")
+        likes = [
+            Like.objects.filter(owner__username__startswith=prefix).count()
+            for prefix in ("a_", "b_")
+        ]
+        self.assertEqual(likes[0], likes[1])
+
+    def test_existing_prefix_is_rejected(self):
+        seed(skip_derived=True)
+        with self.assertRaises(CommandError):
+            seed(skip_derived=True)
+
+
+class LoadTestTests(SimpleTestCase):
+    def result(self, p95, queries=2, errors=0):
+        return {"scenarios": {"posts/anonymous": {
+            "p95_ms": p95, "queries": queries, "errors": errors,
+            "throughput": 100.0}}}
+
+    def test_parses_query_count_from_server_timing(self):
+        self.assertEqual(parse_query_count(
+            'db;dur=1.2;desc="3 queries", total;dur=4.0'), 3)
+        self.assertIsNone(parse_query_count(None))
+
+    def test_summarizes_samples(self):
+        samples = [(200, n / 1000, 2) for n in range(1, 101)]
+        samples.append((500, 0.5, None))
+        summary = summarize(samples, 2.0)
+        self.assertEqual(summary["requests"], 101)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["throughput"], 50.5)
+        self.assertEqual(summary["p50_ms"], 51)
+        self.assertEqual(summary["p99_ms"], 100)
+        self.assertEqual(summary["queries"], 2)
+
+    def test_flags_slower_p95_more_queries_and_new_errors(self):
+        _, regressions = compare_results(
+            self.result(10), self.result(11.5), 0.2)
+        self.assertEqual(regressions, [])
+        _, regressions = compare_results(
+            self.result(10), self.result(13, queries=3, errors=1), 0.2)
+        self.assertEqual(len(regressions), 3)
+
+
+class BenchmarkHttpTests(LiveServerTestCase):
+    def test_benchmarks_endpoints_and_compares_with_baseline(self):
+        seed(scale=0.01, skip_derived=True)
+        path = os.path.join(tempfile.mkdtemp(), "baseline.json")
+        # The live server threads share the in-memory database connection,
+        # so concurrent requests would count each other's queries.
+        options = {
+            "url": self.live_server_url, "requests": 4, "concurrency": 1,
+            "warmup": 1, "stdout": StringIO(),
+        }
+        call_command("benchmark_http", save=path, **options)
+        with open(path) as file:
+            results = json.load(file)
+        self.assertEqual(len(results["scenarios"]), 12)
+        for result in results["scenarios"].values():
+            self.assertEqual(result["requests"], 4)
+            self.assertEqual(result["errors"], 0)
+            self.assertIsNotNone(result["queries"])
+
+        results["scenarios"]["posts/authenticated"]["queries"] = 0
+        with open(path, "w") as file:
+            json.dump(results, file)
+        with self.assertRaisesMessage(CommandError, "posts/authenticated"):
+            call_command(
+                "benchmark_http", compare=path, threshold=100,
+                endpoint=["posts"], **options)
+
+
+class BenchmarkAsgiTests(LiveServerTestCase):
+    def test_benchmarks_every_endpoint_on_both_servers(self):
+        seed(scale=0.01, skip_derived=True)
+        path = os.path.join(tempfile.mkdtemp(), "results.json")
+        stdout = StringIO()
+        # Concurrency 1 for the shared in-memory database connection.
+        call_command(
+            "benchmark_asgi", wsgi_url=self.live_server_url,
+            asgi_url=self.live_server_url, requests=3, concurrency=1,
+            warmup=0, save=path, stdout=stdout)
+        with open(path) as file:
+            scenarios = json.load(file)["scenarios"]
+        self.assertEqual(len(scenarios), 5)
+        for result in scenarios.values():
+            self.assertEqual(result["asgi"]["path"], result["wsgi"]["path"])
+            for server in ("wsgi", "asgi"):
+                self.assertEqual(result[server]["requests"], 3)
+                self.assertEqual(result[server]["errors"], 0)
+        self.assertIn("req/s on ASGI vs WSGI", stdout.getvalue())
+
+
+def write_log(records):
+    path = os.path.join(tempfile.mkdtemp(), "traffic.jsonl")
+    with open(path, "w") as file:
+        for record in records:
+            file.write(json.dumps(record) + "\n")
+    return path
+
+
+def record(ts, route, method="GET", authenticated=False, **fields):
+    return {
+        "ts": ts, "method": method, "view": fields.pop("view", route),
+        "route": route, "kwargs": fields.pop("kwargs", {}),
+        "query": fields.pop("query", {}), "body": fields.pop("body", None),
+        "authenticated": authenticated, "status": 200, "duration_ms": 1.0,
+        "queries": 1,
+    }
+
+
+class ReplayTests(SimpleTestCase):
+    def test_builds_paths_from_url_patterns(self):
+        self.assertEqual(build_path("posts/<int:pk>", {"pk": 7}), "/posts/7")
+        self.assertEqual(
+            build_path("profiles/<pk>/followers/", {"pk": 3}),
+            "/profiles/3/followers/")
+        self.assertEqual(build_path("", {}), "/")
+
+    def test_loads_records_in_time_order(self):
+        path = write_log([
+            record(2, "posts/"), record(1, "likes/", method="POST"),
+            record(3, "profiles/"),
+        ])
+        self.assertEqual(
+            [r["route"] for r in load_traffic(path)],
+            ["likes/", "posts/", "profiles/"])
+        self.assertEqual(
+            [r["route"] for r in load_traffic(path, reads_only=True)],
+            ["posts/", "profiles/"])
+        self.assertEqual(len(load_traffic(path, limit=1)), 1)
+
+
+class ReplayTrafficTests(LiveServerTestCase):
+    def test_replays_log_and_reports_latency_per_view(self):
+        seed(scale=0.01, skip_derived=True)
+        post = Post.objects.first()
+        log = write_log([
+            record(0, "posts/", view="posts.views.PostList",
+                   query={"ordering": ["-id"]}),
+            record(0.01, "posts/<int:pk>", view="posts.views.PostDetail",
+                   kwargs={"pk": post.id}, authenticated=True),
+            record(0.02, "likes/", method="POST", authenticated=True,
+                   view="likes.views.LikeList", body={"post": post.id}),
+            record(0.03, "posts/<int:pk>", view="posts.views.PostDetail",
+                   kwargs={"pk": 0}),
+        ])
+        report = os.path.join(tempfile.mkdtemp(), "report.json")
+        # The live server threads share the in-memory database connection.
+        call_command(
+            "replay_traffic", log, url=self.live_server_url, concurrency=1,
+            speedup=0, save=report, stdout=StringIO())
+        with open(report) as file:
+            views = json.load(file)["views"]
+        self.assertEqual(views["posts.views.PostList"]["errors"], 0)
+        self.assertEqual(views["posts.views.PostDetail"]["requests"], 2)
+        self.assertEqual(views["posts.views.PostDetail"]["errors"], 1)
+        self.assertIn(views["likes.views.LikeList"]["errors"], (0, 1))
+        self.assertAlmostEqual(
+            sum(view["share"] for view in views.values()), 1, places=2)
+
+    def test_authenticated_records_need_seed_users(self):
+        log = write_log([record(0, "posts/", authenticated=True)])
+        with self.assertRaisesMessage(CommandError, "seed_dataset"):
+            call_command(
+                "replay_traffic", log, url=self.live_server_url,
+                stdout=StringIO())
@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
-from posts.models import Post
+from techstables_backend.cache import invalidate
+from posts.models import Post, update_post_counter
 
 
 class Comment(models.Model):
@@ -19,8 +21,12 @@ class Comment(models.Model):
 
     Meta:
         ordering (list): Orders comments by creation date in descending order.
+        indexes (list): Back the per-post comment feed and the scans of
+                        recent comments when refreshing trending scores.
 
     Methods:
+        save(): Saves the comment and updates the post's comments_count
+                in the same transaction.
         __str__(): Returns a string representation of the comment content.
     '''
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -31,6 +37,48 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at'], name='comments_created_idx'),
+            models.Index(
+                fields=['post', '-created_at', '-id'],
+                name='comments_post_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.content
+
+
+def increment_comments_count(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that increments the post's comments_count
+    when a new Comment is created.
+    """
+    if created and not raw:
+        update_post_counter(instance.post_id, 'comments_count', 1)
+
+
+def decrement_comments_count(sender, instance, **kwargs):
+    """
+    Signal receiver that decrements the post's comments_count
+    when a Comment is deleted.
+    """
+    update_post_counter(instance.post_id, 'comments_count', -1)
+
+
+def invalidate_comment_responses(sender, instance, **kwargs):
+    """
+    Signal receiver that invalidates the cached comments of the post
+    and the responses showing its comments_count.
+    """
+    post_id = instance.post_id
+    invalidate('posts', f'post:{post_id}', f'comments:{post_id}')
+
+
+post_save.connect(increment_comments_count, sender=Comment)
+post_delete.connect(decrement_comments_count, sender=Comment)
+post_save.connect(invalidate_comment_responses, sender=Comment)
+post_delete.connect(invalidate_comment_responses, sender=Comment)
@@ -1,9 +1,35 @@
-from django.contrib.humanize.templatetags.humanize import naturaltime
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from techstables_backend.humanize import NaturalTimeBatch
+from techstables_backend.metrics import TimedSerializerMixin
 from .models import Comment
 
 
-class CommentSerializer(serializers.ModelSerializer):
+def wants_iso_timestamps(request):
+    '''
+    Returns True if the request asked for ISO 8601 timestamps with
+    ?timestamps=iso instead of natural times.
+    '''
+    return request is not None and (
+        request.query_params.get('timestamps') == 'iso')
+
+
+class CommentListSerializer(serializers.ListSerializer):
+    '''
+    List serializer formatting the timestamps of every comment on the
+    page in one pass, relative to the same "now": the view's, if it
+    passed a NaturalTimeBatch in the 'natural_time' context key.
+    '''
+
+    def to_representation(self, data):
+        self.child.natural_time = (
+            self.context.get('natural_time') or NaturalTimeBatch())
+        try:
+            return super().to_representation(data)
+        finally:
+            self.child.natural_time = None
+
+
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     '''
     Serializer for the Comment model, providing fields for comment details
     and additional user-related information.
@@ -16,10 +42,15 @@ class CommentSerializer(serializers.ModelSerializer):
         profile_image (ReadOnlyField): The URL of the owner's profile image.
         created_at (SerializerMethodField): Human-readable creation time.
         updated_at (SerializerMethodField): Human-readable last update time.
+        natural_time (NaturalTimeBatch): The batch formatting the
+            timestamps of the current page, set by CommentListSerializer.
+
+    Clients can request ISO 8601 timestamps instead with ?timestamps=iso.
 
     Methods:
         get_is_owner(obj): Determines if the request user
             is the owner of the comment.
+        format_timestamp(value): Formats a timestamp for the response.
         get_created_at(obj): Returns a human-readable creation time.
         get_updated_at(obj): Returns a human-readable last update time.
 
@@ -33,6 +64,7 @@ class CommentSerializer(serializers.ModelSerializer):
     profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
     created_at = serializers.SerializerMethodField()
     updated_at = serializers.SerializerMethodField()
+    natural_time = None
 
     def get_is_owner(self, obj):
         '''
@@ -46,7 +78,7 @@ class CommentSerializer(serializers.ModelSerializer):
             bool: True if the request user is the owner of the object, False otherwise
         '''
         request = self.context['request']
-        return request.user == obj.owner
+        return obj.owner_id == request.user.id
 
     def get_created_at(self, obj):
         '''
@@ -59,7 +91,7 @@ class CommentSerializer(serializers.ModelSerializer):
             str: A natural language representation of the creation time,
                 such as "3 days ago".
         '''
-        return naturaltime(obj.created_at)
+        return self.format_timestamp(obj.created_at)
 
     def get_updated_at(self, obj):
         '''
@@ -73,9 +105,24 @@ class CommentSerializer(serializers.ModelSerializer):
             str: A natural language representation of the last update time,
                 such as "2 hours ago".
         '''
-        return naturaltime(obj.updated_at)
+        return self.format_timestamp(obj.updated_at)
+
+    def format_timestamp(self, value):
+        '''
+        Returns value as an ISO 8601 string if the request asked for
+        ?timestamps=iso, and as a natural time such as "3 days ago"
+        otherwise.
+        '''
+        if wants_iso_timestamps(self.context.get('request')):
+            return serializers.DateTimeField(
+                format=ISO_8601).to_representation(value)
+        natural_time = (
+            self.natural_time or self.context.get('natural_time')
+            or NaturalTimeBatch())
+        return natural_time.format(value)
 
     class Meta:
+        list_serializer_class = CommentListSerializer
         model = Comment
         fields = [
             'id', 'owner', 'is_owner', 'profile_id', 'profile_image',
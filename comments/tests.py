@@ -1,3 +1,114 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.contrib.humanize.templatetags import humanize
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from techstables_backend.humanize import NaturalTimeBatch
+from .models import Comment
+
+NOW = datetime(2025, 3, 10, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW if tz else NOW.replace(tzinfo=None)
+
+
+class NaturalTimeBatchTests(APITestCase):
+    def test_matches_naturaltime(self):
+        batch = NaturalTimeBatch(now=NOW)
+        deltas = [
+            timedelta(0), timedelta(seconds=1), timedelta(seconds=59),
+            timedelta(minutes=1), timedelta(minutes=59, seconds=30),
+            timedelta(hours=1), timedelta(hours=23, minutes=59),
+            timedelta(days=1), timedelta(days=45, hours=3),
+            timedelta(days=800),
+        ]
+        with mock.patch.object(humanize, "datetime", FrozenDatetime):
+            for delta in deltas:
+                for value in (NOW - delta, NOW + delta):
+                    self.assertEqual(
+                        batch.format(value), humanize.naturaltime(value))
+
+
+class PostCommentListTests(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass1234")
+            for i in range(3)
+        ]
+        self.post = Post.objects.create(
+            owner=self.users[0], title="Thread", content="c")
+        self.other = Post.objects.create(
+            owner=self.users[0], title="Other", content="c")
+        self.client.login(username="user0", password="pass1234")
+
+    def add_comments(self, count, post=None):
+        return [
+            Comment.objects.create(
+                owner=self.users[i % 3], post=post or self.post,
+                content=f"c{i}")
+            for i in range(count)
+        ]
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp, len(ctx.captured_queries)
+
+    def test_pages_cover_only_the_posts_comments(self):
+        comments = self.add_comments(13)
+        self.add_comments(2, post=self.other)
+
+        first, _ = self.get(f"/posts/{self.post.id}/comments/")
+        second, _ = self.get(first.data["next"])
+        self.assertIsNone(second.data["next"])
+        ids = [item["id"] for item in
+               first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, [comment.id for comment in reversed(comments)])
+        self.assertEqual(first.data["results"][0]["profile_id"],
+                         comments[-1].owner.profile.id)
+
+    def test_query_count_does_not_grow_with_the_thread(self):
+        self.add_comments(2)
+        _, short = self.get(f"/posts/{self.post.id}/comments/")
+        self.add_comments(10)
+        _, long = self.get(f"/posts/{self.post.id}/comments/")
+        self.assertEqual(short, long)
+
+    def test_comments_of_a_missing_post_are_not_found(self):
+        resp = self.client.get("/posts/999/comments/")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CommentTimestampTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="ann", password="pass1234")
+        post = Post.objects.create(owner=user, title="Thread", content="c")
+        for i in range(5):
+            Comment.objects.create(owner=user, post=post, content=f"c{i}")
+        self.url = f"/posts/{post.id}/comments/"
+
+    def test_now_is_read_once_per_page(self):
+        with mock.patch(
+            "techstables_backend.humanize.datetime", wraps=datetime
+        ) as clock:
+            resp = self.client.get(self.url)
+        self.assertEqual(clock.now.call_count, 1)
+        self.assertEqual(resp.data["results"][0]["created_at"], "now")
+
+    def test_iso_timestamps_on_request(self):
+        resp = self.client.get(self.url + "?timestamps=iso")
+        comment = Comment.objects.get(pk=resp.data["results"][0]["id"])
+        self.assertEqual(
+            datetime.fromisoformat(
+                resp.data["results"][0]["created_at"].replace("Z", "+00:00")),
+            comment.created_at)
@@ -3,5 +3,6 @@ from comments import views
 
 urlpatterns = [
     path('comments/', views.CommentList.as_view()),
-    path('comments/<int:pk>', views.CommentDetail.as_view())
+    path('comments/<int:pk>', views.CommentDetail.as_view()),
+    path('posts/<int:pk>/comments/', views.PostCommentList.as_view()),
 ]
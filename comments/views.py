@@ -1,11 +1,78 @@
+from django.http import Http404
 from rest_framework import generics, permissions
 from django_filters.rest_framework import DjangoFilterBackend
+from techstables_backend.cache import AnonymousResponseCacheMixin
+from techstables_backend.humanize import NaturalTimeBatch
+from techstables_backend.conditional import (
+    ConditionalDetailMixin, ConditionalListMixin
+)
+from techstables_backend.pagination import KeysetPagination
 from techstables_backend.permissions import IsOwnerOrReadOnly
+from posts.models import Post
 from .models import Comment
-from .serializers import CommentSerializer, CommentDetailSerializer
+from .serializers import (
+    CommentSerializer, CommentDetailSerializer, wants_iso_timestamps,
+)
 
 
-class CommentList(generics.ListCreateAPIView):
+class NaturalTimeValidatorsMixin:
+    '''
+    View mixin hashing the natural times shown for comments, such as
+    "3 minutes ago", into their ETags. They change as time passes while
+    the rows do not, so validators read from the rows alone would answer
+    304 for a response whose times have moved on. Requests for
+    ?timestamps=iso show the stored values, so nothing is added to their
+    ETags and only they are sent a Last-Modified.
+
+    The serializer formats the times with the same NaturalTimeBatch, so
+    the ETag and the response agree on "now".
+    '''
+
+    def get_natural_time(self):
+        '''
+        Returns the NaturalTimeBatch of the request.
+        '''
+        if not hasattr(self, 'natural_time'):
+            self.natural_time = NaturalTimeBatch()
+        return self.natural_time
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['natural_time'] = self.get_natural_time()
+        return context
+
+    def get_natural_time_values(self, timestamps):
+        '''
+        Returns the active language and the natural times shown for the
+        given timestamps, or an empty list for ?timestamps=iso.
+        '''
+        if wants_iso_timestamps(self.request):
+            return []
+        natural_time = self.get_natural_time()
+        return [natural_time.language] + [
+            natural_time.format(value) for value in timestamps
+        ]
+
+    def get_list_validator_values(self, rows):
+        timestamps = [
+            value for row in rows for value in (row.created_at, row.updated_at)
+        ]
+        return super().get_list_validator_values(rows) + [
+            self.get_natural_time_values(timestamps)]
+
+    def get_unstored_validator_values(self, row):
+        return super().get_unstored_validator_values(row) + (
+            self.get_natural_time_values(
+                [row['created_at'], row['updated_at']]))
+
+    def get_last_modified(self, row):
+        if not wants_iso_timestamps(self.request):
+            return None
+        return super().get_last_modified(row)
+
+
+class CommentList(NaturalTimeValidatorsMixin, AnonymousResponseCacheMixin,
+                  ConditionalListMixin, generics.ListCreateAPIView):
     '''
     API view for listing and creating comments.
 
@@ -14,23 +81,29 @@ class CommentList(generics.ListCreateAPIView):
     Comments can be filtered by the associated post. The owner of a
         new comment is
     automatically set to the current user.
+    Anonymous reads of a single post's comments (?post=<id>) are cached,
+    and every page carries a weak ETag, which covers the natural times
+    shown.
 
     Attributes:
         serializer_class (CommentSerializer): The serializer class used
             for the comments.
         permission_classes (list): Permissions required to access the view.
-        queryset (QuerySet): The base queryset for retrieving comments.
+        queryset (QuerySet): The base queryset for retrieving comments,
+            joined to their owner and profile.
         filter_backends (list): The backends used for filtering the queryset.
         filterset_fields (list): The fields that can be used to filter
             the queryset.
 
     Methods:
+        get_cache_namespaces(): Returns the cache namespaces of a
+            per-post read.
         perform_create(serializer): Saves a new comment with the current user
             as the owner.
     '''
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('owner__profile')
     filter_backends = [
         DjangoFilterBackend
     ]
@@ -38,17 +111,65 @@ class CommentList(generics.ListCreateAPIView):
         'post'
     ]
 
+    def get_cache_namespaces(self):
+        post_id = self.request.query_params.get('post', '')
+        if not post_id.isdigit():
+            return []
+        return [f'comments:{int(post_id)}', 'authors']
+
     def perform_create(self, serializer):
         return serializer.save(owner=self.request.user)
 
 
-class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
+class PostCommentList(NaturalTimeValidatorsMixin, AnonymousResponseCacheMixin,
+                      ConditionalListMixin, generics.ListAPIView):
+    '''
+    API view for the comment thread of a single post, newest first.
+
+    Comments are read through the (post, created_at, id) index with
+    keyset pagination, and joined to their owner and profile, so every
+    page costs the same constant number of queries however long the
+    thread is. Clients follow the 'next' links to load older comments.
+    Every page carries a weak ETag, which covers the natural times shown.
+
+    Attributes:
+        serializer_class (CommentSerializer): The serializer class used
+            for the comments.
+        pagination_class (KeysetPagination): Keyset pagination on
+            (created_at, id).
+        cache_namespaces (tuple): Cache namespaces the response depends on.
+    '''
+    serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
+    cache_namespaces = ('comments:{pk}', 'authors')
+
+    def get_queryset(self):
+        return Comment.objects.filter(
+            post_id=self.kwargs['pk']
+        ).select_related('owner__profile')
+
+    def list(self, request, *args, **kwargs):
+        if not Post.objects.filter(pk=self.kwargs['pk']).exists():
+            raise Http404
+        return super().list(request, *args, **kwargs)
+
+
+class CommentDetail(NaturalTimeValidatorsMixin, ConditionalDetailMixin,
+                    generics.RetrieveUpdateDestroyAPIView):
     '''
     API view for retrieving, updating, or deleting a comment instance.
 
     Uses CommentDetailSerializer for serialization and IsOwnerOrReadOnly
-    for permission control. Operates on the Comment model.
+    for permission control. Operates on the Comment model. Conditional
+    GETs are answered with a 304 from the comment's timestamps, as they
+    are shown, and its owner's username and profile image. With
+    ?timestamps=iso, If-Modified-Since is answered from the latest of
+    the comment's and the owner profile's updated_at.
     '''
     serializer_class = CommentDetailSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('owner__profile')
+    validator_fields = (
+        'created_at', 'updated_at', 'owner__username', 'owner__profile__image'
+    )
+    last_modified_fields = ('updated_at', 'owner__profile__updated_at')
@@ -0,0 +1,300 @@
+import functools
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from techstables_backend.tasks import submit
+
+
+class FollowGraph:
+    '''
+    Compact in-memory adjacency index of who follows whom.
+
+    The edges are stored in compressed sparse row form: targets holds the
+    followed user ids of every user back to back, sorted, and the slice
+    of user u is targets[offsets[u]:offsets[u + 1]]. Both are arrays of
+    64-bit integers indexed directly by user id, so the index costs
+    8 bytes per edge plus 8 bytes per user id.
+
+    Follows and unfollows made after the build are kept in small added
+    and removed overlays. Once the overlays hold more than
+    FOLLOW_GRAPH['COMPACT_THRESHOLD'] edges, FollowGraphIndex merges
+    them into new arrays in the background. The overlay sets are
+    replaced rather than modified, so the graph can be read while
+    another thread applies a change.
+
+    Attributes:
+        offsets (array): Start of each user's slice in targets.
+        targets (array): The followed user ids, grouped by follower.
+        added (dict): Maps user ids to the frozensets of users followed
+            since the build.
+        removed (dict): Maps user ids to the frozensets of users
+            unfollowed since the build.
+        last_follow_id (int): The highest Follower id the graph was
+            built or updated from.
+    '''
+
+    def __init__(self, offsets, targets, last_follow_id=0):
+        self.offsets = offsets
+        self.targets = targets
+        self.added = {}
+        self.removed = {}
+        self.overlay_size = 0
+        self.last_follow_id = last_follow_id
+
+    @classmethod
+    def from_edges(cls, edges, max_user_id=0, last_follow_id=0):
+        '''
+        Builds the index from (owner_id, followed_id) pairs sorted by
+        owner_id, then followed_id, in a single pass.
+
+        Args:
+            edges (iterable): The sorted edges, typically streamed from
+                the database.
+            max_user_id (int): The expected highest owner id, used to
+                size offsets. It grows on demand for higher ids, e.g.
+                users created while the edges are streamed.
+            last_follow_id (int): The highest Follower id in the edges.
+        '''
+        size = max_user_id + 2
+        offsets = array('q', bytes(8 * size))
+        targets = array('q')
+        for owner_id, followed_id in edges:
+            if owner_id + 2 > size:
+                size = owner_id + 2
+                if size > len(offsets):
+                    grown = max(size, 2 * len(offsets))
+                    offsets.frombytes(bytes(8 * (grown - len(offsets))))
+            targets.append(followed_id)
+            offsets[owner_id + 1] += 1
+        del offsets[size:]
+        for user_id in range(1, len(offsets)):
+            offsets[user_id] += offsets[user_id - 1]
+        return cls(offsets, targets, last_follow_id)
+
+    def base_range(self, user_id):
+        if user_id + 1 >= len(self.offsets):
+            return 0, 0
+        return self.offsets[user_id], self.offsets[user_id + 1]
+
+    def has_base_edge(self, owner_id, followed_id):
+        start, end = self.base_range(owner_id)
+        position = bisect_left(self.targets, followed_id, start, end)
+        return position < end and self.targets[position] == followed_id
+
+    def following(self, user_id):
+        '''
+        Returns the ids of the users user_id follows.
+        '''
+        start, end = self.base_range(user_id)
+        ids = self.targets[start:end]
+        removed = self.removed.get(user_id)
+        if removed:
+            ids = [followed_id for followed_id in ids
+                   if followed_id not in removed]
+        added = self.added.get(user_id)
+        if added:
+            ids = list(ids) + list(added)
+        return ids
+
+    def add(self, owner_id, followed_id):
+        removed = self.removed.get(owner_id, frozenset())
+        if followed_id in removed:
+            self.removed[owner_id] = removed - {followed_id}
+            self.overlay_size -= 1
+        elif not self.has_base_edge(owner_id, followed_id):
+            added = self.added.get(owner_id, frozenset())
+            if followed_id not in added:
+                self.added[owner_id] = added | {followed_id}
+                self.overlay_size += 1
+
+    def remove(self, owner_id, followed_id):
+        added = self.added.get(owner_id, frozenset())
+        if followed_id in added:
+            self.added[owner_id] = added - {followed_id}
+            self.overlay_size -= 1
+        elif self.has_base_edge(owner_id, followed_id):
+            removed = self.removed.get(owner_id, frozenset())
+            if followed_id not in removed:
+                self.removed[owner_id] = removed | {followed_id}
+                self.overlay_size += 1
+
+    def needs_compaction(self):
+        return self.overlay_size > settings.FOLLOW_GRAPH['COMPACT_THRESHOLD']
+
+    def copy(self):
+        '''
+        Returns a graph sharing the arrays and overlay sets, which are
+        never modified, with copies of the overlay dicts.
+        '''
+        graph = FollowGraph(self.offsets, self.targets, self.last_follow_id)
+        graph.added = dict(self.added)
+        graph.removed = dict(self.removed)
+        graph.overlay_size = self.overlay_size
+        return graph
+
+    def compacted(self):
+        '''
+        Returns a new graph holding the same edges, with the overlays
+        merged into its arrays.
+        '''
+        owners = range(max(
+            len(self.offsets) - 1, max(self.added, default=0) + 1))
+        return FollowGraph.from_edges(
+            (
+                (owner_id, followed_id)
+                for owner_id in owners
+                for followed_id in sorted(self.following(owner_id))
+            ),
+            len(owners),
+            self.last_follow_id,
+        )
+
+    def suggest(self, user_id, limit):
+        '''
+        Returns up to limit (user_id, mutual_count) pairs of users followed
+        by the users user_id follows, ranked by how many of them follow
+        each one, then by id. Users already followed and user_id itself
+        are left out.
+        '''
+        following = set(self.following(user_id))
+        counts = Counter()
+        for followed_id in following:
+            counts.update(self.following(followed_id))
+        counts.pop(user_id, None)
+        for followed_id in following:
+            counts.pop(followed_id, None)
+        return heapq.nsmallest(
+            limit, counts.items(), key=lambda item: (-item[1], item[0]))
+
+    @property
+    def nbytes(self):
+        return (
+            self.offsets.itemsize * len(self.offsets)
+            + self.targets.itemsize * len(self.targets)
+        )
+
+
+class FollowGraphIndex:
+    '''
+    Holds the process-wide FollowGraph.
+
+    The graph is loaded by a background task on first use; until it is
+    ready, suggestions come from the fallback query. Follows and
+    unfollows committed by this process are applied to it right away by
+    the Follower signal receivers. Follows made by other worker
+    processes are added by a background update once the graph is older
+    than FOLLOW_GRAPH['MAX_AGE'] seconds, which only reads the Follower
+    rows created since. Their unfollows are picked up by loading the
+    whole graph again every FOLLOW_GRAPH['RELOAD_AGE'] seconds. Overlays
+    grown past FOLLOW_GRAPH['COMPACT_THRESHOLD'] edges are compacted by
+    a background task too. The current graph keeps serving reads in the
+    meantime, and local changes made while a task runs are replayed onto
+    the new graph before it is swapped in.
+
+    Suggestions are computed without holding the lock, since the graph's
+    overlay sets are replaced rather than modified, so their counting
+    does not block the signal receivers of other threads.
+
+    Attributes:
+        loader (callable): Returns a freshly loaded FollowGraph.
+        fallback (callable): Returns the suggestions for (user_id, limit)
+            while there is no graph.
+        updater (callable): Optional; adds the follows made since the
+            given graph's last_follow_id to it and returns it.
+    '''
+
+    def __init__(self, loader, fallback, updater=None):
+        self.loader = loader
+        self.fallback = fallback
+        self.updater = updater
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        '''
+        Drops the graph, so the next read loads it again.
+        '''
+        with self.lock:
+            self.graph = None
+            self.loaded_at = 0
+            self.updated_at = 0
+            self.replay = None
+
+    def get(self):
+        '''
+        Returns the current graph, or None until the first one is loaded,
+        scheduling a load, an update or a compaction when it is due.
+        '''
+        options = settings.FOLLOW_GRAPH
+        with self.lock:
+            graph = self.graph
+            task = None
+            if self.replay is None:
+                now = time.monotonic()
+                if graph is None or (
+                    now - self.loaded_at > options['RELOAD_AGE']
+                ):
+                    task = (self.loader, 'load')
+                elif self.updater is not None and (
+                    now - self.updated_at > options['MAX_AGE']
+                ):
+                    task = (
+                        functools.partial(self.updater, graph.copy()),
+                        'update')
+                elif graph.needs_compaction():
+                    task = (graph.copy().compacted, 'compact')
+            if task is not None:
+                self.replay = []
+        if task is not None:
+            submit(self.swap, *task)
+        return self.graph
+
+    def swap(self, build, kind):
+        '''
+        Replaces the graph with the one returned by build, after
+        replaying the changes applied since the task was scheduled.
+
+        Args:
+            build (callable): Returns the new graph.
+            kind (str): 'load' if the new graph was read from the
+                database, 'update' if the follows made since were added
+                to it, or 'compact'.
+        '''
+        try:
+            graph = build()
+        except Exception:
+            with self.lock:
+                self.replay = None
+            raise
+        with self.lock:
+            for operation, owner_id, followed_id in self.replay or ():
+                getattr(graph, operation)(owner_id, followed_id)
+            self.graph = graph
+            now = time.monotonic()
+            if kind == 'load':
+                self.loaded_at = now
+            if kind in ('load', 'update'):
+                self.updated_at = now
+            self.replay = None
+
+    def apply(self, operation, owner_id, followed_id):
+        '''
+        Applies a committed follow ('add') or unfollow ('remove') to the
+        graph, if it has been built.
+        '''
+        with self.lock:
+            if self.graph is not None:
+                getattr(self.graph, operation)(owner_id, followed_id)
+            if self.replay is not None:
+                self.replay.append((operation, owner_id, followed_id))
+
+    def suggest(self, user_id, limit):
+        graph = self.get()
+        if graph is None:
+            return self.fallback(user_id, limit)
+        return graph.suggest(user_id, limit)
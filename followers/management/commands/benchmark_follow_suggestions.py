@@ -0,0 +1,73 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from followers.models import Follower, load_follow_graph, suggest_follows_sql
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    '''
+    Compares follow suggestions served from the in-memory FollowGraph
+    with the equivalent SQL self-join on the Follower table.
+
+    The graph is built once, then both implementations rank suggestions
+    for the same random sample of followers. The command reports the
+    build time, the index size and per-query latencies. It fails if any
+    ranking differs between the two.
+    '''
+    help = 'Benchmarks the follow graph index against a SQL self-join.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples', type=int, default=200,
+            help='Number of users to rank suggestions for.')
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Number of suggestions per user.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        graph = load_follow_graph()
+        build_time = time.perf_counter() - started
+        self.stdout.write(
+            f'Built index of {len(graph.targets)} follows in '
+            f'{build_time:.2f}s ({graph.nbytes / 2 ** 20:.1f} MiB).')
+
+        owner_ids = list(
+            Follower.objects.order_by().values_list('owner_id', flat=True)
+            .distinct())
+        if not owner_ids:
+            self.stdout.write('No follows to benchmark.')
+            return
+        random.seed(options['seed'])
+        users = random.choices(owner_ids, k=options['samples'])
+
+        timings = {'index': [], 'sql': []}
+        mismatches = 0
+        for user_id in users:
+            started = time.perf_counter()
+            from_index = graph.suggest(user_id, options['limit'])
+            timings['index'].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            from_sql = suggest_follows_sql(user_id, options['limit'])
+            timings['sql'].append(time.perf_counter() - started)
+            mismatches += list(from_index) != list(from_sql)
+
+        for name, samples in timings.items():
+            self.stdout.write(
+                f'{name:>5}: mean {statistics.mean(samples) * 1000:.2f}ms  '
+                f'p50 {percentile(samples, 0.5) * 1000:.2f}ms  '
+                f'p95 {percentile(samples, 0.95) * 1000:.2f}ms  '
+                f'p99 {percentile(samples, 0.99) * 1000:.2f}ms')
+        if mismatches:
+            raise CommandError(
+                f'{mismatches} of {len(users)} rankings differ.')
+        self.stdout.write(self.style.SUCCESS(
+            f'All {len(users)} rankings match.'))
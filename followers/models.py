@@ -1,5 +1,14 @@
-from django.db import models
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
+from techstables_backend.cache import invalidate
+from techstables_backend.membership import MembershipCache
+from profiles.models import (
+    invalidate_profiles, profile_namespaces, update_profile_counter,
+)
+from .graph import FollowGraph, FollowGraphIndex
 
 
 class Follower(models.Model):
@@ -17,8 +26,12 @@ class Follower(models.Model):
                         in descending order.
         unique_together (list): Ensures that each follower-followed pair is
                                 unique.
+        indexes (list): Serve the followers and following lists of a user
+                        in keyset order.
 
     Methods:
+        save(): Saves the follow and updates both users' profile counters
+                in the same transaction.
         __str__(): Returns a string representation of the
                     follower relationship.
     '''
@@ -31,6 +44,159 @@ class Follower(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['owner', 'followed']
+        indexes = [
+            models.Index(
+                fields=['followed', '-created_at', '-id'],
+                name='followers_followed_idx'),
+            models.Index(
+                fields=['owner', '-created_at', '-id'],
+                name='followers_owner_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.owner} {self.followed}'
+
+
+def increment_follow_counts(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that increments the followed user's followers_count
+    and the follower's following_count when a new Follower is created.
+    """
+    if created and not raw:
+        update_profile_counter(instance.followed_id, 'followers_count', 1)
+        update_profile_counter(instance.owner_id, 'following_count', 1)
+
+
+def decrement_follow_counts(sender, instance, **kwargs):
+    """
+    Signal receiver that decrements the followed user's followers_count
+    and the follower's following_count when a Follower is deleted.
+    """
+    update_profile_counter(instance.followed_id, 'followers_count', -1)
+    update_profile_counter(instance.owner_id, 'following_count', -1)
+
+
+def load_follow_graph():
+    """
+    Builds a FollowGraph by streaming every follow in (owner, followed)
+    order, which the unique index on those columns returns without a
+    sort. Memory is bounded by the size of the index itself. The graph
+    is read from the primary, like update_follow_graph's scans.
+
+    The highest ids are read first and only size the arrays, which grow
+    for follows committed while the edges are streamed.
+    """
+    follows = Follower.objects.using(DEFAULT_DB_ALIAS)
+    latest = follows.aggregate(owner_id=Max('owner_id'), follow_id=Max('id'))
+    edges = follows.order_by('owner_id', 'followed_id').values_list(
+        'owner_id', 'followed_id')
+    return FollowGraph.from_edges(
+        edges.iterator(chunk_size=10000), latest['owner_id'] or 0,
+        latest['follow_id'] or 0)
+
+
+def update_follow_graph(graph):
+    """
+    Adds the follows made by any process since the graph was loaded or
+    last updated, read by id from the primary key index, and returns the
+    graph. The scan starts FOLLOW_GRAPH['UPDATE_OVERLAP'] ids below the
+    graph's last_follow_id to catch rows committed after a higher id was
+    read; adding a follow twice has no effect. Unfollows made by other
+    processes are left to the next full load.
+    """
+    since = graph.last_follow_id - settings.FOLLOW_GRAPH['UPDATE_OVERLAP']
+    rows = Follower.objects.using(DEFAULT_DB_ALIAS).filter(
+        id__gt=max(since, 0)).order_by('id').values_list(
+        'id', 'owner_id', 'followed_id')
+    for follow_id, owner_id, followed_id in rows.iterator(chunk_size=10000):
+        graph.add(owner_id, followed_id)
+        graph.last_follow_id = max(graph.last_follow_id, follow_id)
+    return graph
+
+
+def suggest_follows_sql(user_id, limit):
+    """
+    Returns the same ranking as FollowGraph.suggest with a SQL self-join
+    on the Follower table. It serves suggestions while the follow graph
+    is first built, and is the baseline of the
+    benchmark_follow_suggestions command.
+    """
+    following = Follower.objects.filter(owner_id=user_id).values('followed_id')
+    return list(
+        Follower.objects.filter(owner__followed__owner_id=user_id)
+        .exclude(followed_id=user_id)
+        .exclude(followed_id__in=following)
+        .order_by()
+        .values('followed_id')
+        .annotate(mutual=Count('id'))
+        .order_by('-mutual', 'followed_id')
+        .values_list('followed_id', 'mutual')[:limit]
+    )
+
+
+follow_graph = FollowGraphIndex(
+    load_follow_graph, suggest_follows_sql, update_follow_graph)
+
+
+def add_to_follow_graph(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that adds a new follow to this process's follow
+    graph once the transaction commits.
+    """
+    if created and not raw:
+        transaction.on_commit(lambda: follow_graph.apply(
+            'add', instance.owner_id, instance.followed_id))
+
+
+def remove_from_follow_graph(sender, instance, **kwargs):
+    """
+    Signal receiver that removes a deleted follow from this process's
+    follow graph once the transaction commits.
+    """
+    transaction.on_commit(lambda: follow_graph.apply(
+        'remove', instance.owner_id, instance.followed_id))
+
+
+following_users = MembershipCache(Follower, 'followed')
+
+
+def add_to_following_users(sender, instance, created, **kwargs):
+    """
+    Signal receiver that records a new follow in the follower's
+    membership set.
+    """
+    if created:
+        following_users.change(
+            instance.owner_id, instance.followed_id, instance.id)
+
+
+def remove_from_following_users(sender, instance, **kwargs):
+    """
+    Signal receiver that removes a deleted follow from the follower's
+    membership set.
+    """
+    following_users.change(instance.owner_id, instance.followed_id, None)
+
+
+def invalidate_follower_responses(sender, instance, **kwargs):
+    """
+    Signal receiver that invalidates the cached responses affected by a
+    follow or unfollow: both users' profile counts and the post feed
+    filtered by the follower's followed users.
+    """
+    invalidate(*profile_namespaces('following:{}', instance.owner_id))
+    invalidate_profiles(instance.owner_id, instance.followed_id)
+
+
+post_save.connect(increment_follow_counts, sender=Follower)
+post_delete.connect(decrement_follow_counts, sender=Follower)
+post_save.connect(add_to_follow_graph, sender=Follower)
+post_delete.connect(remove_from_follow_graph, sender=Follower)
+post_save.connect(add_to_following_users, sender=Follower)
+post_delete.connect(remove_from_following_users, sender=Follower)
+post_save.connect(invalidate_follower_responses, sender=Follower)
+post_delete.connect(invalidate_follower_responses, sender=Follower)
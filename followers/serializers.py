@@ -1,9 +1,10 @@
-from django.db import IntegrityError
 from rest_framework import serializers
+from techstables_backend.metrics import TimedSerializerMixin
+from techstables_backend.upsert import insert_ignore
 from .models import Follower
 
 
-class FollowerSerializer(serializers.ModelSerializer):
+class FollowerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     '''
     Serializer for the Follower model, providing a read-only view of the
     owner's and followed user's usernames.
@@ -17,8 +18,8 @@ class FollowerSerializer(serializers.ModelSerializer):
         fields (list): The fields to be serialized.
 
     Methods:
-        create(validated_data): Creates a new Follower instance, handling
-        potential IntegrityError exceptions to prevent duplicate entries.
+        create(validated_data): Inserts the Follower with INSERT ... ON
+        CONFLICT DO NOTHING, raising a validation error if it already exists.
     '''
     owner = serializers.ReadOnlyField(source='owner.username')
     followed_name = serializers.ReadOnlyField(source='followed.username')
@@ -30,9 +31,51 @@ class FollowerSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        try:
-            return super().create(validated_data)
-        except IntegrityError:
+        instance = insert_ignore(
+            Follower, ['owner', 'followed'], **validated_data)
+        if instance is None:
             raise serializers.ValidationError({
                 'details': 'possible duplicate'
             })
+        return instance
+
+
+class FollowerUserSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
+    '''
+    Serializer for an entry of a user's followers list, showing the
+    following user.
+
+    Attributes:
+        user_id (ReadOnlyField): The ID of the following user.
+        username (ReadOnlyField): The username of the following user.
+        profile_id (ReadOnlyField): The ID of the following user's profile.
+        profile_image (ReadOnlyField): The URL of their profile image.
+
+    Meta:
+        model (Model): The model associated with this serializer.
+        fields (list): The fields to be serialized.
+    '''
+    user_id = serializers.ReadOnlyField(source='owner_id')
+    username = serializers.ReadOnlyField(source='owner.username')
+    profile_id = serializers.ReadOnlyField(source='owner.profile.id')
+    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+
+    class Meta:
+        model = Follower
+        fields = [
+            'id', 'user_id', 'username', 'profile_id', 'profile_image',
+            'created_at',
+        ]
+
+
+class FollowedUserSerializer(FollowerUserSerializer):
+    '''
+    Serializer for an entry of the list of users a user follows, showing
+    the followed user.
+    '''
+    user_id = serializers.ReadOnlyField(source='followed_id')
+    username = serializers.ReadOnlyField(source='followed.username')
+    profile_id = serializers.ReadOnlyField(source='followed.profile.id')
+    profile_image = serializers.ReadOnlyField(
+        source='followed.profile.image.url')
@@ -1,3 +1,341 @@
-from django.test import TestCase
+import threading
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from profiles.models import Profile
+from techstables_backend.pagination import KeysetPagination
+from .graph import FollowGraph, FollowGraphIndex
+from .models import (
+    Follower, follow_graph, following_users, suggest_follows_sql,
+    update_follow_graph,
+)
+
+
+class FollowGraphTests(TestCase):
+    def setUp(self):
+        self.graph = FollowGraph.from_edges(
+            [(1, 2), (1, 3), (2, 4), (2, 5), (3, 1), (3, 4)], 3)
+
+    def test_csr_slices_hold_each_users_follows(self):
+        self.assertEqual(list(self.graph.following(1)), [2, 3])
+        self.assertEqual(list(self.graph.following(3)), [1, 4])
+        self.assertEqual(list(self.graph.following(4)), [])
+        self.assertEqual(list(self.graph.following(99)), [])
+
+    def test_suggestions_rank_by_mutual_count(self):
+        self.assertEqual(self.graph.suggest(1, 10), [(4, 2), (5, 1)])
+
+    def test_overlays_apply_follows_and_unfollows(self):
+        self.graph.add(1, 6)
+        self.graph.remove(1, 3)
+        self.graph.add(5, 4)
+        self.assertEqual(sorted(self.graph.following(1)), [2, 6])
+        self.assertEqual(self.graph.suggest(1, 10), [(4, 1), (5, 1)])
+
+        self.graph.add(1, 3)
+        self.graph.remove(1, 6)
+        self.assertEqual(sorted(self.graph.following(1)), [2, 3])
+        self.assertEqual(self.graph.overlay_size, 1)
+
+    def test_offsets_grow_for_owners_past_the_expected_max(self):
+        graph = FollowGraph.from_edges([(1, 2), (3, 1), (9, 1)], 3)
+        self.assertEqual(len(graph.offsets), 11)
+        self.assertEqual(list(graph.following(9)), [1])
+        self.assertEqual(list(graph.following(3)), [1])
+
+    def test_changes_replace_the_overlay_sets(self):
+        self.graph.add(1, 6)
+        added = self.graph.added[1]
+        self.graph.add(1, 7)
+        self.graph.remove(1, 6)
+        self.assertEqual(added, {6})
+        self.assertEqual(self.graph.added[1], {7})
+
+    def test_compaction_merges_overlays(self):
+        self.graph.add(1, 6)
+        self.graph.add(7, 1)
+        compacted = self.graph.copy().compacted()
+        self.assertEqual(compacted.added, {})
+        self.assertEqual(list(compacted.following(1)), [2, 3, 6])
+        self.assertEqual(list(compacted.following(7)), [1])
+        self.assertEqual(sorted(self.graph.following(1)), [2, 3, 6])
+
+
+class FollowGraphIndexTests(TestCase):
+    '''
+    Runs the index's tasks on the background executor, with loaders
+    that wait for the test to let them finish.
+    '''
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.built = threading.Event()
+        self.edges = [(1, 2), (2, 3)]
+        self.index = FollowGraphIndex(self.load, lambda user_id, limit: [])
+
+    def load(self):
+        self.release.wait(5)
+        graph = FollowGraph.from_edges(sorted(self.edges), 3)
+        self.built.set()
+        return graph
+
+    def wait_for_swap(self):
+        self.release.set()
+        self.assertTrue(self.built.wait(5))
+        for _ in range(500):
+            if self.index.replay is None:
+                return
+            time.sleep(0.01)
+        self.fail("The graph was not swapped in.")
+
+    def test_first_build_runs_in_the_background(self):
+        self.assertEqual(self.index.suggest(1, 10), [])
+        self.assertIsNone(self.index.graph)
+        self.index.apply("add", 2, 4)
+        self.wait_for_swap()
+        self.assertEqual(self.index.suggest(1, 10), [(3, 1), (4, 1)])
+
+    def commit(self, operation, owner_id, followed_id):
+        if operation == "add":
+            self.edges.append((owner_id, followed_id))
+        else:
+            self.edges.remove((owner_id, followed_id))
+        self.index.apply(operation, owner_id, followed_id)
+
+    def test_old_graph_serves_reads_until_the_swap(self):
+        self.release.set()
+        self.index.swap(self.load, "load")
+        old = self.index.graph
+        self.commit("add", 1, 3)
+        self.release.clear()
+        self.built.clear()
+
+        with override_settings(FOLLOW_GRAPH={
+            'MAX_AGE': 0, 'RELOAD_AGE': 0, 'COMPACT_THRESHOLD': 10000,
+        }):
+            self.assertIs(self.index.get(), old)
+            self.index.apply("remove", 1, 2)
+            self.assertIs(self.index.get(), old)
+        self.assertEqual(sorted(old.following(1)), [3])
+
+        self.wait_for_swap()
+        self.assertIsNot(self.index.graph, old)
+        self.assertEqual(sorted(self.index.graph.following(1)), [3])
+
+    @override_settings(FOLLOW_GRAPH={
+        'MAX_AGE': 0, 'RELOAD_AGE': 3600, 'COMPACT_THRESHOLD': 10000,
+    })
+    def test_follows_of_other_processes_are_added_by_updates(self):
+        def update(graph):
+            graph.add(3, 1)
+            return graph
+        self.index.updater = update
+        self.release.set()
+        self.index.swap(self.load, "load")
+        old = self.index.graph
+        self.built.clear()
+
+        self.assertIs(self.index.get(), old)
+        for _ in range(500):
+            if self.index.graph is not old:
+                break
+            time.sleep(0.01)
+        # The loader was not called again.
+        self.assertFalse(self.built.is_set())
+        self.assertEqual(list(self.index.graph.following(3)), [1])
+        self.assertEqual(list(old.following(3)), [])
+
+    @override_settings(FOLLOW_GRAPH={
+        'MAX_AGE': 300, 'RELOAD_AGE': 3600, 'COMPACT_THRESHOLD': 1,
+    })
+    def test_overlays_are_compacted_in_the_background(self):
+        self.release.set()
+        self.index.swap(self.load, "load")
+        old = self.index.graph
+        self.index.apply("add", 1, 3)
+        self.index.apply("add", 3, 1)
+        self.assertIs(self.index.get(), old)
+        for _ in range(500):
+            if self.index.graph is not old:
+                break
+            time.sleep(0.01)
+        graph = self.index.graph
+        self.assertIsNot(graph, old)
+        self.assertEqual(graph.overlay_size, 0)
+        self.assertEqual(list(graph.following(1)), [2, 3])
+
+
+@override_settings(BACKGROUND_TASKS={"WORKERS": 1, "EAGER": True})
+class FollowSuggestionTests(APITestCase):
+    def setUp(self):
+        follow_graph.reset()
+        self.addCleanup(follow_graph.reset)
+        self.users = {
+            name: User.objects.create_user(username=name, password="pass1234")
+            for name in ["ann", "bob", "cat", "dan", "eve"]
+        }
+        for owner, followed in [
+            ("ann", "bob"), ("ann", "cat"), ("bob", "dan"),
+            ("cat", "dan"), ("cat", "eve"), ("bob", "ann"),
+        ]:
+            self.follow(owner, followed)
+        self.client.login(username="ann", password="pass1234")
+
+    def follow(self, owner, followed):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Follower.objects.create(
+                owner=self.users[owner], followed=self.users[followed])
+
+    def suggestions(self):
+        resp = self.client.get("/followers/suggestions/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [(item["owner"], item["mutual_count"]) for item in resp.data]
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        resp = self.client.get("/followers/suggestions/")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_ranks_friends_of_friends(self):
+        self.assertEqual(self.suggestions(), [("dan", 2), ("eve", 1)])
+
+    def test_matches_the_sql_self_join(self):
+        for user in self.users.values():
+            self.assertEqual(
+                follow_graph.suggest(user.id, 10),
+                suggest_follows_sql(user.id, 10))
+
+    def test_signals_update_the_built_graph(self):
+        self.suggestions()
+        built = follow_graph.graph
+        self.follow("ann", "dan")
+        with self.captureOnCommitCallbacks(execute=True):
+            Follower.objects.get(
+                owner=self.users["cat"], followed=self.users["eve"]).delete()
+
+        self.assertEqual(self.suggestions(), [])
+        self.assertIs(follow_graph.graph, built)
+
+    def test_updates_read_the_follows_made_since(self):
+        self.suggestions()
+        graph = follow_graph.graph
+        # Committed by other processes, which do not apply them here.
+        Follower.objects.create(
+            owner=self.users["ann"], followed=self.users["dan"])
+        Follower.objects.create(
+            owner=self.users["eve"], followed=self.users["bob"])
+        with override_settings(FOLLOW_GRAPH={
+            **settings.FOLLOW_GRAPH, "UPDATE_OVERLAP": 0,
+        }):
+            updated = update_follow_graph(graph.copy())
+        self.assertEqual(
+            sorted(updated.following(self.users["ann"].id)),
+            sorted([self.users[name].id for name in ("bob", "cat", "dan")]))
+        self.assertEqual(
+            list(updated.following(self.users["eve"].id)),
+            [self.users["bob"].id])
+        self.assertEqual(
+            updated.last_follow_id, Follower.objects.latest("id").id)
+        self.assertEqual(graph.overlay_size, 0)
+
+    def test_benchmark_command_reports_matching_rankings(self):
+        out = StringIO()
+        call_command(
+            "benchmark_follow_suggestions", "--samples", "20", stdout=out)
+        self.assertIn("All 20 rankings match", out.getvalue())
+
+
+class ProfileFollowToggleTests(APITestCase):
+    def setUp(self):
+        follow_graph.reset()
+        self.addCleanup(follow_graph.reset)
+        self.ann = User.objects.create_user(username="ann", password="pass1234")
+        self.bob = User.objects.create_user(username="bob", password="pass1234")
+        self.url = f"/profiles/{self.bob.profile.id}/follow/"
+        self.client.login(username="ann", password="pass1234")
+
+    def test_follow_and_unfollow_are_idempotent(self):
+        first = self.client.put(self.url)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        follow = Follower.objects.get(owner=self.ann, followed=self.bob)
+        self.assertEqual(
+            first.data, {"following_id": follow.id, "followers_count": 1})
+        second = self.client.put(self.url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["following_id"], follow.id)
+
+        for _ in range(2):
+            resp = self.client.delete(self.url)
+            self.assertEqual(
+                resp.data, {"following_id": None, "followers_count": 0})
+        self.assertEqual(
+            Profile.objects.get(owner=self.ann).following_count, 0)
+
+    def test_duplicate_post_to_followers_is_a_validation_error(self):
+        self.client.post("/followers/", {"followed": self.bob.id})
+        resp = self.client.post("/followers/", {"followed": self.bob.id})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Follower.objects.count(), 1)
+
+    def test_profiles_read_follows_from_membership_set(self):
+        following_users.reset()
+        self.addCleanup(following_users.reset)
+        self.client.get(f"/profiles/{self.bob.profile.id}")
+        with self.captureOnCommitCallbacks(execute=True):
+            follow = self.client.put(self.url)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(f"/profiles/{self.bob.profile.id}")
+        self.assertEqual(resp.data["following_id"], follow.data["following_id"])
+        self.assertFalse(
+            [q for q in ctx.captured_queries
+             if "followers_follower" in q["sql"]])
+
+
+class ProfileFollowListTests(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass1234")
+            for i in range(5)
+        ]
+        self.ann = self.users[0]
+        for user in self.users[1:]:
+            Follower.objects.create(owner=user, followed=self.ann)
+        Follower.objects.create(owner=self.ann, followed=self.users[1])
+
+    def test_followers_are_listed_newest_first_with_keyset_pages(self):
+        url = f"/profiles/{self.ann.profile.id}/followers/"
+        with mock.patch.object(KeysetPagination, "page_size", 3):
+            with self.assertNumQueries(2):
+                resp = self.client.get(url)
+        usernames = [row["username"] for row in resp.data["results"]]
+        self.assertEqual(usernames, ["user4", "user3", "user2"])
+        self.assertEqual(resp.data["results"][0]["profile_id"],
+                         self.users[4].profile.id)
+        self.assertIn("profile_image", resp.data["results"][0])
+
+        with mock.patch.object(KeysetPagination, "page_size", 3):
+            resp = self.client.get(resp.data["next"])
+        self.assertEqual(
+            [row["username"] for row in resp.data["results"]], ["user1"])
+        self.assertIsNone(resp.data["next"])
+
+    def test_following_lists_followed_users(self):
+        resp = self.client.get(f"/profiles/{self.ann.profile.id}/following/")
+        self.assertEqual(
+            [row["user_id"] for row in resp.data["results"]],
+            [self.users[1].id])
+
+    def test_missing_profile_is_not_found(self):
+        resp = self.client.get("/profiles/999/followers/")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
@@ -4,4 +4,8 @@ from followers import views
 urlpatterns = [
     path('followers/', views.FollowerList.as_view()),
     path('followers/<int:pk>', views.FollowerDetail.as_view()),
+    path('followers/suggestions/', views.FollowSuggestionList.as_view()),
+    path('profiles/<int:pk>/follow/', views.ProfileFollowToggle.as_view()),
+    path('profiles/<int:pk>/followers/', views.ProfileFollowerList.as_view()),
+    path('profiles/<int:pk>/following/', views.ProfileFollowingList.as_view()),
 ]
@@ -1,7 +1,18 @@
-from rest_framework import generics, permissions
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from techstables_backend.cache import AnonymousResponseCacheMixin
+from techstables_backend.pagination import KeysetPagination
 from techstables_backend.permissions import IsOwnerOrReadOnly
-from .models import Follower
-from .serializers import FollowerSerializer
+from techstables_backend.upsert import delete_returning, insert_ignore
+from profiles.models import Profile
+from profiles.serializers import ProfileSerializer
+from .models import Follower, follow_graph
+from .serializers import (
+    FollowedUserSerializer, FollowerSerializer, FollowerUserSerializer,
+)
 
 
 class FollowerList(generics.ListCreateAPIView):
@@ -25,7 +36,7 @@ class FollowerList(generics.ListCreateAPIView):
     '''
     serializer_class = FollowerSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Follower.objects.all()
+    queryset = Follower.objects.select_related('owner', 'followed')
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -42,4 +53,151 @@ class FollowerDetail(generics.RetrieveDestroyAPIView):
     '''
     serializer_class = FollowerSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Follower.objects.all()
+    queryset = Follower.objects.select_related('owner', 'followed')
+
+
+class ProfileFollowerList(AnonymousResponseCacheMixin,
+                          generics.ListAPIView):
+    '''
+    API view listing the users who follow a profile's owner, most
+    recent first.
+
+    Follows are read through the (followed, created_at, id) index with
+    keyset pagination and joined to the following users and their
+    profiles, so every page costs the same constant number of queries.
+    Clients follow the 'next' links to load older follows.
+
+    Attributes:
+        serializer_class (FollowerUserSerializer): The serializer class
+            used for the follows.
+        pagination_class (KeysetPagination): Keyset pagination on
+            (created_at, id).
+        cache_namespaces (tuple): Cache namespaces the response depends on.
+        user_field (str): The side of the follow matching the profile.
+        related_user (str): The side of the follow that is listed.
+    '''
+    serializer_class = FollowerUserSerializer
+    pagination_class = KeysetPagination
+    cache_namespaces = ('profile:{pk}', 'authors')
+    user_field = 'followed'
+    related_user = 'owner'
+
+    def get_queryset(self):
+        return Follower.objects.filter(**{
+            f'{self.user_field}_id': self.user_id,
+        }).select_related(f'{self.related_user}__profile')
+
+    def list(self, request, *args, **kwargs):
+        self.user_id = Profile.objects.filter(
+            pk=self.kwargs['pk']).values_list('owner_id', flat=True).first()
+        if self.user_id is None:
+            raise Http404
+        return super().list(request, *args, **kwargs)
+
+
+class ProfileFollowingList(ProfileFollowerList):
+    '''
+    API view listing the users a profile's owner follows, most recent
+    first, read through the (owner, created_at, id) index.
+    '''
+    serializer_class = FollowedUserSerializer
+    user_field = 'owner'
+    related_user = 'followed'
+
+
+class ProfileFollowToggle(generics.GenericAPIView):
+    '''
+    API view following (PUT) or unfollowing (DELETE) the owner of a
+    profile as the requesting user.
+
+    Both methods are idempotent. A follow is inserted with INSERT ... ON
+    CONFLICT DO NOTHING and removed with a single DELETE ... RETURNING.
+    The response carries the resulting following_id, which is null after
+    an unfollow, and the profile's followers_count, both read in the
+    same transaction.
+
+    Attributes:
+        permission_classes (list): Only authenticated users can follow.
+    '''
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_profile(self):
+        profile = Profile.objects.filter(pk=self.kwargs['pk']).values(
+            'owner_id', 'followers_count').first()
+        if profile is None:
+            raise Http404
+        return profile
+
+    def put(self, request, pk):
+        with transaction.atomic():
+            followed_id = self.get_profile()['owner_id']
+            follow = insert_ignore(
+                Follower, ['owner', 'followed'],
+                owner=request.user, followed_id=followed_id)
+            if follow is None:
+                following_id = Follower.objects.filter(
+                    owner=request.user, followed_id=followed_id
+                ).values_list('id', flat=True).first()
+            else:
+                following_id = follow.id
+            followers_count = self.get_profile()['followers_count']
+        return Response(
+            {'following_id': following_id, 'followers_count': followers_count},
+            status=status.HTTP_201_CREATED if follow else status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        with transaction.atomic():
+            followed_id = self.get_profile()['owner_id']
+            delete_returning(
+                Follower, owner_id=request.user.id, followed_id=followed_id)
+            followers_count = self.get_profile()['followers_count']
+        return Response(
+            {'following_id': None, 'followers_count': followers_count})
+
+
+class FollowSuggestionList(generics.GenericAPIView):
+    '''
+    API view suggesting users to follow: the users followed by the most
+    of the people the requesting user follows.
+
+    The ranking comes from the in-memory follow graph, so it costs no
+    query once the graph is built; only the suggested profiles are then
+    loaded. Each suggestion is a serialized profile with an added
+    mutual_count.
+
+    Attributes:
+        serializer_class (ProfileSerializer): The serializer used for the
+            suggested profiles.
+        permission_classes (list): Only authenticated users get suggestions.
+        default_limit (int): The number of suggestions returned unless
+            ?limit= asks for up to FOLLOW_SUGGESTIONS_LIMIT.
+    '''
+    serializer_class = ProfileSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 10
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, settings.FOLLOW_SUGGESTIONS_LIMIT))
+
+    def get(self, request, *args, **kwargs):
+        suggestions = follow_graph.suggest(request.user.id, self.get_limit())
+        profiles = {
+            profile.owner_id: profile
+            for profile in Profile.objects.select_related('owner').filter(
+                owner_id__in=[user_id for user_id, _ in suggestions])
+        }
+        ranked = [
+            (profiles[user_id], mutual_count)
+            for user_id, mutual_count in suggestions
+            if user_id in profiles
+        ]
+        serializer = self.get_serializer(
+            [profile for profile, _ in ranked], many=True)
+        data = serializer.data
+        for item, (_, mutual_count) in zip(data, ranked):
+            item['mutual_count'] = mutual_count
+        return Response(data)
@@ -0,0 +1,117 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Now
+from posts.models import Post
+from techstables_backend.cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+
+def is_write_behind():
+    '''
+    Returns True if likes_count updates are buffered in memory instead of
+    being written with every like.
+    '''
+    return settings.LIKE_COUNTER['MODE'] == 'write-behind'
+
+
+def apply_likes_count_deltas(deltas, batch_size=500):
+    '''
+    Adds the given {post_id: delta} to the stored likes_count of the
+    posts, with one UPDATE ... CASE statement per batch of posts.
+    '''
+    post_ids = [post_id for post_id, delta in deltas.items() if delta]
+    for start in range(0, len(post_ids), batch_size):
+        batch = post_ids[start:start + batch_size]
+        Post.objects.filter(pk__in=batch).update(
+            counters_updated_at=Now(),
+            likes_count=F('likes_count') + Case(
+                *[When(pk=post_id, then=Value(deltas[post_id]))
+                  for post_id in batch],
+                default=Value(0),
+            ))
+
+
+class LikeCounterBuffer:
+    '''
+    In-memory write-behind buffer of likes_count changes.
+
+    In write-behind mode, committed likes and unlikes add +1 or -1 to a
+    per-post delta instead of updating the post row, so a viral post is
+    no longer a single hot row that every like contends on. A background
+    thread applies all the pending deltas in bulk every
+    LIKE_COUNTER['FLUSH_INTERVAL'] seconds, and reads add this process's
+    pending delta to the stored count.
+
+    Deltas still pending in another worker process are not visible to
+    this one until they are flushed. Deltas of a worker that dies before
+    flushing are lost; the reconcile_like_counters command repairs the
+    drift against the Like table.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deltas = Counter()
+        self.flusher = None
+        atexit.register(self.flush)
+
+    def add(self, post_id, delta):
+        with self.lock:
+            self.deltas[post_id] += delta
+            if self.flusher is None and (
+                settings.LIKE_COUNTER['FLUSH_INTERVAL'] > 0
+            ):
+                self.flusher = threading.Thread(
+                    target=self.run, name='like-counter-flusher',
+                    daemon=True)
+                self.flusher.start()
+
+    def pending(self, post_id):
+        '''
+        Returns the delta of post_id that has not been flushed yet.
+        '''
+        return self.deltas.get(post_id, 0)
+
+    def flush(self):
+        '''
+        Applies and clears the pending deltas, then invalidates the
+        cached responses of the updated posts and the lists ordered by
+        likes, which other processes built without these deltas. If the
+        update fails, the deltas are put back so the next flush retries
+        them.
+
+        Returns:
+            int: The number of posts updated.
+        '''
+        with self.lock:
+            deltas, self.deltas = self.deltas, Counter()
+        if not deltas:
+            return 0
+        try:
+            apply_likes_count_deltas(deltas)
+        except Exception:
+            with self.lock:
+                self.deltas.update(deltas)
+            raise
+        invalidate('likes', *(f'post:{post_id}' for post_id in deltas))
+        return len(deltas)
+
+    def run(self):
+        while True:
+            time.sleep(settings.LIKE_COUNTER['FLUSH_INTERVAL'])
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing like counters failed')
+            finally:
+                connections.close_all()
+
+
+like_counter_buffer = LikeCounterBuffer()
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from posts.models import Post, count_for_post
+from likes.counters import apply_likes_count_deltas, is_write_behind
+from likes.models import Like
+
+
+def measure_drift(post_ids=None):
+    '''
+    Returns {post_id: drift} for the posts whose stored likes_count
+    differs from their number of Like rows, where drift is the amount
+    to add to the stored count.
+    '''
+    posts = Post.objects.annotate(actual=count_for_post(Like)).exclude(
+        likes_count=F('actual'))
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return {
+        post_id: actual - stored
+        for post_id, actual, stored in posts.values_list(
+            'pk', 'actual', 'likes_count')
+    }
+
+
+class Command(BaseCommand):
+    '''
+    Repairs Post.likes_count against the Like table without clobbering
+    the changes still pending in write-behind buffers.
+
+    The drift of every post is measured twice, --wait seconds apart,
+    which defaults to two flush intervals in write-behind mode. Drift
+    still pending in a live buffer is flushed within that time and
+    changes between the measurements. Only drift that stayed the same,
+    such as the deltas lost when a worker died, is repaired. It is added
+    to the stored count instead of overwriting it, so flushes running
+    concurrently are preserved. Posts that kept changing are reported
+    and left for the next run.
+    '''
+    help = 'Repairs drifted Post.likes_count values from the Like table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--wait', type=float, default=None,
+            help='Seconds between the two drift measurements.')
+
+    def handle(self, *args, **options):
+        wait = options['wait']
+        if wait is None:
+            wait = (
+                2 * settings.LIKE_COUNTER['FLUSH_INTERVAL']
+                if is_write_behind() else 0
+            )
+        drift = measure_drift()
+        if wait and drift:
+            time.sleep(wait)
+            again = measure_drift(list(drift))
+            stable = {
+                post_id: delta for post_id, delta in drift.items()
+                if again.get(post_id) == delta
+            }
+        else:
+            stable = drift
+        with transaction.atomic():
+            apply_likes_count_deltas(stable)
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired likes_count of {len(stable)} posts; '
+            f'{len(drift) - len(stable)} were still changing.'))
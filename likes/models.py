@@ -1,6 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
-from posts.models import Post
+from techstables_backend.cache import invalidate
+from techstables_backend.membership import MembershipCache
+from posts.models import Post, update_post_counter
+from profiles.models import profile_namespaces
+from .counters import is_write_behind, like_counter_buffer
 
 
 class Like(models.Model):
@@ -15,8 +20,12 @@ class Like(models.Model):
     Meta:
         ordering: Orders the likes by creation date in descending order.
         unique_together: Ensures that a user can like a specific post only once.
+        indexes: Back the scans of recent likes when refreshing trending
+        scores, a post's likers list and a user's liked posts feed.
 
     Methods:
+        save: Saves the like and updates the post's likes_count in the
+        same transaction.
         __str__: Returns a string representation of the like,
         showing the owner and the post.
     '''
@@ -28,6 +37,88 @@ class Like(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(fields=['created_at'], name='likes_created_idx'),
+            models.Index(
+                fields=['post', '-created_at', '-id'],
+                name='likes_post_created_idx'),
+            models.Index(
+                fields=['owner', '-created_at', '-id'],
+                name='likes_owner_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.owner} {self.post}'
+
+
+def adjust_likes_count(post_id, delta):
+    """
+    Applies a change of a post's likes_count: right away, or through the
+    write-behind buffer once the transaction commits if
+    LIKE_COUNTER['MODE'] is 'write-behind'.
+    """
+    if is_write_behind():
+        transaction.on_commit(
+            lambda: like_counter_buffer.add(post_id, delta))
+    else:
+        update_post_counter(post_id, 'likes_count', delta)
+
+
+def increment_likes_count(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that increments the post's likes_count
+    when a new Like is created.
+    """
+    if created and not raw:
+        adjust_likes_count(instance.post_id, 1)
+
+
+def decrement_likes_count(sender, instance, **kwargs):
+    """
+    Signal receiver that decrements the post's likes_count
+    when a Like is deleted.
+    """
+    adjust_likes_count(instance.post_id, -1)
+
+
+liked_posts = MembershipCache(Like, 'post')
+
+
+def add_to_liked_posts(sender, instance, created, **kwargs):
+    """
+    Signal receiver that records a new like in the owner's membership
+    set.
+    """
+    if created:
+        liked_posts.change(instance.owner_id, instance.post_id, instance.id)
+
+
+def remove_from_liked_posts(sender, instance, **kwargs):
+    """
+    Signal receiver that removes a deleted like from the owner's
+    membership set.
+    """
+    liked_posts.change(instance.owner_id, instance.post_id, None)
+
+
+def invalidate_like_responses(sender, instance, **kwargs):
+    """
+    Signal receiver that invalidates the cached responses showing the
+    liked post's likes_count, the lists ordered by likes and the posts
+    feed filtered by the owner's likes.
+    """
+    invalidate(
+        f'post:{instance.post_id}', 'likes',
+        *profile_namespaces('liked:{}', instance.owner_id))
+
+
+post_save.connect(increment_likes_count, sender=Like)
+post_delete.connect(decrement_likes_count, sender=Like)
+post_save.connect(add_to_liked_posts, sender=Like)
+post_delete.connect(remove_from_liked_posts, sender=Like)
+post_save.connect(invalidate_like_responses, sender=Like)
+post_delete.connect(invalidate_like_responses, sender=Like)
@@ -1,9 +1,10 @@
-from django.db import IntegrityError
 from rest_framework import serializers
+from techstables_backend.metrics import TimedSerializerMixin
+from techstables_backend.upsert import insert_ignore
 from .models import Like
 
 
-class LikeSerializer(serializers.ModelSerializer):
+class LikeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     '''
     Serializer for the Like model, providing serialization and validation
     for Like instances, including a read-only view of the owner's username.
@@ -16,8 +17,8 @@ class LikeSerializer(serializers.ModelSerializer):
         fields (list): The fields to include in the serialized output.
 
     Methods:
-        create: Attempts to create a new Like instance, raising a validation
-        error if a duplicate is detected.
+        create: Inserts the Like with INSERT ... ON CONFLICT DO NOTHING,
+        raising a validation error if it already exists.
     '''
     owner = serializers.ReadOnlyField(source='owner.username')
 
@@ -28,9 +29,37 @@ class LikeSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        try:
-            return super().create(validated_data)
-        except IntegrityError:
+        instance = insert_ignore(Like, ['owner', 'post'], **validated_data)
+        if instance is None:
             raise serializers.ValidationError({
                 'details': 'possible duplicate'
             })
+        return instance
+
+
+class LikerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    '''
+    Serializer for an entry of a post's likers list, showing the user who
+    liked the post.
+
+    Attributes:
+        user_id (ReadOnlyField): The ID of the user who liked the post.
+        username (ReadOnlyField): Their username.
+        profile_id (ReadOnlyField): The ID of their profile.
+        profile_image (ReadOnlyField): The URL of their profile image.
+
+    Meta:
+        model (Model): The model class that is being serialized.
+        fields (list): The fields to include in the serialized output.
+    '''
+    user_id = serializers.ReadOnlyField(source='owner_id')
+    username = serializers.ReadOnlyField(source='owner.username')
+    profile_id = serializers.ReadOnlyField(source='owner.profile.id')
+    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+
+    class Meta:
+        model = Like
+        fields = [
+            'id', 'user_id', 'username', 'profile_id', 'profile_image',
+            'created_at',
+        ]
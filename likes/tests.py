@@ -1,3 +1,314 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APITransactionTestCase
+
+from posts.models import Post
+from techstables_backend.membership import MembershipSet
+from techstables_backend.pagination import KeysetPagination
+from .counters import like_counter_buffer
+from .models import Like, liked_posts
+
+
+class PostLikeToggleTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ann", password="pass1234")
+        self.post = Post.objects.create(owner=self.user, title="T", content="c")
+        self.url = f"/posts/{self.post.id}/like/"
+        self.client.login(username="ann", password="pass1234")
+
+    def test_put_is_idempotent(self):
+        first = self.client.put(self.url)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        like = Like.objects.get(owner=self.user, post=self.post)
+        self.assertEqual(first.data, {"like_id": like.id, "likes_count": 1})
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.put(self.url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, {"like_id": like.id, "likes_count": 1})
+        self.assertFalse(
+            [q for q in ctx.captured_queries if "ROLLBACK" in q["sql"]])
+
+    def test_delete_is_idempotent(self):
+        self.client.put(self.url)
+        for _ in range(2):
+            resp = self.client.delete(self.url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(resp.data, {"like_id": None, "likes_count": 0})
+        self.assertFalse(Like.objects.exists())
+
+    def test_missing_post_is_not_found(self):
+        resp = self.client.put("/posts/999/like/")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        resp = self.client.put(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_duplicate_post_to_likes_is_a_validation_error(self):
+        self.client.post("/likes/", {"post": self.post.id})
+        resp = self.client.post("/likes/", {"post": self.post.id})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+
+@override_settings(LIKE_COUNTER={"MODE": "write-behind", "FLUSH_INTERVAL": 0})
+class WriteBehindLikeCounterTests(APITestCase):
+    def setUp(self):
+        like_counter_buffer.deltas.clear()
+        self.addCleanup(like_counter_buffer.deltas.clear)
+        self.user = User.objects.create_user(username="ann", password="pass1234")
+        self.other = User.objects.create_user(username="bob", password="pass1234")
+        self.post = Post.objects.create(owner=self.user, title="T", content="c")
+        self.client.login(username="ann", password="pass1234")
+
+    def like(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Like.objects.create(owner=user, post=self.post)
+
+    def test_likes_are_buffered_instead_of_written(self):
+        self.like(self.user)
+        like = self.like(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            like.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(like_counter_buffer.pending(self.post.id), 1)
+
+    def test_reads_include_pending_count(self):
+        self.like(self.other)
+        resp = self.client.get(f"/posts/{self.post.id}")
+        self.assertEqual(resp.data["likes_count"], 1)
+
+    def test_flush_applies_deltas_in_bulk(self):
+        second = Post.objects.create(owner=self.user, title="U", content="c")
+        self.like(self.user)
+        self.like(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(owner=self.user, post=second)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(like_counter_buffer.flush(), 2)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.post.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((self.post.likes_count, second.likes_count), (2, 1))
+        self.assertEqual(like_counter_buffer.pending(self.post.id), 0)
+
+    def test_flush_invalidates_cached_responses(self):
+        self.client.logout()
+        path = f"/posts/{self.post.id}"
+        self.client.get(path)
+        self.assertEqual(self.client.get(path)["X-Cache"], "HIT")
+        self.like(self.other)
+        self.client.get(path)
+        like_counter_buffer.flush()
+        resp = self.client.get(path)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["likes_count"], 1)
+
+    def test_etags_change_with_pending_likes(self):
+        detail = self.client.get(f"/posts/{self.post.id}")["ETag"]
+        page = self.client.get("/posts/")["ETag"]
+        self.like(self.other)
+        self.assertEqual(
+            self.client.get(
+                f"/posts/{self.post.id}", HTTP_IF_NONE_MATCH=detail
+            ).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.client.get("/posts/", HTTP_IF_NONE_MATCH=page).status_code,
+            status.HTTP_200_OK)
+
+    def test_reconcile_repairs_lost_deltas(self):
+        self.like(self.user)
+        self.like(self.other)
+        like_counter_buffer.deltas.clear()
+        call_command("reconcile_like_counters", wait=0, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+
+
+@override_settings(LIKE_COUNTER={"MODE": "write-behind", "FLUSH_INTERVAL": 0})
+class WriteBehindLikeToggleTests(APITransactionTestCase):
+    def setUp(self):
+        like_counter_buffer.deltas.clear()
+        self.addCleanup(like_counter_buffer.deltas.clear)
+        self.user = User.objects.create_user(username="ann", password="pass1234")
+        self.post = Post.objects.create(owner=self.user, title="T", content="c")
+        self.url = f"/posts/{self.post.id}/like/"
+        self.client.login(username="ann", password="pass1234")
+
+    def test_toggle_counts_its_own_buffered_change(self):
+        resp = self.client.put(self.url)
+        self.assertEqual(resp.data["likes_count"], 1)
+        resp = self.client.delete(self.url)
+        self.assertEqual(resp.data["likes_count"], 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+
+class MembershipSetTests(APITestCase):
+    def setUp(self):
+        liked_posts.reset()
+        self.addCleanup(liked_posts.reset)
+        self.user = User.objects.create_user(username="ann", password="pass1234")
+        self.other = User.objects.create_user(username="bob", password="pass1234")
+        self.posts = [
+            Post.objects.create(owner=self.other, title=f"T{i}", content="c")
+            for i in range(3)
+        ]
+        self.like = Like.objects.create(owner=self.user, post=self.posts[1])
+        self.client.login(username="ann", password="pass1234")
+
+    def like_queries(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(path)
+        return resp, [q for q in ctx.captured_queries if "likes_like" in q["sql"]]
+
+    def test_set_is_sorted_and_mutable(self):
+        members = MembershipSet.from_rows([(2, 20), (5, 50)])
+        members.add(3, 30)
+        members.add(5, 51)
+        members.discard(2)
+        self.assertEqual(list(members.keys), [3, 5])
+        self.assertEqual((members.get(3), members.get(5), members.get(4)),
+                         (30, 51, None))
+        self.assertEqual(members.nbytes, 32)
+
+    def test_set_is_loaded_once(self):
+        resp, queries = self.like_queries("/posts/")
+        self.assertEqual(len(queries), 1)
+        like_ids = {post["id"]: post["like_id"] for post in resp.data["results"]}
+        self.assertEqual(like_ids[self.posts[1].id], self.like.id)
+        self.assertIsNone(like_ids[self.posts[0].id])
+
+        _, queries = self.like_queries("/posts/")
+        self.assertEqual(queries, [])
+
+    def test_own_writes_update_the_set_in_place(self):
+        self.client.get("/posts/")
+        members = liked_posts.entries[self.user.id].members
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.put(f"/posts/{self.posts[0].id}/like/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/posts/{self.posts[1].id}/like/")
+
+        resp, queries = self.like_queries(f"/posts/{self.posts[0].id}")
+        self.assertEqual(queries, [])
+        self.assertEqual(resp.data["like_id"], Like.objects.get().id)
+        self.assertIs(liked_posts.entries[self.user.id].members, members)
+        self.assertEqual(list(members.keys), [self.posts[0].id])
+
+    def test_writes_by_other_processes_reload_the_set(self):
+        self.client.get("/posts/")
+        liked_posts.replace_version(self.user.id)
+        _, queries = self.like_queries("/posts/")
+        self.assertEqual(len(queries), 1)
+
+    @override_settings(MEMBERSHIP_SETS={
+        "MAX_USERS": 1, "MAX_IDLE": 900, "MAX_ENTRIES": 20000,
+        "MAX_TOTAL_ENTRIES": 1000})
+    def test_least_recently_used_users_are_evicted(self):
+        liked_posts.get(self.user.id)
+        liked_posts.get(self.other.id)
+        self.assertEqual(list(liked_posts.entries), [self.other.id])
+
+    @override_settings(MEMBERSHIP_SETS={
+        "MAX_USERS": 10, "MAX_IDLE": 900, "MAX_ENTRIES": 20000,
+        "MAX_TOTAL_ENTRIES": 2})
+    def test_users_are_evicted_beyond_the_total_entries(self):
+        Like.objects.create(owner=self.other, post=self.posts[0])
+        Like.objects.create(owner=self.other, post=self.posts[2])
+        liked_posts.get(self.user.id)
+        self.assertEqual(liked_posts.total_entries, 1)
+        liked_posts.get(self.other.id)
+        self.assertEqual(list(liked_posts.entries), [self.other.id])
+        self.assertEqual(liked_posts.total_entries, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Like.objects.create(owner=self.other, post=self.posts[1])
+        self.assertIsNone(liked_posts.get(self.other.id))
+        self.assertEqual(liked_posts.total_entries, 0)
+
+    @override_settings(MEMBERSHIP_SETS={
+        "MAX_USERS": 10, "MAX_IDLE": 900, "MAX_ENTRIES": 0,
+        "MAX_TOTAL_ENTRIES": 1000})
+    def test_large_sets_fall_back_to_queries(self):
+        self.assertIsNone(liked_posts.get(self.user.id))
+        resp, queries = self.like_queries("/posts/")
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(resp.data["results"][1]["like_id"], self.like.id)
+
+    def test_viewer_likes_batch(self):
+        ids = f"{self.posts[0].id},{self.posts[1].id}"
+        resp = self.client.get(f"/me/likes/?post_ids={ids}")
+        self.assertEqual(resp.data, {
+            str(self.posts[0].id): None,
+            str(self.posts[1].id): self.like.id,
+        })
+
+    def test_viewer_likes_batch_validates_ids(self):
+        resp = self.client.get("/me/likes/?post_ids=1,x")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(
+            "/me/likes/?post_ids=" + ",".join(map(str, range(101))))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.logout()
+        resp = self.client.get("/me/likes/?post_ids=1")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class LikeListEndpointTests(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass1234")
+            for i in range(4)
+        ]
+        self.posts = [
+            Post.objects.create(owner=self.users[0], title=f"T{i}", content="c")
+            for i in range(4)
+        ]
+        for user in self.users[1:]:
+            Like.objects.create(owner=user, post=self.posts[0])
+        self.ann = self.users[1]
+        for post in [self.posts[2], self.posts[1], self.posts[3]]:
+            Like.objects.create(owner=self.ann, post=post)
+
+    def test_likers_are_listed_newest_first(self):
+        with self.assertNumQueries(2):
+            resp = self.client.get(f"/posts/{self.posts[0].id}/likes/")
+        self.assertEqual(
+            [row["username"] for row in resp.data["results"]],
+            ["user3", "user2", "user1"])
+        self.assertEqual(
+            resp.data["results"][0]["profile_id"], self.users[3].profile.id)
+
+        resp = self.client.get("/posts/999/likes/")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_liked_posts_follow_like_order_with_keyset_pages(self):
+        self.client.login(username="user1", password="pass1234")
+        with mock.patch.object(KeysetPagination, "page_size", 3):
+            resp = self.client.get("/me/liked-posts/")
+            self.assertEqual(
+                [row["id"] for row in resp.data["results"]],
+                [self.posts[3].id, self.posts[1].id, self.posts[2].id])
+            self.assertTrue(all(row["like_id"] for row in resp.data["results"]))
+
+            resp = self.client.get(resp.data["next"])
+        self.assertEqual(
+            [row["id"] for row in resp.data["results"]], [self.posts[0].id])
+        self.assertIsNone(resp.data["next"])
+
+    def test_liked_posts_require_authentication(self):
+        resp = self.client.get("/me/liked-posts/")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
@@ -3,5 +3,9 @@ from likes import views
 
 urlpatterns = [
     path('likes/', views.LikeList.as_view()),
-    path('likes/<int:pk>', views.LikeDetail.as_view())
+    path('likes/<int:pk>', views.LikeDetail.as_view()),
+    path('posts/<int:pk>/like/', views.PostLikeToggle.as_view()),
+    path('posts/<int:pk>/likes/', views.PostLikerList.as_view()),
+    path('me/likes/', views.ViewerLikeList.as_view()),
+    path('me/liked-posts/', views.LikedPostList.as_view()),
 ]
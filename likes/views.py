@@ -1,7 +1,18 @@
-from rest_framework import generics, permissions
+from django.db import transaction
+from django.http import Http404
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from techstables_backend.cache import AnonymousResponseCacheMixin
+from techstables_backend.loaders import get_viewer_relation_loader
+from techstables_backend.pagination import KeysetPagination
 from techstables_backend.permissions import IsOwnerOrReadOnly
+from techstables_backend.upsert import delete_returning, insert_ignore
+from posts.models import Post
+from posts.serializers import PostSerializer
+from .counters import like_counter_buffer
 from .models import Like
-from .serializers import LikeSerializer
+from .serializers import LikeSerializer, LikerSerializer
 
 
 class LikeList(generics.ListCreateAPIView):
@@ -25,7 +36,7 @@ class LikeList(generics.ListCreateAPIView):
     '''
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     serializer_class = LikeSerializer
-    queryset = Like.objects.all()
+    queryset = Like.objects.select_related('owner')
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -51,4 +62,154 @@ class LikeDetail(generics.RetrieveDestroyAPIView):
     '''
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = LikeSerializer
-    queryset = Like.objects.all()
+    queryset = Like.objects.select_related('owner')
+
+
+class PostLikerList(AnonymousResponseCacheMixin, generics.ListAPIView):
+    '''
+    API view listing the users who liked a post, most recent first.
+
+    Likes are read through the (post, created_at, id) index with keyset
+    pagination and joined to their owners and profiles, so every page
+    costs the same constant number of queries. Clients follow the 'next'
+    links to load older likes.
+
+    Attributes:
+        serializer_class (LikerSerializer): The serializer class used for
+            the likes.
+        pagination_class (KeysetPagination): Keyset pagination on
+            (created_at, id).
+        cache_namespaces (tuple): Cache namespaces the response depends on.
+    '''
+    serializer_class = LikerSerializer
+    pagination_class = KeysetPagination
+    cache_namespaces = ('post:{pk}', 'authors')
+
+    def get_queryset(self):
+        return Like.objects.filter(
+            post_id=self.kwargs['pk']
+        ).select_related('owner__profile')
+
+    def list(self, request, *args, **kwargs):
+        if not Post.objects.filter(pk=self.kwargs['pk']).exists():
+            raise Http404
+        return super().list(request, *args, **kwargs)
+
+
+class LikedPostList(generics.ListAPIView):
+    '''
+    API view listing the posts the requesting user liked, most recently
+    liked first.
+
+    The user's likes are walked through the (owner, created_at, id)
+    index with keyset pagination, then the posts of the page are loaded
+    in a single batch. Unlike filtering the post list on likes, no join
+    can return a post twice, and the order is the order of the likes.
+
+    Attributes:
+        serializer_class (PostSerializer): The serializer class used for
+            the posts.
+        permission_classes (list): Only authenticated users have likes.
+        pagination_class (KeysetPagination): Keyset pagination on the
+            likes' (created_at, id).
+    '''
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Like.objects.filter(owner=self.request.user).only(
+            'id', 'post_id', 'created_at')
+
+    def list(self, request, *args, **kwargs):
+        likes = self.paginate_queryset(self.get_queryset())
+        posts = Post.objects.select_related('owner__profile').in_bulk(
+            [like.post_id for like in likes])
+        page = [posts[like.post_id] for like in likes if like.post_id in posts]
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class PostLikeToggle(generics.GenericAPIView):
+    '''
+    API view liking (PUT) or unliking (DELETE) a post as the requesting
+    user.
+
+    Both methods are idempotent. A like is inserted with INSERT ... ON
+    CONFLICT DO NOTHING and removed with a single DELETE ... RETURNING,
+    so double-taps never raise. The response carries the resulting
+    like_id, which is null after an unlike, and the post's likes_count,
+    both read in the same transaction. In write-behind mode the pending
+    change of the count is added once it has been buffered.
+
+    Attributes:
+        permission_classes (list): Only authenticated users can like posts.
+    '''
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_likes_count(self):
+        likes_count = Post.objects.filter(
+            pk=self.kwargs['pk']).values_list('likes_count', flat=True).first()
+        if likes_count is None:
+            raise Http404
+        return likes_count
+
+    def put(self, request, pk):
+        with transaction.atomic():
+            self.get_likes_count()
+            like = insert_ignore(
+                Like, ['owner', 'post'], owner=request.user, post_id=pk)
+            if like is None:
+                like_id = Like.objects.filter(
+                    owner=request.user, post_id=pk
+                ).values_list('id', flat=True).first()
+            else:
+                like_id = like.id
+            likes_count = self.get_likes_count()
+        likes_count += like_counter_buffer.pending(int(pk))
+        return Response(
+            {'like_id': like_id, 'likes_count': likes_count},
+            status=status.HTTP_201_CREATED if like else status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        with transaction.atomic():
+            delete_returning(Like, owner_id=request.user.id, post_id=pk)
+            likes_count = self.get_likes_count()
+        likes_count += like_counter_buffer.pending(int(pk))
+        return Response({'like_id': None, 'likes_count': likes_count})
+
+
+class ViewerLikeList(generics.GenericAPIView):
+    '''
+    API view returning the requesting user's likes of a batch of posts.
+
+    GET /me/likes/?post_ids=1,2,3 responds with a mapping of each post
+    id to the id of the user's like, or null. The lookups are answered
+    from the user's cached liked posts set when there is one, otherwise
+    with one query for the whole batch.
+
+    Attributes:
+        permission_classes (list): Only authenticated users have likes.
+        max_post_ids (int): The largest accepted batch.
+    '''
+    permission_classes = [permissions.IsAuthenticated]
+    max_post_ids = 100
+
+    def get_post_ids(self):
+        raw = self.request.query_params.get('post_ids', '')
+        try:
+            post_ids = [int(post_id) for post_id in raw.split(',') if post_id]
+        except ValueError:
+            raise ValidationError(
+                {'post_ids': 'Expected a comma-separated list of ids.'})
+        if len(post_ids) > self.max_post_ids:
+            raise ValidationError(
+                {'post_ids': f'At most {self.max_post_ids} ids are allowed.'})
+        return post_ids
+
+    def get(self, request):
+        post_ids = self.get_post_ids()
+        loader = get_viewer_relation_loader(request, Like, 'post')
+        loader.prime(post_ids)
+        return Response(
+            {str(post_id): loader.load(post_id) for post_id in post_ids})
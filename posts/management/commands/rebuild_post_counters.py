@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.functions import Now
+from posts.models import Post, count_for_post
+from likes.models import Like
+from comments.models import Comment
+
+
+class Command(BaseCommand):
+    '''
+    Rebuilds the denormalized likes_count and comments_count columns
+    of every post from the Like and Comment tables.
+
+    The counters are normally maintained by the Like and Comment
+    signal receivers; this command repairs them after bulk imports,
+    raw SQL changes or any other drift.
+    '''
+    help = 'Rebuilds Post.likes_count and Post.comments_count from scratch.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Post.objects.update(
+                likes_count=count_for_post(Like),
+                comments_count=count_for_post(Comment),
+                counters_updated_at=Now(),
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt counters for {updated} posts.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from posts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    '''
+    Rebuilds the post search index from the posts table.
+
+    On SQLite this repopulates the FTS5 table, which is otherwise kept
+    up to date by the Post and User signal receivers. On PostgreSQL the
+    GIN indexes are maintained by the database and nothing is needed.
+    '''
+    help = 'Rebuilds the full-text search index for posts.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            get_search_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS('Rebuilt the search index.'))
@@ -0,0 +1,60 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from posts.models import Post
+from posts.serializers import PostSerializer
+from profiles.models import Profile
+from profiles.serializers import ProfileSerializer
+from techstables_backend.images import (
+    fail_image, get_staging_storage, process_image,
+)
+
+UPLOADS = (
+    (Post, PostSerializer),
+    (Profile, ProfileSerializer),
+)
+
+
+class Command(BaseCommand):
+    '''
+    Finishes the image uploads whose background task was lost, e.g.
+    because the worker restarted before running it.
+
+    Posts and profiles still waiting for an upload staged more than
+    --older-than minutes ago are processed again if the staged file is
+    still in the storage. Otherwise, or if processing fails again, the
+    pending upload is cleared and image_error asks the owner to upload
+    the image again.
+    '''
+    help = 'Processes or fails the image uploads left pending.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=float, default=30,
+            help='Minutes since the upload was staged.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(
+            minutes=options['older_than'])
+        staging = get_staging_storage()
+        processed = failed = 0
+        for model, serializer_class in UPLOADS:
+            pending = model.objects.exclude(image_upload='').filter(
+                updated_at__lt=cutoff).values_list('pk', 'image_upload')
+            for pk, staged_name in pending:
+                if not staging.exists(staged_name):
+                    fail_image(model, pk, staged_name)
+                    failed += 1
+                    continue
+                if process_image(
+                    model._meta.label, pk, staged_name,
+                    serializer_class.get_variant_sizes(),
+                ):
+                    processed += 1
+                else:
+                    self.stderr.write(f'Could not process {staged_name}.')
+                    failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} pending image uploads; '
+            f'{failed} could not be processed.'))
@@ -0,0 +1,51 @@
+from django.db import migrations
+
+
+POSTGRES_FORWARDS = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    "CREATE INDEX IF NOT EXISTS posts_post_search_idx ON posts_post "
+    "USING GIN (to_tsvector('english', title || ' ' || content))",
+    'CREATE INDEX IF NOT EXISTS auth_user_username_trgm_idx ON auth_user '
+    'USING GIN (username gin_trgm_ops)',
+]
+
+POSTGRES_BACKWARDS = [
+    'DROP INDEX IF EXISTS posts_post_search_idx',
+    'DROP INDEX IF EXISTS auth_user_username_trgm_idx',
+]
+
+SQLITE_FORWARDS = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts USING fts5('
+    "title, content, username, tokenize='porter unicode61')",
+    'INSERT INTO posts_post_fts (rowid, title, content, username) '
+    'SELECT p.id, p.title, p.content, u.username '
+    'FROM posts_post p JOIN auth_user u ON u.id = p.owner_id',
+]
+
+SQLITE_BACKWARDS = [
+    'DROP TABLE IF EXISTS posts_post_fts',
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        statements = {'postgresql': postgres, 'sqlite': sqlite}.get(vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_post_created_id_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARDS, SQLITE_FORWARDS),
+            run_for_vendor(POSTGRES_BACKWARDS, SQLITE_BACKWARDS),
+        ),
+    ]
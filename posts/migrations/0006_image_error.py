@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_error',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
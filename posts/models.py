@@ -1,5 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
+from django.utils import timezone
+from techstables_backend.cache import invalidate
+from profiles.models import invalidate_profiles, update_profile_counter
+from .search import get_search_backend
 
 
 class Post(models.Model):
@@ -11,9 +18,138 @@ class Post(models.Model):
     image = models.ImageField(
         upload_to='images/', blank=True, null=True
     )
+    image_upload = models.CharField(
+        max_length=255, blank=True, default='', editable=False)
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False)
+    image_error = models.CharField(
+        max_length=255, blank=True, default='', editable=False)
+    comments_count = models.IntegerField(default=0, editable=False)
+    likes_count = models.IntegerField(default=0, editable=False)
+    counters_updated_at = models.DateTimeField(
+        default=timezone.now, editable=False)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='posts_post_created_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.id} {self.title}'
+
+
+class StagedImage(models.Model):
+    '''
+    An uploaded post or profile image waiting for the background task
+    that moves it to the media storage. Rows are written and read by
+    techstables_backend.images.DatabaseStagingStorage.
+
+    Attributes:
+        name (CharField): The staged file name.
+        content (BinaryField): The uploaded bytes.
+        created_at (DateTimeField): When the upload was staged.
+    '''
+    name = models.CharField(max_length=255, unique=True)
+    content = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+def update_post_counter(post_id, field, delta):
+    """
+    Adjusts one of the denormalized engagement counters of a post.
+
+    The update is a single UPDATE ... SET field = field + delta, so
+    concurrent likes and comments never overwrite each other.
+
+    Args:
+        post_id (int): The primary key of the post to update.
+        field (str): The counter column, 'likes_count' or 'comments_count'.
+        delta (int): The amount to add to the counter.
+    """
+    Post.objects.filter(pk=post_id).update(
+        counters_updated_at=Now(), **{field: F(field) + delta})
+
+
+def count_for_post(model):
+    """
+    Returns a subquery expression counting the rows of model
+    that belong to the outer post.
+    """
+    return Coalesce(Subquery(
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by().values('post')
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def index_post(sender, instance, raw=False, **kwargs):
+    """
+    Signal receiver that updates the search index for a saved post.
+    """
+    if not raw:
+        get_search_backend().index_post(instance)
+
+
+def unindex_post(sender, instance, **kwargs):
+    """
+    Signal receiver that removes a deleted post from the search index.
+    """
+    get_search_backend().remove_post(instance.id)
+
+
+def reindex_username(sender, instance, created, raw=False,
+                     update_fields=None, **kwargs):
+    """
+    Signal receiver that updates the indexed username of a user's posts
+    when the username may have changed.
+    """
+    if created or raw:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    get_search_backend().rename_user(instance)
+
+
+def increment_posts_count(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that increments the owner's posts_count
+    when a new Post is created.
+    """
+    if created and not raw:
+        update_profile_counter(instance.owner_id, 'posts_count', 1)
+
+
+def decrement_posts_count(sender, instance, **kwargs):
+    """
+    Signal receiver that decrements the owner's posts_count
+    when a Post is deleted.
+    """
+    update_profile_counter(instance.owner_id, 'posts_count', -1)
+
+
+def invalidate_post_responses(sender, instance, **kwargs):
+    """
+    Signal receiver that invalidates the cached responses showing a
+    saved or deleted post, including its owner's posts_count.
+    """
+    invalidate('posts', f'post:{instance.id}')
+    invalidate_profiles(instance.owner_id)
+
+
+post_save.connect(index_post, sender=Post)
+post_delete.connect(unindex_post, sender=Post)
+post_save.connect(reindex_username, sender=User)
+post_save.connect(increment_posts_count, sender=Post)
+post_delete.connect(decrement_posts_count, sender=Post)
+post_save.connect(invalidate_post_responses, sender=Post)
+post_delete.connect(invalidate_post_responses, sender=Post)
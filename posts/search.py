@@ -0,0 +1,160 @@
+import re
+
+from django.apps import apps
+from django.db import connection, connections, router
+
+
+def get_read_connection():
+    '''
+    Returns the connection searches read from: the one the database
+    routers pick for reading posts, e.g. a replica.
+    '''
+    return connections[router.db_for_read(apps.get_model('posts', 'Post'))]
+
+
+class PostgresSearchBackend:
+    '''
+    Full-text search over posts on PostgreSQL.
+
+    Like the SQLite backend, a post matches when every term of the query
+    is a prefix of a word of its title or content, or is found in its
+    author's username. Candidates are collected through a GIN index on
+    the title and content tsvector expression and a pg_trgm GIN index on
+    usernames, so neither needs a sequential scan. Both indexes are
+    plain expression indexes that PostgreSQL keeps up to date on every
+    write, which is why index_post and remove_post have nothing to do.
+
+    Attributes:
+        search_sql (str): The query template; {usernames} and {terms}
+            are filled in with one condition per term.
+    '''
+    search_sql = '''
+        WITH authors AS (
+            SELECT id FROM auth_user WHERE {usernames}
+        ), candidates AS (
+            SELECT p.id FROM posts_post p
+            WHERE to_tsvector('english', p.title || ' ' || p.content)
+                @@ to_tsquery('english', %(any_term)s)
+            UNION
+            SELECT p.id FROM posts_post p
+            JOIN authors a ON a.id = p.owner_id
+        )
+        SELECT p.id FROM posts_post p
+        JOIN candidates c ON c.id = p.id
+        JOIN auth_user u ON u.id = p.owner_id
+        WHERE {terms}
+        ORDER BY GREATEST(
+            ts_rank(
+                setweight(to_tsvector('english', p.title), 'A') ||
+                setweight(to_tsvector('english', p.content), 'B'),
+                to_tsquery('english', %(any_term)s)),
+            CASE WHEN p.owner_id IN (SELECT id FROM authors)
+                THEN 1.0 ELSE 0.0 END
+        ) DESC, p.id DESC
+        LIMIT %(limit)s
+    '''
+    # A term that is a stop word, e.g. 'the', has an empty tsquery and
+    # is ignored in the title and content, as plainto_tsquery would.
+    term_sql = '''(
+        numnode(to_tsquery('english', %(term_{n})s)) = 0
+        OR to_tsvector('english', p.title || ' ' || p.content)
+            @@ to_tsquery('english', %(term_{n})s)
+        OR u.username ILIKE %(pattern_{n})s
+    )'''
+
+    def search(self, query, limit):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        params = {
+            'any_term': ' | '.join(f'{term}:*' for term in terms),
+            'limit': limit,
+        }
+        for n, term in enumerate(terms):
+            params[f'term_{n}'] = f'{term}:*'
+            params[f'pattern_{n}'] = '%' + term.replace('_', r'\_') + '%'
+        sql = self.search_sql.format(
+            usernames=' OR '.join(
+                f'username ILIKE %(pattern_{n})s'
+                for n in range(len(terms))),
+            terms=' AND '.join(
+                self.term_sql.format(n=n) for n in range(len(terms))))
+        with get_read_connection().cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def rename_user(self, user):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class SQLiteSearchBackend:
+    '''
+    Full-text search over posts on SQLite, used in development and tests.
+
+    Posts are indexed in the posts_post_fts FTS5 table keyed by post id,
+    which is updated incrementally as posts are saved and deleted.
+    Results are ranked with bm25, weighting title matches highest.
+    '''
+    table = 'posts_post_fts'
+
+    def search(self, query, limit):
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        match = ' '.join(f'"{term}"*' for term in terms)
+        with get_read_connection().cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}, 10.0, 1.0, 5.0), rowid DESC '
+                'LIMIT %s',
+                [match, limit])
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post.id])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content, username) '
+                'SELECT p.id, p.title, p.content, u.username '
+                'FROM posts_post p JOIN auth_user u ON u.id = p.owner_id '
+                'WHERE p.id = %s',
+                [post.id])
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def rename_user(self, user):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.table} SET username = %s WHERE rowid IN '
+                '(SELECT id FROM posts_post WHERE owner_id = %s)',
+                [user.username, user.id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content, username) '
+                'SELECT p.id, p.title, p.content, u.username '
+                'FROM posts_post p JOIN auth_user u ON u.id = p.owner_id')
+
+
+def get_search_backend():
+    '''
+    Returns the search backend for the default database's vendor.
+    '''
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
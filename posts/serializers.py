@@ -1,13 +1,23 @@
 from rest_framework import serializers
+from techstables_backend.images import (
+    BackgroundImageMixin, HeaderOnlyImageField, variant_urls
+)
+from techstables_backend.loaders import ViewerRelationMixin
+from techstables_backend.metrics import TimedSerializerMixin
 from .models import Post
+from likes.counters import like_counter_buffer
 from likes.models import Like
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(TimedSerializerMixin, BackgroundImageMixin,
+                     ViewerRelationMixin, serializers.ModelSerializer):
     '''
     Serializer for the Post model, including additional fields for user-related
     information and post statistics.
 
+    New images are validated from their header only and uploaded in the
+    background together with their feed-size JPEG and WebP variants.
+
     Attributes:
         owner (ReadOnlyField): The username of the post owner.
         profile_id (ReadOnlyField): The ID of the owner's profile.
@@ -17,12 +27,19 @@ class PostSerializer(serializers.ModelSerializer):
         like_id (SerializerMethodField): The ID of the like by the current
             user on the post.
         comments_count (ReadOnlyField): The number of comments on the post.
-        likes_count (ReadOnlyField): The number of likes on the post.
+        likes_count (SerializerMethodField): The number of likes on the
+            post, including changes still in the write-behind buffer.
+        image (HeaderOnlyImageField): The post image.
+        image_variants (SerializerMethodField): The URLs of the resized
+            variants of the image, once they are ready.
+        image_variant_names (tuple): The variants generated for new images.
 
     Methods:
         validate_image: Validates the image size and dimensions.
         get_is_owner: Checks if the requesting user is the owner of the post.
         get_like_id: Retrieves the like ID for the current user and post.
+        get_likes_count: Returns the post's current likes count.
+        get_image_variants: Returns the URLs of the image variants.
 
     Meta:
         model: The Post model.
@@ -34,12 +51,16 @@ class PostSerializer(serializers.ModelSerializer):
     is_owner = serializers.SerializerMethodField()
     like_id = serializers.SerializerMethodField()
     comments_count = serializers.ReadOnlyField()
-    likes_count = serializers.ReadOnlyField()
+    likes_count = serializers.SerializerMethodField()
+    image = HeaderOnlyImageField(required=False, allow_null=True)
+    image_variants = serializers.SerializerMethodField()
+    image_variant_names = ('feed',)
 
     def validate_image(self, value):
         '''
         Validates the uploaded image to ensure it meets size and
-        dimension constraints.
+        dimension constraints. The dimensions are read from the image
+        header, without decoding the image.
 
         Args:
             value: The image file to be validated.
@@ -78,12 +99,13 @@ class PostSerializer(serializers.ModelSerializer):
             otherwise False.
         '''
         request = self.context['request']
-        return obj.owner == request.user
+        return obj.owner_id == request.user.id
 
     def get_like_id(self, obj):
         '''
         Retrieves the ID of the 'Like' instance associated
         with the current user and the specified post object.
+        The likes for every post on the page are loaded in one query.
 
         Args:
             obj: The post object for which the like ID is being retrieved.
@@ -93,13 +115,21 @@ class PostSerializer(serializers.ModelSerializer):
                 if it exists and the user is authenticated;
                 otherwise, None.
         '''
-        user = self.context['request'].user
-        if user.is_authenticated:
-            like = Like.objects.filter(
-                owner=user, post=obj
-            ).first()
-            return like.id if like else None
-        return None
+        return self.get_viewer_relation_id(obj, Like, 'post', 'id')
+
+    def get_likes_count(self, obj):
+        '''
+        Returns the stored likes_count of the post plus the change not
+        yet flushed from this process's write-behind buffer.
+        '''
+        return obj.likes_count + like_counter_buffer.pending(obj.id)
+
+    def get_image_variants(self, obj):
+        '''
+        Returns the URLs of the resized variants of the post image, keyed
+        by variant name, or None until they have been generated.
+        '''
+        return variant_urls(obj)
 
     class Meta:
         '''
@@ -126,10 +156,14 @@ class PostSerializer(serializers.ModelSerializer):
                     on the post.
                 - 'comments_count': The number of comments on the post.
                 - 'likes_count': The number of likes on the post.
+                - 'image_variants': The URLs of the image variants.
+                - 'image_error': Why the last new image could not be
+                    processed, empty otherwise.
         '''
         model = Post
         fields = [
             'id', 'owner', 'is_owner', 'profile_id', 'profile_image',
             'created_at', 'updated_at', 'title', 'content', 'image',
-            'like_id', 'comments_count', 'likes_count'
+            'image_variants', 'image_error', 'like_id', 'comments_count',
+            'likes_count'
         ]
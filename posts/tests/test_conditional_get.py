@@ -0,0 +1,185 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from likes.models import Like
+from comments.models import Comment
+from followers.models import Follower
+from profiles.models import Profile
+from techstables_backend.humanize import NaturalTimeBatch
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username="owner", password="pass1234")
+        self.other = User.objects.create_user(
+            username="other", password="pass1234")
+        self.post = Post.objects.create(
+            owner=self.owner, title="Polled", content="x")
+        self.detail_url = f"/posts/{self.post.id}"
+
+    def revalidate(self, url, **headers):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, headers=headers)
+        return resp, ctx.captured_queries
+
+    def test_detail_returns_304_for_matching_etag(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        resp, queries = self.revalidate(self.detail_url, if_none_match=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp["ETag"], etag)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("likes_like", queries[0]["sql"])
+
+    def age(self):
+        '''
+        Moves every timestamp a day back, so the changes a test makes
+        move Last-Modified by more than its one second resolution.
+        '''
+        past = timezone.now() - timedelta(days=1)
+        Post.objects.update(updated_at=past, counters_updated_at=past)
+        Profile.objects.update(updated_at=past, counters_updated_at=past)
+        Comment.objects.update(created_at=past, updated_at=past)
+        cache.clear()
+
+    def assert_modified_since(self, url, change):
+        self.age()
+        last_modified = self.client.get(url)["Last-Modified"]
+        resp, _ = self.revalidate(url, if_modified_since=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        change()
+        resp, _ = self.revalidate(url, if_modified_since=last_modified)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp
+
+    def test_detail_last_modified_moves_with_counters_and_owner(self):
+        resp = self.assert_modified_since(
+            self.detail_url,
+            lambda: Like.objects.create(owner=self.other, post=self.post))
+        self.assertEqual(resp.data["likes_count"], 1)
+
+        def rename():
+            self.owner.username = "renamed"
+            self.owner.save()
+        resp = self.assert_modified_since(self.detail_url, rename)
+        self.assertEqual(resp.data["owner"], "renamed")
+
+        resp = self.assert_modified_since(
+            f"/profiles/{self.owner.profile.id}",
+            lambda: Follower.objects.create(
+                owner=self.other, followed=self.owner))
+        self.assertEqual(resp.data["followers_count"], 1)
+
+    def test_comment_etags_cover_natural_times(self):
+        comment = Comment.objects.create(
+            owner=self.other, post=self.post, content="c")
+        self.client.login(username="other", password="pass1234")
+        urls = (f"/comments/{comment.id}", f"/posts/{self.post.id}/comments/")
+        later = NaturalTimeBatch(now=timezone.now() + timedelta(hours=3))
+        natural = [self.client.get(url)["ETag"] for url in urls]
+        iso = [
+            self.client.get(url, {"timestamps": "iso"})["ETag"]
+            for url in urls
+        ]
+        with mock.patch("comments.views.NaturalTimeBatch", return_value=later):
+            for url, etag in zip(urls, natural):
+                resp, _ = self.revalidate(url, if_none_match=etag)
+                self.assertEqual(resp.status_code, status.HTTP_200_OK, url)
+            for url, etag in zip(urls, iso):
+                resp, _ = self.revalidate(
+                    f"{url}?timestamps=iso", if_none_match=etag)
+                self.assertEqual(
+                    resp.status_code, status.HTTP_304_NOT_MODIFIED, url)
+
+    def test_comment_last_modified_needs_iso_timestamps(self):
+        comment = Comment.objects.create(
+            owner=self.other, post=self.post, content="c")
+        url = f"/comments/{comment.id}"
+        self.assertNotIn("Last-Modified", self.client.get(url))
+
+        def edit():
+            comment.content = "edited"
+            comment.save()
+        self.assert_modified_since(f"{url}?timestamps=iso", edit)
+
+    def test_owner_changes_invalidate_detail_etags(self):
+        comment = Comment.objects.create(
+            owner=self.owner, post=self.post, content="c")
+        urls = (
+            self.detail_url,
+            f"/profiles/{self.owner.profile.id}",
+            f"/comments/{comment.id}",
+        )
+        etags = [self.client.get(url)["ETag"] for url in urls]
+        self.owner.username = "renamed"
+        self.owner.save()
+        for url, etag in zip(urls, etags):
+            resp, _ = self.revalidate(url, if_none_match=etag)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, url)
+
+        etags = [self.client.get(url)["ETag"] for url in urls]
+        profile = self.owner.profile
+        profile.image = "images/new.png"
+        profile.save()
+        for url, etag in zip((urls[0], urls[2]), (etags[0], etags[2])):
+            resp, _ = self.revalidate(url, if_none_match=etag)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, url)
+
+    def test_counter_change_invalidates_detail_etag(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        Comment.objects.create(owner=self.other, post=self.post, content="c")
+        resp, _ = self.revalidate(self.detail_url, if_none_match=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["comments_count"], 1)
+
+    def test_viewer_like_is_part_of_detail_etag(self):
+        self.client.login(username="other", password="pass1234")
+        etag = self.client.get(self.detail_url)["ETag"]
+        Like.objects.create(owner=self.other, post=self.post)
+        resp, _ = self.revalidate(self.detail_url, if_none_match=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(resp.data["like_id"])
+
+    def test_profile_and_comment_details_support_etags(self):
+        Follower.objects.create(owner=self.other, followed=self.owner)
+        comment = Comment.objects.create(
+            owner=self.other, post=self.post, content="c")
+        for url in (
+            f"/profiles/{self.owner.profile.id}",
+            f"/comments/{comment.id}",
+        ):
+            etag = self.client.get(url)["ETag"]
+            resp, _ = self.revalidate(url, if_none_match=etag)
+            self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_object_is_still_404(self):
+        resp = self.client.get("/posts/9999", headers={"if_none_match": "*"})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_has_weak_etag_that_changes_with_the_page(self):
+        self.client.login(username="other", password="pass1234")
+        etag = self.client.get("/posts/")["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+
+        resp, _ = self.revalidate("/posts/", if_none_match=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Like.objects.create(owner=self.other, post=self.post)
+        resp, _ = self.revalidate("/posts/", if_none_match=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_cached_anonymous_list_answers_if_none_match(self):
+        etag = self.client.get("/profiles/")["ETag"]
+        resp, queries = self.revalidate("/profiles/", if_none_match=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
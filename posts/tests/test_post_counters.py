@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from likes.models import Like
+from comments.models import Comment
+
+
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username="owner", password="pass1234")
+        self.other = User.objects.create_user(
+            username="other", password="pass1234")
+        self.post = Post.objects.create(
+            owner=self.owner, title="Counted", content="x")
+
+    def test_counters_follow_creates_and_deletes(self):
+        like = Like.objects.create(owner=self.other, post=self.post)
+        Comment.objects.create(owner=self.other, post=self.post, content="a")
+        comment = Comment.objects.create(
+            owner=self.owner, post=self.post, content="b")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 2)
+
+        like.delete()
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_bulk_queryset_delete_updates_counters(self):
+        Like.objects.create(owner=self.other, post=self.post)
+        Like.objects.create(owner=self.owner, post=self.post)
+        Like.objects.filter(post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_rebuild_command_repairs_drift(self):
+        Like.objects.create(owner=self.other, post=self.post)
+        Comment.objects.create(owner=self.other, post=self.post, content="a")
+        Post.objects.filter(pk=self.post.pk).update(
+            likes_count=7, comments_count=-3)
+
+        call_command("rebuild_post_counters", stdout=open("/dev/null", "w"))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_list_reads_counter_columns_without_joins(self):
+        Like.objects.create(owner=self.other, post=self.post)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/posts/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["results"][0]["likes_count"], 1)
+        post_queries = [
+            q["sql"] for q in ctx.captured_queries
+            if 'FROM "posts_post"' in q["sql"]
+        ]
+        for sql in post_queries:
+            self.assertNotIn("likes_like", sql)
+            self.assertNotIn("comments_comment", sql)
+
+    def test_counters_are_not_writable_through_the_api(self):
+        self.client.login(username="owner", password="pass1234")
+        resp = self.client.patch(
+            f"/posts/{self.post.id}", {"likes_count": 99}, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["likes_count"], 0)
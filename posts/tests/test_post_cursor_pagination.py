@@ -0,0 +1,80 @@
+import base64
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+
+
+class PostCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="writer", password="pass1234")
+        self.posts = [
+            Post.objects.create(owner=self.user, title=f"Post {i}", content="c")
+            for i in range(25)
+        ]
+        # Give a group of posts the same timestamp so the id tie-breaker
+        # is exercised across a page boundary.
+        same_time = timezone.now()
+        Post.objects.filter(
+            pk__in=[post.pk for post in self.posts[5:15]]
+        ).update(created_at=same_time)
+
+    def expected_ids(self):
+        return list(
+            Post.objects.order_by("-created_at", "-id")
+            .values_list("id", flat=True))
+
+    def test_default_mode_is_page_number(self):
+        resp = self.client.get("/posts/")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["count"], 25)
+        self.assertIn("previous", resp.data)
+
+    def test_cursor_mode_walks_every_post_once(self):
+        seen = []
+        url = "/posts/?pagination=cursor"
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", resp.data)
+            seen.extend(item["id"] for item in resp.data["results"])
+            url = resp.data["next"]
+        self.assertEqual(seen, self.expected_ids())
+
+    def test_cursor_mode_does_not_count_or_offset(self):
+        first = self.client.get("/posts/", {"pagination": "cursor"})
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(first.data["next"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        post_queries = [
+            q["sql"] for q in ctx.captured_queries
+            if 'FROM "posts_post"' in q["sql"]
+        ]
+        self.assertEqual(len(post_queries), 1)
+        self.assertNotIn("COUNT(", post_queries[0])
+        self.assertNotIn("OFFSET", post_queries[0])
+
+    def test_invalid_cursor_returns_404(self):
+        resp = self.client.get("/posts/", {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_bad_values_returns_404(self):
+        post = Post.objects.first()
+        for values in (
+            ["garbage", 1], [{"a": 1}, 1], ["2024-01-01T00:00:00Z", "x"],
+            [None, 1], [[1], 1],
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(values).encode()).decode().rstrip("=")
+            for path in ("/posts/", f"/posts/{post.id}/comments/"):
+                resp = self.client.get(path, {"cursor": cursor})
+                self.assertEqual(
+                    resp.status_code, status.HTTP_404_NOT_FOUND,
+                    (path, values))
@@ -0,0 +1,192 @@
+import datetime
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post, StagedImage
+from profiles.models import Profile
+from techstables_backend.images import IMAGE_ERROR
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_upload(name="photo.png", size=(1600, 1200), image_format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, image_format)
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type=f"image/{image_format.lower()}")
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES={
+        "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+        },
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        },
+        "image_staging": {
+            "BACKEND": "techstables_backend.images.DatabaseStagingStorage",
+        },
+    },
+    BACKGROUND_TASKS={"WORKERS": 1, "EAGER": True},
+)
+class BackgroundImageTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="ann", password="pass1234")
+        self.client.login(username="ann", password="pass1234")
+
+    def create_post(self, image, title="Photo"):
+        return self.client.post(
+            "/posts/",
+            {"title": title, "content": "c", "image": image},
+            format="multipart",
+        )
+
+    def test_upload_is_processed_after_the_response(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            resp = self.create_post(image_upload())
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(resp.data["image"])
+        self.assertIsNone(resp.data["image_variants"])
+        post = Post.objects.get(pk=resp.data["id"])
+        self.assertTrue(post.image_upload)
+        self.assertFalse(post.image)
+        self.assertTrue(
+            StagedImage.objects.filter(name=post.image_upload).exists())
+        self.assertEqual(default_storage.listdir("")[1], [])
+
+        for callback in callbacks:
+            callback()
+
+        post.refresh_from_db()
+        self.assertEqual(post.image_upload, "")
+        self.assertFalse(StagedImage.objects.exists())
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertEqual(set(post.image_variants), {"feed", "feed_webp"})
+        with default_storage.open(post.image_variants["feed_webp"]) as f:
+            variant = Image.open(f)
+            self.assertEqual(variant.format, "WEBP")
+            self.assertEqual(variant.size, (1080, 810))
+
+        resp = self.client.get(f"/posts/{post.id}")
+        self.assertTrue(resp.data["image"].endswith(post.image.name))
+        self.assertTrue(
+            resp.data["image_variants"]["feed"].endswith(".jpg"))
+
+    def test_dimensions_are_checked_from_the_header(self):
+        resp = self.create_post(image_upload(size=(4097, 10)))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("width", str(resp.data["image"]))
+
+    def test_non_images_are_rejected(self):
+        upload = SimpleUploadedFile("x.png", b"not an image")
+        resp = self.create_post(upload)
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Post.objects.exists())
+
+    def test_superseded_upload_is_discarded(self):
+        with self.captureOnCommitCallbacks() as first:
+            resp = self.create_post(image_upload(name="first.png"))
+        post_id = resp.data["id"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"/posts/{post_id}",
+                {"title": "Photo", "content": "c",
+                 "image": image_upload(name="second.png")},
+                format="multipart",
+            )
+        for callback in first:
+            callback()
+
+        post = Post.objects.get(pk=post_id)
+        self.assertIn("second", post.image.name)
+        stored = default_storage.listdir("images")[1]
+        self.assertFalse([name for name in stored if "first" in name])
+
+    def test_profile_images_get_square_avatars(self):
+        profile = Profile.objects.get(owner=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.put(
+                f"/profiles/{profile.id}",
+                {"image": image_upload()},
+                format="multipart",
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        profile.refresh_from_db()
+        self.assertEqual(set(profile.image_variants), {"avatar", "avatar_webp"})
+        with default_storage.open(profile.image_variants["avatar"]) as f:
+            self.assertEqual(Image.open(f).size, (256, 256))
+        resp = self.client.get(f"/profiles/{profile.id}")
+        self.assertIn("avatar_webp", resp.data["image_variants"])
+
+    def stage_and_lose_task(self, name="lost.png"):
+        with self.captureOnCommitCallbacks():
+            resp = self.create_post(image_upload(name=name))
+        past = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        Post.objects.filter(pk=resp.data["id"]).update(updated_at=past)
+        return Post.objects.get(pk=resp.data["id"])
+
+    def test_lost_uploads_are_recovered(self):
+        post = self.stage_and_lose_task()
+        with self.captureOnCommitCallbacks():
+            recent = self.create_post(
+                image_upload(name="recent.png"), title="Recent")
+        call_command("recover_image_uploads", stdout=io.StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.image_upload, "")
+        self.assertIn("lost", post.image.name)
+        self.assertEqual(set(post.image_variants), {"feed", "feed_webp"})
+        self.assertTrue(
+            Post.objects.get(pk=recent.data["id"]).image_upload)
+
+    def test_missing_uploads_are_failed(self):
+        post = self.stage_and_lose_task()
+        StagedImage.objects.filter(name=post.image_upload).delete()
+        call_command("recover_image_uploads", stdout=io.StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.image_upload, "")
+        self.assertFalse(post.image)
+        resp = self.client.get(f"/posts/{post.id}")
+        self.assertEqual(resp.data["image_error"], IMAGE_ERROR)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(
+                f"/posts/{post.id}",
+                {"title": "Photo", "content": "c", "image": image_upload()},
+                format="multipart",
+            )
+        self.assertEqual(
+            self.client.get(f"/posts/{post.id}").data["image_error"], "")
+
+    def test_failed_processing_sets_image_error(self):
+        with mock.patch(
+            "techstables_backend.images.render_variant",
+            side_effect=OSError("broken"),
+        ), self.assertLogs("techstables_backend.images", "ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.create_post(image_upload())
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(pk=resp.data["id"])
+        self.assertEqual(post.image_upload, "")
+        self.assertEqual(post.image_error, IMAGE_ERROR)
+        self.assertFalse(StagedImage.objects.exists())
@@ -0,0 +1,83 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from posts.search import PostgresSearchBackend, get_search_backend
+
+
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(
+            username="alice", password="pass1234")
+        self.bob = User.objects.create_user(
+            username="bobby", password="pass1234")
+        self.title_hit = Post.objects.create(
+            owner=self.alice, title="Keyboard review", content="switches")
+        self.content_hit = Post.objects.create(
+            owner=self.alice, title="Desk setup",
+            content="a mechanical keyboard on a walnut desk")
+        self.other = Post.objects.create(
+            owner=self.bob, title="Monitor arms", content="gas springs")
+
+    def search(self, query):
+        resp = self.client.get("/posts/search/", {"q": query})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in resp.data["results"]]
+
+    def test_matches_content_and_ranks_title_first(self):
+        self.assertEqual(
+            self.search("keyboard"), [self.title_hit.id, self.content_hit.id])
+
+    def test_matches_username_prefix(self):
+        self.assertEqual(self.search("bob"), [self.other.id])
+
+    def test_every_term_matches_the_post_or_its_username(self):
+        self.assertEqual(self.search("bobby springs"), [self.other.id])
+        self.assertEqual(self.search("alice walnut"), [self.content_hit.id])
+        self.assertEqual(self.search("bobby keyboard"), [])
+
+    def test_reads_from_the_routed_database(self):
+        with mock.patch(
+            "posts.search.router.db_for_read", return_value="default",
+        ) as db_for_read:
+            ids = get_search_backend().search("keyboard", 10)
+        db_for_read.assert_called_once_with(Post)
+        self.assertEqual(ids, [self.title_hit.id, self.content_hit.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.content = "springs and a keyboard tray"
+        self.other.save()
+        self.assertIn(self.other.id, self.search("tray"))
+
+        self.other.delete()
+        self.assertEqual(self.search("tray"), [])
+
+    def test_username_change_is_reindexed(self):
+        self.bob.username = "robert"
+        self.bob.save()
+        self.assertEqual(self.search("robert"), [self.other.id])
+        self.assertEqual(self.search("bobby"), [])
+
+    def test_empty_query_returns_no_results(self):
+        self.assertEqual(self.search(""), [])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_rebuild_command(self):
+        call_command("rebuild_search_index", stdout=open("/dev/null", "w"))
+        self.assertEqual(self.search("springs"), [self.other.id])
+
+
+@skipUnless(connection.vendor == "postgresql", "PostgreSQL search only")
+class PostgresSearchBackendTests(PostSearchTests):
+    def test_backend_is_used(self):
+        self.assertIsInstance(get_search_backend(), PostgresSearchBackend)
+
+    def test_stop_words_are_ignored_in_the_text(self):
+        self.assertEqual(
+            self.search("the keyboard"),
+            [self.title_hit.id, self.content_hit.id])
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.db.utils import load_backend
+from django.test import AsyncClient, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from posts.models import Post
+from likes.models import Like
+from techstables_backend.db_router import replica_monitor
+from techstables_backend.membership import membership_caches
+
+
+class ReadReplicaTests(TransactionTestCase):
+    '''
+    Runs the router against two SQLite replica files, copied from the
+    test database before the last post was created, so reads from a
+    replica miss it.
+    '''
+    client_class = APIClient
+    replicas = ["replica_a", "replica_b"]
+
+    def setUp(self):
+        cache.clear()
+        replica_monitor.reset()
+        self.addCleanup(replica_monitor.reset)
+        self.owner = User.objects.create_user(
+            username="author", password="pass1234")
+        self.client.login(username="author", password="pass1234")
+        Post.objects.create(owner=self.owner, title="Replicated", content="x")
+        directory = tempfile.mkdtemp()
+        for alias in self.replicas:
+            self.add_replica(
+                alias, os.path.join(directory, f"{alias}.sqlite3"))
+        Post.objects.create(owner=self.owner, title="Latest", content="x")
+        replicas = override_settings(DATABASE_REPLICAS={
+            **settings.DATABASE_REPLICAS, "ALIASES": self.replicas})
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+    def add_replica(self, alias, path):
+        '''
+        Copies the test database to path and connects alias to the copy.
+        The connection is not listed in the settings, which the test
+        case allows for connections created on the fly.
+        '''
+        primary = connections["default"]
+        primary.ensure_connection()
+        replica = sqlite3.connect(path)
+        primary.connection.backup(replica)
+        replica.close()
+        settings_dict = connections.configure_settings({
+            **settings.DATABASES,
+            alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": path},
+        })[alias]
+        connections[alias] = load_backend(
+            settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, alias)
+
+        def remove():
+            connections[alias].close()
+            del connections[alias]
+        self.addCleanup(remove)
+
+    def titles(self, resp):
+        self.assertEqual(resp.status_code, 200)
+        return [post["title"] for post in resp.json()["results"]]
+
+    def test_safe_requests_read_from_a_replica(self):
+        resp = self.client.get("/posts/")
+        self.assertEqual(self.titles(resp), ["Replicated"])
+        self.assertNotIn("primary_until", resp.cookies)
+        self.assertEqual(
+            self.titles(self.client_class().get("/posts/")), ["Replicated"])
+
+    def test_writers_read_their_writes(self):
+        resp = self.client.post(
+            "/posts/", {"title": "Mine", "content": "x"}, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertIn("primary_until", resp.cookies)
+        self.assertEqual(
+            self.titles(self.client.get("/posts/")),
+            ["Mine", "Latest", "Replicated"])
+
+        self.client.cookies["primary_until"] = str(time.time() - 1)
+        self.assertEqual(
+            self.titles(self.client.get("/posts/")), ["Replicated"])
+
+    def test_lagging_and_unreachable_replicas_are_skipped(self):
+        connections["replica_a"].close()
+        connections["replica_a"].settings_dict["NAME"] = os.path.join(
+            tempfile.mkdtemp(), "missing", "replica.sqlite3")
+        with self.assertLogs("techstables_backend.db_router", "WARNING"):
+            for _ in range(5):
+                self.assertEqual(
+                    self.titles(self.client.get("/posts/")), ["Replicated"])
+        self.assertIsNone(replica_monitor.checked["replica_a"][1])
+
+        replica_monitor.reset()
+        with mock.patch(
+            "techstables_backend.db_router.measure_lag", return_value=60.0,
+        ):
+            resp = self.client.get("/posts/")
+        self.assertEqual(self.titles(resp), ["Latest", "Replicated"])
+
+    def test_recent_changes_read_from_a_replica_are_not_cached(self):
+        anonymous = self.client_class()
+        self.assertEqual(anonymous.get("/posts/")["X-Cache"], "MISS")
+        self.assertEqual(anonymous.get("/posts/")["X-Cache"], "MISS")
+        with override_settings(DATABASE_REPLICAS={
+            **settings.DATABASE_REPLICAS, "ALIASES": self.replicas,
+            "MAX_LAG_SECONDS": 0,
+        }):
+            anonymous.get("/posts/")
+            self.assertEqual(anonymous.get("/posts/")["X-Cache"], "HIT")
+
+    def test_membership_sets_are_loaded_from_the_primary(self):
+        post = Post.objects.get(title="Replicated")
+        like = Like.objects.create(owner=self.owner, post=post)
+        for membership in membership_caches.values():
+            membership.reset()
+        resp = self.client.get("/posts/")
+        self.assertEqual(resp.json()["results"][0]["like_id"], like.id)
+
+    async def test_async_requests_read_from_a_replica(self):
+        resp = await AsyncClient().get("/posts/")
+        self.assertEqual(self.titles(resp), ["Replicated"])
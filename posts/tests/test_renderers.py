@@ -0,0 +1,123 @@
+import datetime
+import decimal
+import json
+import math
+import random
+import struct
+import uuid
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from techstables_backend.renderers import FastJSONRenderer, orjson
+
+SAMPLE = {
+    "count": 2,
+    "next": None,
+    "results": [
+        {
+            "id": 1, "title": "Café   line   para \U0001F600",
+            "content": "quotes \" back\\slash \x01 tab\t newline\n",
+            "created_at": datetime.datetime(
+                2025, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            "date": datetime.date(2025, 5, 1),
+            "price": decimal.Decimal("1.50"),
+            "uuid": uuid.UUID(int=7),
+            "score": 12.345678901234, "liked": True, "like_id": None,
+            "tags": ("a", "b"),
+        },
+        {"id": 2, 3: "non-string key", "nested": [[], {}]},
+    ],
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assert_same_as_drf(self, data, **kwargs):
+        expected = JSONRenderer().render(data, **kwargs)
+        self.assertEqual(FastJSONRenderer().render(data, **kwargs), expected)
+
+    def test_output_matches_drf_renderer(self):
+        self.assert_same_as_drf(SAMPLE)
+        self.assert_same_as_drf([SAMPLE, 2 ** 70])
+        self.assert_same_as_drf(None)
+
+    def test_floats_match_drf_renderer(self):
+        self.assert_same_as_drf(
+            [1e16, 1e-7, 0.1, -0.0, 1.5e300, 2.0 ** 53, 123456789.125])
+
+    def test_indented_output_is_left_to_drf(self):
+        self.assert_same_as_drf(
+            SAMPLE, accepted_media_type="application/json; indent=4")
+
+    def test_small_floats_and_big_ints_fall_back_to_drf(self):
+        renderer = FastJSONRenderer()
+        for data in ([1e-7], [-0.000011688973301855521], {"n": 2 ** 70},
+                     {3: "non-string key"}):
+            self.assertIsNone(renderer.encode(data))
+            self.assert_same_as_drf(data)
+
+    def test_random_floats_match_drf_renderer(self):
+        rng = random.Random(7)
+        floats = [struct.unpack("d", struct.pack("Q", rng.getrandbits(64)))[0]
+                  for _ in range(2000)]
+        floats += [rng.uniform(-1e6, 1e6) for _ in range(2000)]
+        for value in floats:
+            if math.isfinite(value):
+                self.assert_same_as_drf([value])
+
+    def test_line_separators_are_escaped(self):
+        self.assert_same_as_drf({"text": "a\u2028b\u2029c"})
+
+    @skipIf(orjson is None, "orjson is not installed")
+    def test_pages_are_encoded_by_orjson(self):
+        page = {"next": None, "results": [
+            {"id": n, "title": f"Post {n}", "liked": None,
+             "created_at": SAMPLE["results"][0]["created_at"]}
+            for n in range(3)]}
+        self.assertIsNotNone(FastJSONRenderer().encode(page))
+        self.assert_same_as_drf(page)
+
+    def test_output_matches_drf_renderer_without_orjson(self):
+        with mock.patch("techstables_backend.renderers.orjson", None):
+            self.assert_same_as_drf(SAMPLE)
+            self.assert_same_as_drf([1e16, 1e-7, 0.1])
+
+
+class PageSizeTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username="writer", password="pass")
+        now = timezone.now()
+        Post.objects.bulk_create(
+            Post(owner=owner, title=f"Post {n}", content="c",
+                 created_at=now, updated_at=now)
+            for n in range(120))
+
+    def test_big_pages_are_returned(self):
+        resp = self.client.get(
+            "/posts/", {"pagination": "cursor", "page_size": 110})
+        self.assertEqual(resp["Content-Type"], "application/json")
+        body = json.loads(resp.content)
+        self.assertEqual(len(body["results"]), 110)
+        self.assertIn("page_size=110", body["next"])
+
+    def test_page_size_is_capped(self):
+        resp = self.client.get(
+            "/posts/", {"pagination": "cursor", "page_size": 100000})
+        self.assertEqual(len(resp.data["results"]), 120)
+        with mock.patch(
+            "techstables_backend.pagination.KeysetPagination.max_page_size",
+            5,
+        ):
+            resp = self.client.get(
+                "/posts/", {"pagination": "cursor", "page_size": 50})
+        self.assertEqual(len(resp.data["results"]), 5)
+        resp = self.client.get(
+            "/posts/", {"pagination": "cursor", "page_size": "x"})
+        self.assertEqual(len(resp.data["results"]), 10)
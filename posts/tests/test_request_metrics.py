@@ -0,0 +1,63 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from techstables_backend.metrics import (
+    QueryBudgetExceeded, RequestMetricsMiddleware,
+)
+
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(10):
+            owner = User.objects.create_user(
+                username=f"author{i}", password="pass1234")
+            Post.objects.create(owner=owner, title=f"Post {i}", content="x")
+
+    def test_server_timing_reports_queries_and_phases(self):
+        with self.assertNumQueries(2):
+            resp = self.client.get("/posts/")
+        timing = resp["Server-Timing"]
+        self.assertIn('desc="2 queries"', timing)
+        for phase in ("db", "serializer", "render", "total"):
+            self.assertRegex(timing, rf"{phase};dur=\d+\.\d")
+
+    def test_streamed_responses_leave_render_out(self):
+        middleware = RequestMetricsMiddleware(
+            lambda request: StreamingHttpResponse(iter([b"a", b"b"])))
+        resp = middleware(RequestFactory().get("/download/"))
+        timing = resp["Server-Timing"]
+        self.assertNotIn("render", timing)
+        for phase in ("db", "serializer", "total"):
+            self.assertRegex(timing, rf"{phase};dur=\d+\.\d")
+
+    def test_post_list_query_count_does_not_grow_with_the_page(self):
+        with self.assertNumQueries(2):
+            self.client.get("/posts/")
+        self.client.login(username="author0", password="pass1234")
+        resp = self.client.get("/posts/")
+        queries = int(re.search(r'"(\d+) queries"', resp["Server-Timing"])[1])
+        self.assertLessEqual(queries, 5)
+
+    @override_settings(QUERY_BUDGETS={"posts.views.PostList": 1})
+    def test_over_budget_view_fails_in_raise_mode(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "budget of 1"):
+            self.client.get("/posts/")
+
+    @override_settings(
+        QUERY_BUDGETS={"posts.views.PostList": 1},
+        REQUEST_METRICS={
+            "SERVER_TIMING": False, "LOG": False, "BUDGET_MODE": "log"},
+    )
+    def test_over_budget_view_is_logged_in_log_mode(self):
+        with self.assertLogs("techstables_backend.metrics", "WARNING") as logs:
+            resp = self.client.get("/posts/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn("Server-Timing", resp)
+        self.assertIn("posts.views.PostList ran 2 queries", logs.output[0])
@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from likes.models import Like
+from comments.models import Comment
+from followers.models import Follower
+from techstables_backend.cache import (
+    acquire_rebuild_lock, lock_file_path, release_rebuild_lock,
+)
+
+
+class AnonymousResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username="owner", password="pass1234")
+        self.other = User.objects.create_user(
+            username="other", password="pass1234")
+        self.post = Post.objects.create(
+            owner=self.owner, title="Cached", content="x")
+
+    def get(self, url, params=None):
+        resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return resp
+
+    def test_second_anonymous_read_is_served_from_cache(self):
+        self.assertEqual(self.get("/posts/")["X-Cache"], "MISS")
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.get("/posts/")
+        self.assertEqual(resp["X-Cache"], "HIT")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_query_string_is_normalized(self):
+        self.get("/posts/", {"page": 1, "ordering": "likes_count"})
+        resp = self.client.get("/posts/?ordering=likes_count&page=1")
+        self.assertEqual(resp["X-Cache"], "HIT")
+
+    def test_authenticated_reads_are_not_cached(self):
+        self.client.login(username="other", password="pass1234")
+        self.get("/posts/")
+        resp = self.get("/posts/")
+        self.assertNotIn("X-Cache", resp)
+
+    def test_like_invalidates_detail_and_likes_lists(self):
+        detail = f"/posts/{self.post.id}"
+        by_likes = {"ordering": "-likes_count"}
+        liked = {"likes__owner__profile": self.other.profile.id}
+        for url, params in (
+            ("/posts/", None), (detail, None),
+            ("/posts/", by_likes), ("/posts/", liked),
+        ):
+            self.get(url, params)
+        Like.objects.create(owner=self.other, post=self.post)
+
+        resp = self.get(detail)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["likes_count"], 1)
+        resp = self.get("/posts/", by_likes)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["results"][0]["likes_count"], 1)
+        resp = self.get("/posts/", liked)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["count"], 1)
+        self.assertEqual(self.get("/posts/")["X-Cache"], "HIT")
+
+    def test_comment_invalidates_only_its_post_thread(self):
+        other_post = Post.objects.create(
+            owner=self.owner, title="Other", content="y")
+        self.get("/comments/", {"post": self.post.id})
+        self.get("/comments/", {"post": other_post.id})
+        Comment.objects.create(owner=self.other, post=self.post, content="c")
+
+        resp = self.get("/comments/", {"post": self.post.id})
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["count"], 1)
+        resp = self.get("/comments/", {"post": other_post.id})
+        self.assertEqual(resp["X-Cache"], "HIT")
+
+    def test_follow_invalidates_profiles_and_the_followers_feed(self):
+        profile_url = f"/profiles/{self.owner.profile.id}"
+        feed = {"owner__followed__owner__profile": self.other.profile.id}
+        owner_feed = {
+            "owner__followed__owner__profile": self.owner.profile.id}
+        for params in (feed, owner_feed):
+            self.get("/posts/", params)
+        self.get(profile_url)
+        Follower.objects.create(owner=self.other, followed=self.owner)
+        resp = self.get(profile_url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["followers_count"], 1)
+        resp = self.get("/posts/", feed)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.data["count"], 1)
+        self.assertEqual(self.get("/posts/", owner_feed)["X-Cache"], "HIT")
+
+    def test_unknown_filter_values_are_not_cached(self):
+        resp = self.get("/posts/", {"likes__owner__profile": ""})
+        self.assertNotIn("X-Cache", resp)
+
+    def test_profile_change_invalidates_author_fields(self):
+        self.get(f"/posts/{self.post.id}")
+        profile = self.owner.profile
+        profile.name = "Owner"
+        profile.save()
+        resp = self.get(f"/posts/{self.post.id}")
+        self.assertEqual(resp["X-Cache"], "MISS")
+
+    def test_stale_entry_is_served_while_another_worker_rebuilds(self):
+        stale = dict(settings.RESPONSE_CACHE, TIMEOUT=0)
+        with override_settings(RESPONSE_CACHE=stale):
+            self.get("/posts/")
+            # Another worker holds the rebuild lock.
+            with mock.patch.object(cache, "add", return_value=False):
+                with CaptureQueriesContext(connection) as ctx:
+                    resp = self.get("/posts/")
+        self.assertEqual(resp["X-Cache"], "STALE")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def file_based_cache(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        return override_settings(CACHES={"default": {
+            "BACKEND":
+                "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": location,
+        }})
+
+    def test_file_based_cache_locks_with_a_lock_file(self):
+        with self.file_based_cache():
+            file_cache = caches["default"]
+            self.assertTrue(acquire_rebuild_lock(file_cache, "key", 10))
+            self.assertFalse(acquire_rebuild_lock(file_cache, "key", 10))
+            file_cache.clear()
+            self.assertFalse(acquire_rebuild_lock(file_cache, "key", 10))
+            release_rebuild_lock(file_cache, "key")
+            self.assertTrue(acquire_rebuild_lock(file_cache, "key", 10))
+            # The holder died without releasing the lock.
+            os.utime(lock_file_path(file_cache, "key"), (0, 0))
+            self.assertTrue(acquire_rebuild_lock(file_cache, "key", 10))
+
+    def test_file_based_cache_serves_stale_entries_while_locked(self):
+        stale = dict(settings.RESPONSE_CACHE, TIMEOUT=0)
+        with self.file_based_cache(), override_settings(RESPONSE_CACHE=stale):
+            self.assertEqual(self.get("/posts/")["X-Cache"], "MISS")
+            with mock.patch(
+                "techstables_backend.cache.acquire_rebuild_lock",
+                return_value=False,
+            ):
+                resp = self.get("/posts/")
+            self.assertEqual(resp["X-Cache"], "STALE")
+            self.assertEqual(self.get("/posts/")["X-Cache"], "MISS")
+            locks = [
+                name for name in os.listdir(caches["default"]._dir)
+                if name.endswith(".lock")
+            ]
+            self.assertEqual(locks, [])
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, override_settings
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+
+
+class TrafficCaptureTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username="author", password="pass1234")
+        self.post = Post.objects.create(
+            owner=self.owner, title="Post", content="x")
+        self.path = os.path.join(tempfile.mkdtemp(), "traffic.jsonl")
+        capture = override_settings(TRAFFIC_CAPTURE={
+            **settings.TRAFFIC_CAPTURE, "PATH": self.path})
+        capture.enable()
+        self.addCleanup(capture.disable)
+
+    def records(self):
+        with open(self.path) as file:
+            return [json.loads(line) for line in file]
+
+    def test_records_sanitized_request_shapes(self):
+        self.client.get(f"/posts/{self.post.id}")
+        self.client.get("/posts/", {"q": "private words", "ordering": "-id"})
+        self.client.login(username="author", password="pass1234")
+        self.client.post("/likes/", {"post": self.post.id}, format="json")
+
+        detail, search, like = self.records()
+        self.assertEqual(detail["view"], "posts.views.PostDetail")
+        self.assertEqual(detail["route"], "posts/<int:pk>")
+        self.assertEqual(detail["kwargs"], {"pk": self.post.id})
+        self.assertFalse(detail["authenticated"])
+        self.assertEqual(detail["status"], 200)
+        self.assertGreater(detail["queries"], 0)
+        self.assertEqual(
+            search["query"], {"q": ["redacted"], "ordering": ["-id"]})
+        self.assertNotIn("private", json.dumps(search))
+        self.assertEqual(like["method"], "POST")
+        self.assertEqual(like["body"], {"post": self.post.id})
+        self.assertTrue(like["authenticated"])
+        self.assertEqual(like["status"], 201)
+
+    async def test_records_async_requests(self):
+        client = AsyncClient()
+        await client.alogin(username="author", password="pass1234")
+        await client.get(f"/posts/{self.post.id}")
+
+        detail, = self.records()
+        self.assertEqual(detail["view"], "posts.views.PostDetail")
+        self.assertTrue(detail["authenticated"])
+        self.assertEqual(detail["status"], 200)
+        self.assertGreater(detail["queries"], 0)
+
+    def test_skips_excluded_paths_and_unsampled_requests(self):
+        self.client.post(
+            "/dj-rest-auth/login/",
+            {"username": "author", "password": "pass1234"}, format="json")
+        with override_settings(TRAFFIC_CAPTURE={
+            **settings.TRAFFIC_CAPTURE, "PATH": self.path,
+            "SAMPLE_RATE": 0,
+        }):
+            self.client_class().get("/posts/")
+        self.assertFalse(os.path.exists(self.path))
+
+    @override_settings(TRAFFIC_CAPTURE={
+        "PATH": None, "SAMPLE_RATE": 1, "EXCLUDE": (), "KEEP_PARAMS": ()})
+    def test_is_off_without_a_path(self):
+        self.client.get("/posts/")
+        self.assertFalse(os.path.exists(self.path))
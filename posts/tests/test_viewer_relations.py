@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from posts.models import Post
+from likes.models import Like
+from followers.models import Follower
+from posts.serializers import PostSerializer
+from techstables_backend.loaders import ViewerRelationLoader
+
+
+class ViewerRelationLoaderTests(APITestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(
+            username="viewer", password="pass1234")
+        self.authors = [
+            User.objects.create_user(username=f"author{i}", password="pass")
+            for i in range(4)
+        ]
+        self.posts = [
+            Post.objects.create(owner=author, title=f"Post {i}", content="c")
+            for i, author in enumerate(self.authors)
+        ]
+        self.like = Like.objects.create(owner=self.viewer, post=self.posts[1])
+        self.follow = Follower.objects.create(
+            owner=self.viewer, followed=self.authors[2])
+        self.client.login(username="viewer", password="pass1234")
+
+    def relation_queries(self, url, table):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        queries = [
+            q for q in ctx.captured_queries
+            if f'FROM "{table}"' in q['sql']
+        ]
+        return resp, len(queries)
+
+    def test_post_list_like_ids_are_loaded_in_one_query(self):
+        resp, queries = self.relation_queries("/posts/", "likes_like")
+        like_ids = {item["id"]: item["like_id"] for item in resp.data["results"]}
+        self.assertEqual(like_ids[self.posts[1].id], self.like.id)
+        self.assertIsNone(like_ids[self.posts[0].id])
+        self.assertEqual(queries, 1)
+
+    def test_post_list_queries_do_not_grow_with_page_size(self):
+        _, before = self.relation_queries("/posts/", "likes_like")
+        for i in range(4):
+            Post.objects.create(
+                owner=self.authors[0], title=f"Extra {i}", content="c")
+        Like.objects.create(owner=self.viewer, post=self.posts[3])
+        _, after = self.relation_queries("/posts/", "likes_like")
+        self.assertEqual(before, 1)
+        self.assertEqual(after, 1)
+
+    @override_settings(MEMBERSHIP_SETS={
+        "MAX_USERS": 10, "MAX_IDLE": 900, "MAX_ENTRIES": 0,
+        "MAX_TOTAL_ENTRIES": 1000})
+    def test_list_primes_the_loader_once(self):
+        request = APIRequestFactory().get("/posts/")
+        request.user = self.viewer
+        with mock.patch.object(
+            ViewerRelationLoader, "prime", autospec=True,
+            side_effect=ViewerRelationLoader.prime,
+        ) as prime:
+            data = PostSerializer(
+                self.posts, many=True, context={"request": request}).data
+        self.assertEqual(prime.call_count, 1)
+        self.assertEqual(data[1]["like_id"], self.like.id)
+
+    def test_profile_list_following_ids_are_loaded_in_one_query(self):
+        resp, queries = self.relation_queries(
+            "/profiles/", "followers_follower")
+        following = {
+            item["owner"]: item["following_id"]
+            for item in resp.data["results"]
+        }
+        self.assertEqual(following["author2"], self.follow.id)
+        self.assertIsNone(following["author1"])
+        self.assertEqual(queries, 1)
+
+    def test_is_owner_compares_ids(self):
+        resp = self.client.get(f"/profiles/{self.viewer.profile.id}")
+        self.assertTrue(resp.data["is_owner"])
+        resp = self.client.get(f"/posts/{self.posts[0].id}")
+        self.assertFalse(resp.data["is_owner"])
@@ -3,5 +3,6 @@ from posts import views
 
 urlpatterns = [
     path('posts/', views.PostList.as_view()),
+    path('posts/search/', views.PostSearch.as_view()),
     path('posts/<int:pk>', views.PostDetail.as_view()),
 ]
@@ -1,12 +1,21 @@
-from django.db.models import Count
+from django.conf import settings
 from rest_framework import generics, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from techstables_backend.cache import AnonymousResponseCacheMixin
+from techstables_backend.conditional import (
+    ConditionalDetailMixin, ConditionalListMixin
+)
+from techstables_backend.pagination import KeysetPaginationMixin
 from techstables_backend.permissions import IsOwnerOrReadOnly
 from .models import Post
+from likes.counters import is_write_behind, like_counter_buffer
+from likes.models import Like
+from .search import get_search_backend
 from .serializers import PostSerializer
 
 
-class PostList(generics.ListCreateAPIView):
+class PostList(AnonymousResponseCacheMixin, ConditionalListMixin,
+               KeysetPaginationMixin, generics.ListCreateAPIView):
     '''
     API view for listing and creating Post instances.
 
@@ -15,36 +24,56 @@ class PostList(generics.ListCreateAPIView):
     Authenticated users can create new posts, while read-only access is
     granted to unauthenticated users.
 
+    Posts are paginated by page number by default. Infinite-scroll clients
+    can opt in to keyset pagination on (created_at, id) with
+    ?pagination=cursor and then follow the 'next' links; the ordering
+    parameter is ignored in that mode, and ?page_size asks for bigger
+    pages.
+
+    Responses to anonymous users are cached until a post, comment or
+    profile change invalidates them. Follows only invalidate the feeds
+    filtered by the follower's followed users, and likes the lists
+    filtered by the liker's likes or ordered by likes; other lists show
+    likes_count up to RESPONSE_CACHE['TIMEOUT'] seconds late. Every page
+    carries a weak ETag, so unchanged pages can be revalidated with
+    If-None-Match.
+
     Attributes:
         serializer_class (PostSerializer): The serializer class used for
             serializing Post instances.
         permission_classes (list): Permissions required to access the view.
         queryset (QuerySet): The base queryset for retrieving Post instances,
-            annotated with comments and likes counts.
+            joined to the owner and profile. Comments and likes counts are
+            read from the post's counter columns.
         filter_backends (list): The list of filter backends used for
             filtering, searching, and ordering.
         ordering_fields (list): Fields available for ordering the results.
         filterset_fields (list): Fields available for filtering the results.
         search_fields (list): Fields available for searching the results.
+        cache_namespaces (tuple): Cache namespaces the response depends on.
+        filter_cache_namespaces (dict): The namespace of each filter by
+            profile, formatted with the profile id.
+        list_validator_fields (tuple): Row fields hashed into the ETag.
+        viewer_relation (tuple): The viewer's likes, hashed into the ETag.
 
     Methods:
+        get_cache_namespaces: Adds the namespaces of the filters and
+            ordering of the request.
         perform_create: Saves a new Post instance with the current user as
             the owner.
     '''
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Post.objects.annotate(
-        comments_count=Count('comment', distinct=True),
-        likes_count=Count('likes', distinct=True)
-    ).order_by('-created_at')
+    queryset = Post.objects.select_related('owner__profile').order_by(
+        '-created_at', '-id')
     filter_backends = [
         filters.OrderingFilter,
         filters.SearchFilter,
         DjangoFilterBackend
     ]
     ordering_fields = [
-        'comments__count',
-        'likes__count',
+        'comments_count',
+        'likes_count',
         'likes__created_at'
     ]
     filterset_fields = [
@@ -56,18 +85,55 @@ class PostList(generics.ListCreateAPIView):
         'owner__username',
         'title'
     ]
+    cache_namespaces = ('posts', 'authors')
+    filter_cache_namespaces = {
+        'owner__followed__owner__profile': 'following:{}',
+        'likes__owner__profile': 'liked:{}',
+    }
+    list_validator_fields = ('id', 'updated_at', 'likes_count', 'comments_count')
+    viewer_relation = (Like, 'post', 'id')
+
+    def get_cache_namespaces(self):
+        namespaces = super().get_cache_namespaces()
+        params = self.request.query_params
+        for param, namespace in self.filter_cache_namespaces.items():
+            profile_id = params.get(param)
+            if profile_id is None:
+                continue
+            if not profile_id.isdigit():
+                return []
+            namespaces.append(namespace.format(int(profile_id)))
+        if 'likes' in params.get('ordering', ''):
+            namespaces.append('likes')
+        return namespaces
+
+    def get_list_validator_values(self, rows):
+        '''
+        Adds the likes_count changes still pending in this process's
+        write-behind buffer to the ETag values of the rows.
+        '''
+        return super().get_list_validator_values(rows) + [
+            [like_counter_buffer.pending(row.id) for row in rows]]
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class PostDetail(generics.RetrieveUpdateDestroyAPIView):
+class PostDetail(ConditionalDetailMixin, AnonymousResponseCacheMixin,
+                 generics.RetrieveUpdateDestroyAPIView):
     '''
     API view for retrieving, updating, or deleting a Post instance.
 
     This view allows users to retrieve, update, or delete a specific post
     instance. It uses the PostSerializer for serialization and enforces
     permissions such that only the owner of the post can modify or delete it.
+    Conditional GETs are answered with a 304 from the post's updated_at,
+    counters, including the likes not flushed from the write-behind
+    buffer, owner's username and profile image, and the viewer's like,
+    without serializing the post. If-Modified-Since is answered from the
+    latest of the post's updated_at and counters_updated_at and the
+    owner profile's updated_at, except in write-behind mode, where likes
+    reach counters_updated_at only when the buffer is flushed.
 
     Attributes:
         serializer_class (PostSerializer): The serializer class used
@@ -75,10 +141,64 @@ class PostDetail(generics.RetrieveUpdateDestroyAPIView):
         permission_classes (list): List containing the permission
             class IsOwnerOrReadOnly.
         queryset (QuerySet): The queryset used to retrieve Post instances.
+        cache_namespaces (tuple): Cache namespaces the response depends on.
+        validator_fields (tuple): Columns hashed into the ETag.
+        last_modified_fields (tuple): Columns sent as Last-Modified.
+        viewer_relation (tuple): The viewer's like, hashed into the ETag.
     '''
     serializer_class = PostSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Post.objects.annotate(
-        comments_count=Count('comment', distinct=True),
-        likes_count=Count('likes', distinct=True)
-    ).order_by('-created_at')
+    queryset = Post.objects.select_related('owner__profile').order_by(
+        '-created_at', '-id')
+    cache_namespaces = ('post:{pk}', 'authors')
+    validator_fields = (
+        'updated_at', 'likes_count', 'comments_count', 'owner__username',
+        'owner__profile__image'
+    )
+    last_modified_fields = (
+        'updated_at', 'counters_updated_at', 'owner__profile__updated_at'
+    )
+    viewer_relation = (Like, 'post', 'id')
+
+    def get_unstored_validator_values(self, row):
+        return [like_counter_buffer.pending(int(self.kwargs['pk']))]
+
+    def get_last_modified(self, row):
+        if is_write_behind():
+            return None
+        return super().get_last_modified(row)
+
+
+class PostSearch(generics.ListAPIView):
+    '''
+    API view for full-text search over post titles, contents and
+    owner usernames, ranked by relevance.
+
+    Matching posts are found through the search backend's index
+    (tsvector and trigram GIN indexes on PostgreSQL, an FTS5 table on
+    SQLite) rather than ILIKE scans. Only the ids of the best
+    SEARCH_MAX_RESULTS matches are kept, and only the posts on the
+    requested page are loaded.
+
+    Attributes:
+        serializer_class (PostSerializer): The serializer class used for
+            serializing Post instances.
+        permission_classes (list): Permissions required to access the view.
+        search_param (str): The query parameter holding the search terms.
+    '''
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    search_param = 'q'
+
+    def get_queryset(self):
+        return Post.objects.select_related('owner__profile')
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get(self.search_param, '').strip()
+        ids = get_search_backend().search(
+            query, settings.SEARCH_MAX_RESULTS) if query else []
+        page_ids = self.paginate_queryset(ids)
+        posts = self.get_queryset().in_bulk(page_ids)
+        page = [posts[post_id] for post_id in page_ids if post_id in posts]
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Now
+from profiles.models import Profile
+from posts.models import Post
+from followers.models import Follower
+
+
+def count_for_owner(model, field):
+    '''
+    Returns a subquery expression counting the rows of model whose
+    field points at the outer profile's owner.
+    '''
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('owner_id')})
+        .order_by().values(field)
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    '''
+    Repairs the denormalized posts_count, followers_count and
+    following_count columns of profiles whose counters drifted from
+    the Post and Follower tables.
+
+    The counters are normally maintained by the Post and Follower
+    signal receivers; drift comes from bulk imports, raw SQL changes
+    or writes that bypass signals. Only the drifted rows are updated.
+    '''
+    help = 'Repairs drifted Profile post and follow counters.'
+
+    def handle(self, *args, **options):
+        counts = {
+            'posts_count': count_for_owner(Post, 'owner'),
+            'followers_count': count_for_owner(Follower, 'followed'),
+            'following_count': count_for_owner(Follower, 'owner'),
+        }
+        drift = Q()
+        for field in counts:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+        with transaction.atomic():
+            drifted = list(
+                Profile.objects.annotate(**{
+                    f'actual_{field}': expression
+                    for field, expression in counts.items()
+                }).filter(drift).values_list('pk', flat=True)
+            )
+            Profile.objects.filter(pk__in=drifted).update(
+                counters_updated_at=Now(), **counts)
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired counters for {len(drifted)} profiles.'))
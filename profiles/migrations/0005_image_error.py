@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0004_profile_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='image_error',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
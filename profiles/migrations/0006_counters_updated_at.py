@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0005_image_error'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='counters_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
+from django.utils import timezone
+from techstables_backend.cache import invalidate
+from techstables_backend.membership import forget_user
 
 
 class Profile(models.Model):
@@ -28,6 +33,33 @@ class Profile(models.Model):
             Profile image, stored in the 'images/' directory,
             with a default image.
 
+        image_upload (CharField):
+            Name of a new image in the staging storage while it is
+            being processed in the background, empty otherwise.
+
+        image_variants (JSONField):
+            Storage names of the resized variants of the image.
+
+        image_error (CharField):
+            Why the last new image could not be processed, empty
+            otherwise.
+
+        posts_count (IntegerField):
+            Number of posts by the owner, maintained by the Post
+            signal receivers.
+
+        followers_count (IntegerField):
+            Number of users following the owner, maintained by the
+            Follower signal receivers.
+
+        following_count (IntegerField):
+            Number of users the owner follows, maintained by the
+            Follower signal receivers.
+
+        counters_updated_at (DateTimeField):
+            Timestamp of the last change of the counters, which are
+            updated without saving the profile.
+
     Methods:
         __str__():
             Returns a string representation of the profile,
@@ -36,6 +68,9 @@ class Profile(models.Model):
     Meta:
         ordering:
             Orders profiles by creation date in descending order.
+
+        indexes:
+            Back the ordering of profiles by their counters.
     """
     owner = models.OneToOneField(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -44,14 +79,44 @@ class Profile(models.Model):
     image = models.ImageField(
         upload_to='images/',
         default='../default_profile_xdfle7')
+    image_upload = models.CharField(
+        max_length=255, blank=True, default='', editable=False)
+    image_variants = models.JSONField(
+        default=dict, blank=True, editable=False)
+    image_error = models.CharField(
+        max_length=255, blank=True, default='', editable=False)
+    posts_count = models.IntegerField(default=0, editable=False)
+    followers_count = models.IntegerField(default=0, editable=False)
+    following_count = models.IntegerField(default=0, editable=False)
+    counters_updated_at = models.DateTimeField(
+        default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['posts_count'], name='profiles_posts_count_idx'),
+            models.Index(
+                fields=['followers_count'],
+                name='profiles_followers_count_idx'),
+            models.Index(
+                fields=['following_count'],
+                name='profiles_following_count_idx'),
+        ]
 
     def __str__(self):
         return f"{self.owner}'s profile"
 
 
+def new_profile(owner_id):
+    """
+    Returns the unsaved Profile a new user starts with. create_profile
+    saves it, and the seed_dataset command bulk-inserts it, so seeded
+    profiles match the ones made at sign-up.
+    """
+    return Profile(owner_id=owner_id)
+
+
 def create_profile(sender, instance, created, **kwargs):
     """
     Signal receiver function that creates a Profile instance
@@ -64,7 +129,89 @@ def create_profile(sender, instance, created, **kwargs):
         **kwargs: Additional keyword arguments.
     """
     if created:
-        Profile.objects.create(owner=instance)
+        new_profile(instance.id).save(force_insert=True)
+
+
+def reset_memberships(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that drops any membership sets cached for the id of
+    a new user, so the user starts with no likes or follows even if the
+    id was used before.
+    """
+    if created and not raw:
+        forget_user(instance.id)
+
+
+def update_profile_counter(user_id, field, delta):
+    """
+    Adjusts one of the denormalized counters of a user's profile with a
+    single UPDATE ... SET field = field + delta.
+
+    Args:
+        user_id (int): The id of the profile owner.
+        field (str): The counter column, 'posts_count', 'followers_count'
+            or 'following_count'.
+        delta (int): The amount to add to the counter.
+    """
+    Profile.objects.filter(owner_id=user_id).update(
+        counters_updated_at=Now(), **{field: F(field) + delta})
+
+
+def profile_namespaces(namespace, *user_ids):
+    """
+    Returns the given cache namespace formatted with the profile id of
+    each of the given users, e.g. 'following:{}'.
+
+    Args:
+        namespace (str): The namespace, with a '{}' for the profile id.
+        *user_ids (int): The ids of the profile owners.
+    """
+    profile_ids = Profile.objects.filter(
+        owner_id__in=user_ids).values_list('pk', flat=True)
+    return [namespace.format(pk) for pk in profile_ids]
+
+
+def invalidate_profiles(*user_ids):
+    """
+    Invalidates the cached profile list and the cached detail
+    responses of the given users' profiles.
+
+    Args:
+        *user_ids (int): The ids of the profile owners.
+    """
+    profile_ids = Profile.objects.filter(
+        owner_id__in=user_ids).values_list('pk', flat=True)
+    invalidate('profiles', *(f'profile:{pk}' for pk in profile_ids))
+
+
+def invalidate_profile_responses(sender, instance, **kwargs):
+    """
+    Signal receiver that invalidates the cached responses showing a
+    saved or deleted profile, including the owner's avatar on posts
+    and comments.
+    """
+    invalidate('profiles', f'profile:{instance.id}', 'authors')
+
+
+def invalidate_user_responses(sender, instance, created, raw=False,
+                              update_fields=None, **kwargs):
+    """
+    Signal receiver that invalidates the cached responses showing a
+    username when it may have changed, and moves the profile's
+    updated_at, which the Last-Modified of the user's profile, posts and
+    comments follows. Logins, which only save last_login, are ignored.
+    """
+    if created or raw:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    Profile.objects.filter(owner=instance).update(updated_at=Now())
+    invalidate('authors')
+    invalidate_profiles(instance.id)
 
 
 post_save.connect(create_profile, sender=User)
+post_save.connect(reset_memberships, sender=User)
+post_save.connect(invalidate_user_responses, sender=User)
+post_save.connect(invalidate_profile_responses, sender=Profile)
+post_delete.connect(invalidate_profile_responses, sender=Profile)
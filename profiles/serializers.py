@@ -1,14 +1,21 @@
 from rest_framework import serializers
+from techstables_backend.images import (
+    BackgroundImageMixin, HeaderOnlyImageField, variant_urls
+)
+from techstables_backend.loaders import ViewerRelationMixin
+from techstables_backend.metrics import TimedSerializerMixin
 from .models import Profile
 from followers.models import Follower
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(TimedSerializerMixin, BackgroundImageMixin,
+                        ViewerRelationMixin, serializers.ModelSerializer):
     '''
     Serializer for the Profile model, converting profile instances into
     JSON format. It includes fields for the profile's owner, timestamps,
     name, image, and additional computed fields to determine ownership
-    and following status.
+    and following status. New images are uploaded in the background
+    together with their avatar-size JPEG and WebP variants.
 
     Attributes:
         owner (ReadOnlyField): The username of the profile's owner.
@@ -19,12 +26,17 @@ class ProfileSerializer(serializers.ModelSerializer):
         posts_count (ReadOnlyField): The number of posts created by user.
         followers_count (ReadOnlyField): The number of followers a user has.
         following_count (ReadOnlyField): The number of users followed by user.
+        image (HeaderOnlyImageField): The profile image.
+        image_variants (SerializerMethodField): The URLs of the resized
+            variants of the image, once they are ready.
+        image_variant_names (tuple): The variants generated for new images.
 
     Methods:
         get_is_owner(obj): Checks if the requesting user is the owner
             of the profile instance.
         get_following_id(obj): Retrieves the ID of the follower
             relationship if it exists.
+        get_image_variants(obj): Returns the URLs of the image variants.
 
     Meta:
         model (Profile): The model class to serialize.
@@ -36,6 +48,9 @@ class ProfileSerializer(serializers.ModelSerializer):
     posts_count = serializers.ReadOnlyField()
     followers_count = serializers.ReadOnlyField()
     following_count = serializers.ReadOnlyField()
+    image = HeaderOnlyImageField(required=False)
+    image_variants = serializers.SerializerMethodField()
+    image_variant_names = ('avatar',)
 
     def get_is_owner(self, obj):
         '''
@@ -50,12 +65,13 @@ class ProfileSerializer(serializers.ModelSerializer):
             otherwise False.
         '''
         request = self.context['request']
-        return obj.owner == request.user
+        return obj.owner_id == request.user.id
 
     def get_following_id(self, obj):
         '''
         Retrieves the ID of the follower relationship between the authenticated
         user and the owner of the profile instance being serialized.
+        The follows for every profile on the page are loaded in one query.
 
         Parameters:
             obj: The profile instance being serialized.
@@ -64,13 +80,15 @@ class ProfileSerializer(serializers.ModelSerializer):
             int or None: The ID of the follower relationship if it exists,
             otherwise None.
         '''
-        user = self.context['request'].user
-        if user.is_authenticated:
-            following = Follower.objects.filter(
-                owner=user, followed=obj.owner
-            ).first()
-            return following.id if following else None
-        return None
+        return self.get_viewer_relation_id(
+            obj, Follower, 'followed', 'owner_id')
+
+    def get_image_variants(self, obj):
+        '''
+        Returns the URLs of the resized variants of the profile image,
+        keyed by variant name, or None until they have been generated.
+        '''
+        return variant_urls(obj)
 
     class Meta:
         '''
@@ -81,11 +99,13 @@ class ProfileSerializer(serializers.ModelSerializer):
             model (Profile): The model class to serialize.
             fields (list): The fields to include in the serialized output,
             including the profile's ID, owner, timestamps, name, image,
-            and additional computed fields for ownership and following status.
+            image_error, and additional computed fields for ownership and
+            following status.
         '''
         model = Profile
         fields = [
             'id', 'owner', 'created_at', 'updated_at',
-            'name', 'image', 'is_owner', 'following_id',
-            'posts_count', 'followers_count', 'following_count'
+            'name', 'image', 'image_variants', 'image_error', 'is_owner',
+            'following_id', 'posts_count', 'followers_count',
+            'following_count'
         ]
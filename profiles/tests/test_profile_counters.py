@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from followers.models import Follower
+from profiles.models import Profile
+
+
+class ProfileCounterTests(APITestCase):
+    def setUp(self):
+        self.ann = User.objects.create_user(username="ann", password="pass1234")
+        self.bob = User.objects.create_user(username="bob", password="pass1234")
+        self.cat = User.objects.create_user(username="cat", password="pass1234")
+
+    def counts(self, user):
+        profile = Profile.objects.get(owner=user)
+        return (
+            profile.posts_count, profile.followers_count,
+            profile.following_count,
+        )
+
+    def test_counters_follow_posts_and_follows(self):
+        post = Post.objects.create(owner=self.ann, title="A", content="c")
+        Post.objects.create(owner=self.ann, title="B", content="c")
+        Follower.objects.create(owner=self.bob, followed=self.ann)
+        follow = Follower.objects.create(owner=self.cat, followed=self.ann)
+        Follower.objects.create(owner=self.ann, followed=self.bob)
+        self.assertEqual(self.counts(self.ann), (2, 2, 1))
+        self.assertEqual(self.counts(self.bob), (0, 1, 1))
+
+        post.delete()
+        follow.delete()
+        self.assertEqual(self.counts(self.ann), (1, 1, 1))
+        self.assertEqual(self.counts(self.cat), (0, 0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        Post.objects.create(owner=self.ann, title="A", content="c")
+        Follower.objects.create(owner=self.bob, followed=self.ann)
+        Profile.objects.filter(owner=self.ann).update(
+            posts_count=7, followers_count=0)
+
+        out = StringIO()
+        call_command("reconcile_profile_counters", stdout=out)
+
+        self.assertEqual(self.counts(self.ann), (1, 1, 0))
+        self.assertEqual(self.counts(self.bob), (0, 0, 1))
+        self.assertIn("1 profiles", out.getvalue())
+
+    def test_list_reads_counters_without_aggregating(self):
+        Follower.objects.create(owner=self.bob, followed=self.cat)
+        Follower.objects.create(owner=self.ann, followed=self.cat)
+        Follower.objects.create(owner=self.ann, followed=self.bob)
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/profiles/?ordering=-followers_count")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        owners = [item["owner"] for item in resp.data["results"]]
+        self.assertEqual(owners, ["cat", "bob", "ann"])
+        self.assertEqual(resp.data["results"][0]["followers_count"], 2)
+        for query in ctx.captured_queries:
+            self.assertNotIn("GROUP BY", query["sql"])
+            self.assertNotIn("followers_follower", query["sql"])
+
+    def test_following_count_ordering(self):
+        Follower.objects.create(owner=self.bob, followed=self.cat)
+        Follower.objects.create(owner=self.bob, followed=self.ann)
+        resp = self.client.get("/profiles/?ordering=-following_count")
+        self.assertEqual(resp.data["results"][0]["owner"], "bob")
@@ -1,31 +1,37 @@
-from django.db.models import Count
 from rest_framework import generics, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from techstables_backend.cache import AnonymousResponseCacheMixin
+from techstables_backend.conditional import (
+    ConditionalDetailMixin, ConditionalListMixin
+)
 from techstables_backend.permissions import IsOwnerOrReadOnly
 from .models import Profile
 from .serializers import ProfileSerializer
+from followers.models import Follower
 
 
-class ProfileList(generics.ListAPIView):
+class ProfileList(AnonymousResponseCacheMixin, ConditionalListMixin,
+                  generics.ListAPIView):
     '''
-    API view for listing profiles with annotated counts for posts, followers,
+    API view for listing profiles with their counts of posts, followers,
     and following. Supports ordering and filtering based on specified fields.
+    Every page carries a weak ETag for revalidation with If-None-Match.
 
     Attributes:
-        queryset (QuerySet): Annotated queryset of profiles
-            ordered by creation date.
+        queryset (QuerySet): Queryset of profiles ordered by creation date.
+            The counts are read from the profile's indexed counter
+            columns.
         serializer_class (ProfileSerializer):
             Serializer class for profile data.
         filter_backends (list): List of filter backends for ordering
             and filtering.
         filterset_fields (list): Fields available for filtering profiles.
         ordering_fields (list): Fields available for ordering profiles.
+        cache_namespaces (tuple): Cache namespaces the response depends on.
+        list_validator_fields (tuple): Row fields hashed into the ETag.
+        viewer_relation (tuple): The viewer's follows, hashed into the ETag.
     '''
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    queryset = Profile.objects.select_related('owner').order_by('-created_at')
     serializer_class = ProfileSerializer
     filter_backends = [
         filters.OrderingFilter,
@@ -38,13 +44,20 @@ class ProfileList(generics.ListAPIView):
     ordering_fields = [
         'posts_count',
         'followers_count',
-        'followed_count',
+        'following_count',
         'owner__following__created_at',
         'owner__followed__created_at'
     ]
+    cache_namespaces = ('profiles',)
+    list_validator_fields = (
+        'id', 'updated_at', 'posts_count', 'followers_count',
+        'following_count'
+    )
+    viewer_relation = (Follower, 'followed', 'owner_id')
 
 
-class ProfileDetail(generics.RetrieveUpdateAPIView):
+class ProfileDetail(ConditionalDetailMixin, AnonymousResponseCacheMixin,
+                    generics.RetrieveUpdateAPIView):
     '''
     API view for retrieving and updating a Profile instance.
 
@@ -52,6 +65,11 @@ class ProfileDetail(generics.RetrieveUpdateAPIView):
     information. It uses the ProfileSerializer to serialize profile
     data and applies the IsOwnerOrReadOnly permission to ensure that
     only the profile owner can update the profile.
+    Conditional GETs are answered with a 304 from the profile's
+    updated_at, counts, owner's username and the viewer's follow,
+    without serializing it, and If-Modified-Since from the latest of
+    its updated_at and counters_updated_at. A username change moves the
+    profile's updated_at.
 
     Attributes:
         queryset (QuerySet): A queryset of all Profile instances.
@@ -59,11 +77,18 @@ class ProfileDetail(generics.RetrieveUpdateAPIView):
             serializing profile data.
         permission_classes (list): A list of permission classes
             applied to the view.
+        cache_namespaces (tuple): Cache namespaces the response depends on.
+        validator_fields (tuple): Columns hashed into the ETag.
+        last_modified_fields (tuple): Columns sent as Last-Modified.
+        viewer_relation (tuple): The viewer's follows, hashed into the ETag.
     '''
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    queryset = Profile.objects.select_related('owner').order_by('-created_at')
     serializer_class = ProfileSerializer
     permission_classes = [IsOwnerOrReadOnly]
+    cache_namespaces = ('profile:{pk}',)
+    validator_fields = (
+        'updated_at', 'posts_count', 'followers_count', 'following_count',
+        'owner__username'
+    )
+    last_modified_fields = ('updated_at', 'counters_updated_at')
+    viewer_relation = (Follower, 'followed', 'owner_id')
@@ -0,0 +1,293 @@
+import hashlib
+import os
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+from rest_framework.response import Response
+from .db_router import reads_replica
+
+
+# Backends whose add() is atomic across the processes sharing the cache,
+# so only one of them wins the rebuild lock.
+ATOMIC_ADD_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django.core.cache.backends.redis.RedisCache',
+)
+
+
+def get_response_cache():
+    '''
+    Returns the cache backend holding cached responses.
+    '''
+    return caches[settings.RESPONSE_CACHE['ALIAS']]
+
+
+def has_atomic_add(cache):
+    '''
+    Returns True if the cache backend's add() is atomic, which the
+    rebuild lock of AnonymousResponseCacheMixin relies on.
+    FileBasedCache's add() checks and writes the file in two steps, so
+    several workers could take the lock together.
+    '''
+    backend = type(cache)
+    path = f'{backend.__module__}.{backend.__qualname__}'
+    return path in ATOMIC_ADD_BACKENDS
+
+
+def supports_rebuild_lock(cache):
+    '''
+    Returns True if acquire_rebuild_lock() works on the cache backend.
+    '''
+    return has_atomic_add(cache) or isinstance(cache, FileBasedCache)
+
+
+def lock_file_path(cache, lock_key):
+    '''
+    Returns the path of the lock file of a FileBasedCache. The suffix
+    differs from the cache entries', so culling and clear() leave the
+    lock files alone.
+    '''
+    return f'{cache._key_to_file(lock_key)}.lock'
+
+
+def acquire_rebuild_lock(cache, lock_key, timeout):
+    '''
+    Takes a lock held for at most timeout seconds and returns True if
+    this worker got it.
+
+    Backends with an atomic add() hold the lock in the cache.
+    FileBasedCache holds it in a file created with O_CREAT | O_EXCL,
+    which the filesystem lets only one process create. A lock file older
+    than timeout was left by a worker that died while rebuilding, and is
+    replaced.
+    '''
+    if not isinstance(cache, FileBasedCache):
+        return cache.add(lock_key, 1, timeout=timeout)
+    cache._createdir()
+    path = lock_file_path(cache, lock_key)
+    for _ in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            pass
+        try:
+            if os.path.getmtime(path) > time.time() - timeout:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return False
+
+
+def release_rebuild_lock(cache, lock_key):
+    '''
+    Releases a lock taken by acquire_rebuild_lock().
+    '''
+    if not isinstance(cache, FileBasedCache):
+        cache.delete(lock_key)
+        return
+    try:
+        os.remove(lock_file_path(cache, lock_key))
+    except FileNotFoundError:
+        pass
+
+
+def namespace_key(namespace):
+    return f'response-cache:ns:{namespace}'
+
+
+def new_version():
+    '''
+    Returns a new namespace version token, prefixed with the time it
+    was created.
+    '''
+    return f'{time.time():.3f}:{uuid.uuid4().hex}'
+
+
+def is_settled(versions):
+    '''
+    Returns False if the current request reads from a replica and one of
+    the namespace versions is recent enough for the replica not to hold
+    the change yet, i.e. younger than DATABASE_REPLICAS['MAX_LAG_SECONDS'].
+    '''
+    if not reads_replica():
+        return True
+    window = settings.DATABASE_REPLICAS['MAX_LAG_SECONDS']
+    now = time.time()
+    for version in versions:
+        created, _, _ = version.rpartition(':')
+        try:
+            if now - float(created) < window:
+                return False
+        except ValueError:
+            continue
+    return True
+
+
+def get_namespace_versions(namespaces):
+    '''
+    Returns the current version token of each namespace, creating the
+    tokens that are missing or were evicted.
+    '''
+    cache = get_response_cache()
+    keys = [namespace_key(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    '''
+    Invalidates every cached response depending on the given namespaces
+    by replacing their version tokens.
+
+    The tokens are replaced immediately and again once the current
+    transaction commits, so a response rebuilt from data read before the
+    commit cannot outlive it.
+    '''
+    def bump():
+        get_response_cache().set_many({
+            namespace_key(namespace): new_version()
+            for namespace in namespaces
+        }, timeout=None)
+    bump()
+    transaction.on_commit(bump)
+
+
+class AnonymousResponseCacheMixin:
+    '''
+    View mixin caching the GET responses served to anonymous users, who
+    all receive identical output.
+
+    Entries are keyed on the host, path and normalized query string, plus
+    the version tokens of the namespaces the response depends on. The
+    model signal receivers call invalidate() with the namespaces a write
+    affects, which makes every dependent entry unreachable at once.
+
+    After RESPONSE_CACHE['TIMEOUT'] seconds an entry becomes stale. The
+    first worker to see it takes a short-lived lock and rebuilds it while
+    the others keep serving the stale copy for up to STALE_TIMEOUT more
+    seconds. On a cold miss, workers that lose the race for the lock wait
+    up to WAIT seconds for the winner's result instead of all hitting the
+    database together.
+
+    The lock is held in the cache on backends with an atomic add(),
+    listed in ATOMIC_ADD_BACKENDS, and in a lock file on FileBasedCache.
+    On other backends every worker missing the entry rebuilds it without
+    locking or waiting.
+
+    Responses read from a replica are not stored while one of their
+    namespaces changed less than DATABASE_REPLICAS['MAX_LAG_SECONDS']
+    ago, since the replica may not hold the change yet.
+
+    Attributes:
+        cache_namespaces (tuple): Namespaces the response depends on.
+            They are formatted with the view's URL kwargs, so
+            'post:{pk}' names the namespace of a single post.
+    '''
+    cache_namespaces = ()
+
+    def get_cache_namespaces(self):
+        '''
+        Returns the namespaces of the current request, or an empty list if
+        the response must not be cached.
+        '''
+        return [
+            namespace.format(**self.kwargs)
+            for namespace in self.cache_namespaces
+        ]
+
+    def get_cache_key(self, request, versions):
+        query = urlencode(sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        ), doseq=True)
+        raw = '|'.join(
+            [request.get_host(), request.path, query] + versions)
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f'response-cache:{digest}'
+
+    def get(self, request, *args, **kwargs):
+        namespaces = (
+            None if request.user.is_authenticated
+            else self.get_cache_namespaces()
+        )
+        if not namespaces:
+            return super().get(request, *args, **kwargs)
+
+        config = settings.RESPONSE_CACHE
+        cache = get_response_cache()
+        versions = get_namespace_versions(namespaces)
+        key = self.get_cache_key(request, versions)
+        entry = cache.get(key)
+        if entry is not None and entry['fresh_until'] > time.time():
+            return self.cached_response(entry, 'HIT')
+
+        if not supports_rebuild_lock(cache):
+            return self.rebuild(key, versions, *args, **kwargs)
+        lock_key = f'{key}:lock'
+        if acquire_rebuild_lock(cache, lock_key, config['LOCK_TIMEOUT']):
+            try:
+                return self.rebuild(key, versions, *args, **kwargs)
+            finally:
+                release_rebuild_lock(cache, lock_key)
+
+        if entry is not None:
+            return self.cached_response(entry, 'STALE')
+        deadline = time.time() + config['WAIT']
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return self.cached_response(entry, 'HIT')
+        return super().get(request, *args, **kwargs)
+
+    def rebuild(self, key, versions, *args, **kwargs):
+        '''
+        Runs the view and stores its successful response under key.
+        '''
+        config = settings.RESPONSE_CACHE
+        response = super().get(self.request, *args, **kwargs)
+        if response.status_code == 200 and is_settled(versions):
+            get_response_cache().set(key, {
+                'data': response.data,
+                'etag': response.get('ETag'),
+                'last_modified': response.get('Last-Modified'),
+                'fresh_until': time.time() + config['TIMEOUT'],
+            }, timeout=config['TIMEOUT'] + config['STALE_TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def cached_response(self, entry, status):
+        '''
+        Builds the response for a cache hit, answering a matching
+        If-None-Match or If-Modified-Since with a 304.
+        '''
+        etag = entry['etag']
+        last_modified = entry.get('last_modified')
+        response = None
+        if etag:
+            response = get_conditional_response(
+                self.request, etag=etag,
+                last_modified=parse_http_date_safe(last_modified))
+        if response is None:
+            response = Response(entry['data'])
+        if etag:
+            response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = last_modified
+        response['X-Cache'] = status
+        return response
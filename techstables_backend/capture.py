@@ -0,0 +1,173 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .metrics import current_metrics, get_view_name
+
+NUMBER = re.compile(r'^-?\d+(,-?\d+)*$')
+REDACTED = 'redacted'
+
+
+def sanitize(params, keep):
+    '''
+    Returns the parameters as a {name: [values]} dict, with the values
+    replaced by 'redacted' unless they are numbers, lists of numbers or
+    the parameter is listed in keep. Search terms and other free text
+    are never recorded.
+    '''
+    return {
+        name: [
+            value if name in keep or NUMBER.match(value) else REDACTED
+            for value in values
+        ]
+        for name, values in params.lists()
+    }
+
+
+def sanitize_body(request, keep):
+    '''
+    Returns the sanitized fields of a JSON or form request body, or None
+    if the request has no body that can be parsed.
+    '''
+    content_type = request.content_type or ''
+    if content_type.startswith('application/json'):
+        try:
+            data = json.loads(request.body or b'null')
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        return {
+            name: value if name in keep or isinstance(value, (int, float))
+            and not isinstance(value, bool) else REDACTED
+            for name, value in data.items()
+        }
+    if content_type in (
+        'application/x-www-form-urlencoded', 'multipart/form-data'
+    ):
+        return {
+            name: values[0]
+            for name, values in sanitize(request.POST, keep).items()
+        }
+    return None
+
+
+class TrafficLog:
+    '''
+    Append-only JSONL file of captured requests.
+
+    Each record is written with a single write() on a file opened with
+    O_APPEND, so the lines of several worker processes sharing the file
+    do not interleave.
+
+    Attributes:
+        path (str): The path of the log file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fd = None
+
+    def write(self, record):
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        with self.lock:
+            if self.fd is None:
+                self.fd = os.open(
+                    self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            os.write(self.fd, line)
+
+
+class TrafficCaptureMiddleware:
+    '''
+    Middleware recording the shape of a sample of the requests to an
+    append-only JSONL log, for replay with the replay_traffic command.
+
+    It is enabled by setting TRAFFIC_CAPTURE['PATH'] and records
+    TRAFFIC_CAPTURE['SAMPLE_RATE'] of the requests to the views in
+    techstables_backend/urls.py, except the paths starting with one of
+    TRAFFIC_CAPTURE['EXCLUDE'].
+
+    A record holds the time, method, view, URL pattern and its
+    arguments, the sanitized query parameters and body fields, whether
+    the user was authenticated, the status, the duration and the number
+    of queries. No user ids, cookies, headers or free text are recorded.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        options = settings.TRAFFIC_CAPTURE
+        if not options['PATH']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.log = TrafficLog(options['PATH'])
+        self.sample_rate = options['SAMPLE_RATE']
+        self.exclude = tuple(
+            f'/{prefix.lstrip("/")}' for prefix in options['EXCLUDE'])
+        self.keep = frozenset(options['KEEP_PARAMS'])
+
+    def is_captured(self, request):
+        return not request.path.startswith(self.exclude) and (
+            random.random() < self.sample_rate)
+
+    def get_body(self, request):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        return sanitize_body(request, self.keep)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_captured(request):
+            return self.get_response(request)
+        body = self.get_body(request)
+        started = time.time()
+        timer = time.perf_counter()
+        response = self.get_response(request)
+        self.record(
+            request, response, body, started, time.perf_counter() - timer)
+        return response
+
+    async def __acall__(self, request):
+        if not self.is_captured(request):
+            return await self.get_response(request)
+        body = self.get_body(request)
+        started = time.time()
+        timer = time.perf_counter()
+        response = await self.get_response(request)
+        # Resolving a lazy request.user may query the database.
+        await sync_to_async(self.record)(
+            request, response, body, started, time.perf_counter() - timer)
+        return response
+
+    def record(self, request, response, body, started, duration):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return
+        metrics = current_metrics.get()
+        user = getattr(request, 'user', None)
+        self.log.write({
+            'ts': round(started, 3),
+            'method': request.method,
+            'view': get_view_name(request),
+            'route': match.route,
+            'kwargs': match.kwargs,
+            'query': sanitize(request.GET, self.keep),
+            'body': body,
+            'authenticated': bool(user and user.is_authenticated),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'queries': metrics.queries if metrics else None,
+        })
@@ -0,0 +1,231 @@
+import hashlib
+
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from .loaders import get_viewer_relation_loader
+from .membership import MembershipLoader
+
+
+def make_etag(values, weak=False):
+    '''
+    Returns a quoted ETag hashed from the given values.
+    '''
+    digest = hashlib.sha1(repr(values).encode()).hexdigest()
+    etag = quote_etag(digest)
+    return f'W/{etag}' if weak else etag
+
+
+def set_validators(response, etag, last_modified=None):
+    '''
+    Sets the ETag and, if given, Last-Modified headers on a 200 or
+    304 response.
+
+    Args:
+        response (HttpResponse): The response to update.
+        etag (str): The quoted ETag.
+        last_modified (int): The last modification time as a timestamp.
+    '''
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalDetailMixin:
+    '''
+    View mixin answering conditional GETs on detail endpoints.
+
+    The validators come from a lightweight query that reads only the
+    validator columns of the requested row: updated_at plus the counters
+    and owner columns shown in the response, and anything viewer
+    specific. If the client's If-None-Match matches, a 304 is returned
+    without running the view's queryset or serializer.
+
+    Last-Modified is the latest of the last_modified_fields timestamps,
+    read by the same query, and If-Modified-Since is answered from it
+    when the request has no If-None-Match. No Last-Modified is sent
+    without last_modified_fields.
+
+    Attributes:
+        validator_fields (tuple): The columns hashed into the ETag.
+        last_modified_fields (tuple): Timestamp columns whose latest
+            value is sent as Last-Modified. Together they must change
+            whenever any of the validator fields does, e.g. the row's
+            updated_at, the time its counters last changed and the
+            owner profile's updated_at.
+        viewer_relation (tuple): Optional (model, target_field, key_attr)
+            of the viewer relation shown in the response, as passed to
+            ViewerRelationMixin.get_viewer_relation_id. Its id is
+            hashed into the ETag too, read from the viewer's cached
+            membership set if there is one and with a subquery
+            otherwise.
+    '''
+    validator_fields = ('updated_at',)
+    last_modified_fields = ()
+    viewer_relation = None
+
+    def get_unstored_validator_values(self, row):
+        '''
+        Returns the values shown in the response that are not stored in
+        the row as they are shown, e.g. buffered counter changes or
+        humanized timestamps, hashed into the ETag together with the
+        validator fields.
+
+        Args:
+            row (dict): The validator fields of the requested object.
+        '''
+        return []
+
+    def get_last_modified(self, row):
+        '''
+        Returns the Last-Modified timestamp of the requested object, the
+        latest of its last_modified_fields, or None if there are none.
+
+        Args:
+            row (dict): The validator fields of the requested object.
+        '''
+        if not self.last_modified_fields:
+            return None
+        return int(max(
+            row[field] for field in self.last_modified_fields
+        ).timestamp())
+
+    def get_membership_loader(self):
+        '''
+        Returns the request's MembershipLoader for viewer_relation, or
+        None if the viewer's relations are not cached in memory.
+        '''
+        if self.viewer_relation is None:
+            return None
+        relation, target_field, key_attr = self.viewer_relation
+        loader = get_viewer_relation_loader(
+            self.request, relation, target_field)
+        return loader if isinstance(loader, MembershipLoader) else None
+
+    def get_validator_queryset(self):
+        '''
+        Returns a queryset holding only the requested row, which the
+        validator fields and annotations are read from.
+        '''
+        model = self.get_queryset().model
+        queryset = model._default_manager.filter(pk=self.kwargs['pk'])
+        user = self.request.user
+        if (
+            self.viewer_relation is not None and user.is_authenticated
+            and self.get_membership_loader() is None
+        ):
+            relation, target_field, key_attr = self.viewer_relation
+            queryset = queryset.annotate(viewer_relation_id=Subquery(
+                relation.objects.filter(
+                    owner=user,
+                    **{f'{target_field}_id': OuterRef(key_attr)}
+                ).values('id')[:1]
+            ))
+        return queryset
+
+    def get_validators(self):
+        '''
+        Returns the (etag, last_modified) pair of the requested object,
+        or None if it does not exist. last_modified is None if no
+        Last-Modified is sent.
+        '''
+        queryset = self.get_validator_queryset()
+        fields = list(self.validator_fields) + list(queryset.query.annotations)
+        fields += [
+            field for field in self.last_modified_fields
+            if field not in fields
+        ]
+        membership = self.get_membership_loader()
+        if membership is not None:
+            key_attr = self.viewer_relation[2]
+            row = queryset.values(*fields, key_attr).first()
+        else:
+            row = queryset.values(*fields).first()
+        if row is None:
+            return None
+        user_id = self.request.user.id
+        values = [user_id] + [row[field] for field in fields]
+        values += self.get_unstored_validator_values(row)
+        if membership is not None:
+            values.append(membership.load(row[key_attr]))
+        return make_etag(values), self.get_last_modified(row)
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validators
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, last_modified)
+        response = super().get(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+
+class ConditionalListMixin:
+    '''
+    View mixin adding a weak ETag to list endpoints.
+
+    The ETag is hashed from the ids, timestamps and counters of the rows
+    on the requested page, together with the pagination metadata. It is
+    computed before serialization, so a matching If-None-Match returns a
+    304 without serializing the page.
+
+    Attributes:
+        list_validator_fields (tuple): The row attributes hashed into
+            the ETag.
+        viewer_relation (tuple): Optional (model, target_field, key_attr)
+            of the viewer relation shown in the response. The relation
+            ids are loaded through the request's ViewerRelationLoader,
+            which the serializer then reuses.
+    '''
+    list_validator_fields = ('id', 'updated_at')
+    viewer_relation = None
+
+    def get_list_validator_values(self, rows):
+        '''
+        Returns the values hashed into the ETag for the given rows.
+        '''
+        values = [
+            [getattr(row, field) for field in self.list_validator_fields]
+            for row in rows
+        ]
+        if self.viewer_relation is not None:
+            relation, target_field, key_attr = self.viewer_relation
+            loader = get_viewer_relation_loader(
+                self.request, relation, target_field)
+            if loader is not None:
+                keys = [getattr(row, key_attr) for row in rows]
+                loader.prime(keys)
+                values.append([loader.load(key) for key in keys])
+        return values
+
+    def get_pagination_state(self):
+        page = getattr(self.paginator, 'page', None)
+        if page is not None:
+            return [page.paginator.count, page.number]
+        return [getattr(self.paginator, 'next_position', None)]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        etag = make_etag([
+            request.user.id,
+            self.get_pagination_state() if page is not None else None,
+            self.get_list_validator_values(rows),
+        ], weak=True)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return set_validators(not_modified, etag)
+
+        serializer = self.get_serializer(rows, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        return set_validators(response, etag)
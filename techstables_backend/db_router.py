@@ -0,0 +1,231 @@
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds a Postgres standby's replay is behind, 0 when it has replayed
+# everything it received or when the server is not a standby.
+POSTGRES_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+current_route = ContextVar('current_route', default=None)
+
+
+class RequestRoute:
+    '''
+    The database the current request reads from.
+
+    Attributes:
+        read_alias (str): The alias reads are sent to.
+        wrote (bool): Whether the request wrote to the primary, which
+            moves its remaining reads to the primary too.
+    '''
+
+    def __init__(self, read_alias):
+        self.read_alias = read_alias
+        self.wrote = False
+
+
+def reads_replica():
+    '''
+    Returns True if the current request reads from a replica.
+    '''
+    route = current_route.get()
+    return route is not None and route.read_alias != DEFAULT_DB_ALIAS
+
+
+def measure_lag(alias):
+    '''
+    Returns how many seconds the replica is behind the primary, or None
+    if it cannot be reached. Only Postgres standbys report a lag; other
+    databases are taken to be up to date when they answer.
+    '''
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(POSTGRES_LAG_SQL)
+                return float(cursor.fetchone()[0] or 0)
+            cursor.execute('SELECT 1')
+            return 0.0
+    except DatabaseError:
+        logger.warning('Replica %s is unreachable.', alias, exc_info=True)
+        connection.close()
+        return None
+
+
+class ReplicaMonitor:
+    '''
+    Per-process record of the replicas' lag, measured again once it is
+    older than DATABASE_REPLICAS['CHECK_INTERVAL'] seconds.
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+
+    def get_lag(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            checked = self.checked.get(alias)
+        if checked is not None and (
+            now - checked[0] < settings.DATABASE_REPLICAS['CHECK_INTERVAL']
+        ):
+            return checked[1]
+        lag = measure_lag(alias)
+        with self.lock:
+            self.checked[alias] = (now, lag)
+        return lag
+
+    def get_available(self):
+        '''
+        Returns the replicas that answer and are at most
+        DATABASE_REPLICAS['MAX_LAG_SECONDS'] behind.
+        '''
+        options = settings.DATABASE_REPLICAS
+        available = []
+        for alias in options['ALIASES']:
+            lag = self.get_lag(alias)
+            if lag is not None and lag <= options['MAX_LAG_SECONDS']:
+                available.append(alias)
+        return available
+
+
+replica_monitor = ReplicaMonitor()
+
+
+class ReplicaRouter:
+    '''
+    Database router sending the reads of safe requests to the replica
+    picked by ReplicaRoutingMiddleware, and every write to the primary.
+
+    Reads outside a request, e.g. in management commands, and reads
+    inside a transaction on the primary stay on the primary. A write
+    moves the rest of the request's reads to the primary, so the request
+    reads its own writes. Objects from any database may be related,
+    since the replicas hold the same rows.
+
+    Data cached across requests, such as membership sets and the follow
+    graph, is read with .using(DEFAULT_DB_ALIAS), since a replica's rows
+    would be kept as current after the replica caught up.
+    '''
+
+    def db_for_read(self, model, **hints):
+        route = current_route.get()
+        if route is None:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return route.read_alias
+
+    def db_for_write(self, model, **hints):
+        route = current_route.get()
+        if route is not None:
+            route.read_alias = DEFAULT_DB_ALIAS
+            route.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS['ALIASES']:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    '''
+    Picks the database each request reads from.
+
+    GET, HEAD and OPTIONS requests read from a random replica among the
+    ones that answer and lag at most DATABASE_REPLICAS['MAX_LAG_SECONDS']
+    behind, or from the primary when none does. Other requests use the
+    primary.
+
+    A request that writes sets the DATABASE_REPLICAS['COOKIE'] cookie,
+    which keeps the client on the primary for STICKY_SECONDS, so it reads
+    its own writes while the replicas catch up. Stickiness is per cookie,
+    not per user: the user's other browsers and devices may read from a
+    replica up to MAX_LAG_SECONDS behind. The user is not known here yet,
+    since JWT authentication runs in the views.
+
+    The middleware is not used without replicas. It must come before
+    RequestMetricsMiddleware, so the lag checks are not counted as the
+    queries of the request.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS['ALIASES']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def is_sticky(self, request):
+        cookie = request.COOKIES.get(settings.DATABASE_REPLICAS['COOKIE'])
+        try:
+            return time.time() < float(cookie or 0)
+        except ValueError:
+            return False
+
+    def get_read_alias(self, request):
+        if request.method not in SAFE_METHODS or self.is_sticky(request):
+            return DEFAULT_DB_ALIAS
+        available = replica_monitor.get_available()
+        return random.choice(available) if available else DEFAULT_DB_ALIAS
+
+    def finish(self, route, response):
+        if route.wrote:
+            options = settings.DATABASE_REPLICAS
+            response.set_cookie(
+                options['COOKIE'],
+                f'{time.time() + options["STICKY_SECONDS"]:.3f}',
+                max_age=options['STICKY_SECONDS'], httponly=True,
+                secure=options['COOKIE_SECURE'],
+                samesite=options['COOKIE_SAMESITE'])
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        route = RequestRoute(self.get_read_alias(request))
+        token = current_route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_route.reset(token)
+        return self.finish(route, response)
+
+    async def __acall__(self, request):
+        route = RequestRoute(
+            await sync_to_async(self.get_read_alias)(request))
+        token = current_route.set(route)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_route.reset(token)
+        return self.finish(route, response)
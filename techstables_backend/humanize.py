@@ -0,0 +1,68 @@
+import functools
+from datetime import datetime, timezone
+
+from django.contrib.humanize.templatetags.humanize import NaturalTimeFormatter
+from django.template import defaultfilters
+from django.utils.timezone import is_aware
+from django.utils.translation import get_language
+
+
+@functools.lru_cache(maxsize=1024)
+def translated(language, key, count=None):
+    '''
+    Returns NaturalTimeFormatter's string for key in the given language,
+    formatted with count when given. The language is part of the cache
+    key only; the caller must have it activated.
+    '''
+    template = NaturalTimeFormatter.time_strings[key]
+    if count is None:
+        return str(template)
+    return template % {'count': count}
+
+
+class NaturalTimeBatch:
+    '''
+    Formats datetimes the way django.contrib.humanize's naturaltime does,
+    relative to a single "now" taken when the batch is created.
+
+    naturaltime reads the clock and resolves its lazy translations on
+    every call. A batch reads the clock once, and the translated strings
+    for seconds, minutes and hours are cached per language, so a page of
+    timestamps costs one dictionary lookup each in the common case.
+
+    Attributes:
+        now (datetime): The aware reference time of the batch.
+        language (str): The language active when the batch was created.
+    '''
+
+    def __init__(self, now=None):
+        self.now = now or datetime.now(timezone.utc)
+        self.language = get_language()
+
+    def format(self, value):
+        now = self.now if is_aware(value) else self.now.replace(tzinfo=None)
+        if value < now:
+            delta, prefix = now - value, 'past'
+        else:
+            delta, prefix = value - now, 'future'
+        if delta.days != 0:
+            if prefix == 'past':
+                since = defaultfilters.timesince(
+                    value, now,
+                    time_strings=NaturalTimeFormatter.past_substrings)
+            else:
+                since = defaultfilters.timeuntil(
+                    value, now,
+                    time_strings=NaturalTimeFormatter.future_substrings)
+            return translated(self.language, f'{prefix}-day') % {
+                'delta': since,
+            }
+        seconds = delta.seconds
+        if seconds == 0:
+            return translated(self.language, 'now')
+        if seconds < 60:
+            return translated(self.language, f'{prefix}-second', seconds)
+        if seconds // 60 < 60:
+            return translated(
+                self.language, f'{prefix}-minute', seconds // 60)
+        return translated(self.language, f'{prefix}-hour', seconds // 3600)
@@ -0,0 +1,283 @@
+import io
+import logging
+import os
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage, storages
+from django.db import transaction
+from PIL import Image, ImageOps
+from rest_framework import serializers
+from .tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+class HeaderOnlyImageFormField(forms.ImageField):
+    '''
+    Form image field that only reads the image header.
+
+    Django's ImageField runs Image.verify(), which reads and checks the
+    whole file. This field only opens the image lazily, so the format and
+    dimensions come from the header and no pixel data is read in the
+    request thread. The variants are decoded later by a background task.
+    '''
+
+    def to_python(self, data):
+        f = forms.FileField.to_python(self, data)
+        if f is None:
+            return None
+
+        if hasattr(data, 'temporary_file_path'):
+            file = data.temporary_file_path()
+        elif hasattr(data, 'read'):
+            file = io.BytesIO(data.read())
+        else:
+            file = io.BytesIO(data['content'])
+
+        try:
+            image = Image.open(file)
+        except Exception as exc:
+            raise ValidationError(
+                self.error_messages['invalid_image'],
+                code='invalid_image',
+            ) from exc
+        f.image = image
+        f.content_type = Image.MIME.get(image.format)
+        if hasattr(f, 'seek') and callable(f.seek):
+            f.seek(0)
+        return f
+
+
+class HeaderOnlyImageField(serializers.ImageField):
+    '''
+    Serializer image field validating uploads with
+    HeaderOnlyImageFormField.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('_DjangoImageField', HeaderOnlyImageFormField)
+        super().__init__(*args, **kwargs)
+
+
+IMAGE_ERROR = 'The image could not be processed; please upload it again.'
+
+
+class DatabaseStagingStorage(Storage):
+    '''
+    Storage keeping staged uploads in the posts.StagedImage table.
+
+    Staging an upload costs one INSERT in the request's transaction, and
+    every worker and dyno can read it back, so a staged upload outlives
+    the process that took it and can be recovered by the
+    recover_image_uploads command. Only the background task talks to
+    the media storage.
+    '''
+
+    def get_model(self):
+        return apps.get_model('posts', 'StagedImage')
+
+    def _save(self, name, content):
+        self.get_model().objects.create(
+            name=name, content=b''.join(content.chunks()))
+        return name
+
+    def _open(self, name, mode='rb'):
+        content = self.get_model().objects.filter(
+            name=name).values_list('content', flat=True).first()
+        if content is None:
+            raise FileNotFoundError(name)
+        return ContentFile(bytes(content), name=name)
+
+    def delete(self, name):
+        self.get_model().objects.filter(name=name).delete()
+
+    def exists(self, name):
+        return self.get_model().objects.filter(name=name).exists()
+
+    def size(self, name):
+        with self.open(name) as staged:
+            return staged.size
+
+
+def get_staging_storage():
+    '''
+    Returns the storage holding uploads until the background task has
+    moved them to the media storage.
+    '''
+    return storages['image_staging']
+
+
+def fail_image(model, pk, staged_name):
+    '''
+    Gives up on the staged upload of an object: its pending upload is
+    cleared and image_error tells the owner to upload the image again.
+    Saving the row invalidates the cached responses showing it.
+    '''
+    with transaction.atomic():
+        instance = model.objects.select_for_update().filter(
+            pk=pk, image_upload=staged_name).first()
+        if instance is not None:
+            instance.image_upload = ''
+            instance.image_error = IMAGE_ERROR
+            instance.save(update_fields=[
+                'image_upload', 'image_error', 'updated_at'])
+    get_staging_storage().delete(staged_name)
+
+
+def render_variant(image, size, crop, image_format):
+    '''
+    Returns the bytes of image resized to fit size, or cropped to fill it
+    if crop is set, and encoded in image_format.
+    '''
+    if crop:
+        variant = ImageOps.fit(image, size)
+    else:
+        variant = image.copy()
+        variant.thumbnail(size)
+    if image_format == 'JPEG' and variant.mode != 'RGB':
+        variant = variant.convert('RGB')
+    buffer = io.BytesIO()
+    variant.save(buffer, image_format, quality=85)
+    return buffer.getvalue()
+
+
+def process_image(model_label, pk, staged_name, variant_sizes):
+    '''
+    Background task moving a staged upload to the media storage and
+    generating its resized JPEG and WebP variants.
+
+    The row is only updated if staged_name is still its pending upload,
+    so a task finishing after a newer upload of the same object cannot
+    overwrite it. Saving the row sends post_save, which invalidates the
+    cached responses showing the image.
+
+    An upload that cannot be processed is failed with fail_image() and
+    logged; the error is not raised, so it cannot escape from the
+    on_commit hook of the request when tasks run eagerly.
+
+    Args:
+        model_label (str): The label of the model, e.g. 'posts.Post'.
+        pk (int): The primary key of the object the image belongs to.
+        staged_name (str): The name of the upload in the staging storage.
+        variant_sizes (dict): Maps variant names to (width, height, crop).
+
+    Returns:
+        bool: False if the upload could not be processed.
+    '''
+    model = apps.get_model(model_label)
+    staging = get_staging_storage()
+    instance = model.objects.filter(pk=pk, image_upload=staged_name).first()
+    if instance is None:
+        staging.delete(staged_name)
+        return True
+
+    field = model._meta.get_field('image')
+    storage = field.storage
+    saved = []
+    try:
+        with staging.open(staged_name) as staged:
+            name = storage.save(
+                field.generate_filename(
+                    instance, os.path.basename(staged_name)),
+                File(staged))
+            saved.append(name)
+            staged.seek(0)
+            with Image.open(staged) as image:
+                image = ImageOps.exif_transpose(image)
+                base = os.path.splitext(name)[0]
+                variants = {}
+                for variant, (width, height, crop) in variant_sizes.items():
+                    for key, image_format, extension in (
+                        (variant, 'JPEG', 'jpg'),
+                        (f'{variant}_webp', 'WEBP', 'webp'),
+                    ):
+                        content = render_variant(
+                            image, (width, height), crop, image_format)
+                        variants[key] = storage.save(
+                            f'{base}_{variant}.{extension}',
+                            ContentFile(content))
+                        saved.append(variants[key])
+    except Exception:
+        for name in saved:
+            storage.delete(name)
+        fail_image(model, pk, staged_name)
+        logger.exception('Processing the image %s failed', staged_name)
+        return False
+
+    with transaction.atomic():
+        current = model.objects.select_for_update().filter(
+            pk=pk, image_upload=staged_name).exists()
+        if current:
+            instance.image = saved[0]
+            instance.image_variants = variants
+            instance.image_upload = ''
+            instance.save(update_fields=[
+                'image', 'image_variants', 'image_upload', 'updated_at'])
+    if not current:
+        for name in saved:
+            storage.delete(name)
+    staging.delete(staged_name)
+    return True
+
+
+def variant_urls(instance):
+    '''
+    Returns a dict mapping the variant names of instance's image to their
+    URLs, or None while there are no ready variants.
+    '''
+    if instance.image_upload or not instance.image_variants:
+        return None
+    storage = instance._meta.get_field('image').storage
+    return {
+        variant: storage.url(name)
+        for variant, name in instance.image_variants.items()
+    }
+
+
+class BackgroundImageMixin:
+    '''
+    Serializer mixin deferring the storage upload of the 'image' field to
+    a background task.
+
+    A new upload is written to the image_staging storage and recorded in the instance's image_upload field. Once the
+    request's transaction commits, process_image moves it to the media
+    storage together with the variants listed in image_variant_names.
+    Until then the serializer keeps returning the previous image. If the
+    upload cannot be processed, image_error says so.
+
+    Attributes:
+        image_variant_names (tuple): The variants to generate, as named in
+            the IMAGE_VARIANT_SIZES setting.
+    '''
+    image_variant_names = ()
+
+    def save(self, **kwargs):
+        upload = self.validated_data.get('image')
+        if upload:
+            del self.validated_data['image']
+        instance = super().save(**kwargs)
+        if upload:
+            self.stage_image(instance, upload)
+        return instance
+
+    @classmethod
+    def get_variant_sizes(cls):
+        return {
+            variant: settings.IMAGE_VARIANT_SIZES[variant]
+            for variant in cls.image_variant_names
+        }
+
+    def stage_image(self, instance, upload):
+        name = get_staging_storage().save(upload.name, upload)
+        type(instance).objects.filter(pk=instance.pk).update(
+            image_upload=name, image_error='')
+        instance.image_upload = name
+        instance.image_error = ''
+        enqueue(
+            process_image, instance._meta.label, instance.pk, name,
+            self.get_variant_sizes())
@@ -0,0 +1,108 @@
+from .membership import get_membership_loader
+
+
+class ViewerRelationLoader:
+    '''
+    Request-scoped loader resolving the requesting user's relation rows
+    (likes, follows) for a whole page of objects in a single query.
+
+    The first lookup primes the loader with every key on the page being
+    serialized; subsequent lookups for the same request are answered from
+    memory.
+
+    Attributes:
+        model (Model): The relation model, e.g. Like or Follower. It must
+            have an 'owner' foreign key to the User model.
+        target_field (str): The foreign key on the relation model pointing
+            at the serialized object, e.g. 'post' or 'followed'.
+        user (User): The requesting user.
+    '''
+    def __init__(self, model, target_field, user):
+        self.model = model
+        self.target_field = target_field
+        self.user = user
+        self._ids = {}
+
+    def prime(self, keys):
+        '''
+        Fetches the relation ids for every key not loaded yet.
+
+        Args:
+            keys (iterable): Primary keys of the target objects.
+        '''
+        missing = {key for key in keys if key not in self._ids}
+        if not missing:
+            return
+        self._ids.update(dict.fromkeys(missing))
+        target = f'{self.target_field}_id'
+        rows = self.model.objects.filter(
+            owner=self.user, **{f'{target}__in': missing}
+        ).values_list(target, 'id')
+        self._ids.update(rows)
+
+    def load(self, key):
+        '''
+        Returns the relation id for the given key, or None.
+        '''
+        if key not in self._ids:
+            self.prime([key])
+        return self._ids[key]
+
+
+def get_viewer_relation_loader(request, model, target_field):
+    '''
+    Returns the loader for the given relation, creating it on first use
+    and caching it on the request so it is shared by every serializer
+    that handles the request. The user's cached MembershipSet is used
+    when the relation has one, saving the query.
+
+    Returns:
+        ViewerRelationLoader or MembershipLoader or None: None for
+        anonymous users, who have no relations to load.
+    '''
+    if not request.user.is_authenticated:
+        return None
+    loaders = request.__dict__.setdefault('_viewer_relation_loaders', {})
+    key = (model, target_field)
+    if key not in loaders:
+        loaders[key] = (
+            get_membership_loader(model, target_field, request.user)
+            or ViewerRelationLoader(model, target_field, request.user)
+        )
+    return loaders[key]
+
+
+class ViewerRelationMixin:
+    '''
+    Serializer mixin resolving viewer relation ids through a
+    ViewerRelationLoader, batching the lookup across the list
+    being serialized.
+
+    The loader is primed with the whole list once, when its first item
+    is serialized; the list serializer records which relations it has
+    primed, so the other items only look up their own key.
+    '''
+    def get_viewer_relation_id(self, obj, model, target_field, key_attr):
+        '''
+        Returns the id of the requesting user's relation row pointing at
+        the target of obj, or None.
+
+        Args:
+            obj: The instance being serialized.
+            model (Model): The relation model, e.g. Like.
+            target_field (str): The relation's foreign key to the target.
+            key_attr (str): The attribute on obj holding the target's
+                primary key, e.g. 'id' or 'owner_id'.
+        '''
+        loader = get_viewer_relation_loader(
+            self.context['request'], model, target_field)
+        if loader is None:
+            return None
+        page = getattr(self.parent, 'instance', None)
+        if page is not None and not isinstance(page, dict):
+            primed = self.parent.__dict__.setdefault(
+                '_primed_viewer_relations', set())
+            if (model, target_field) not in primed:
+                primed.add((model, target_field))
+                loader.prime([getattr(item, key_attr) for item in page])
+        return loader.load(getattr(obj, key_attr))
@@ -0,0 +1,295 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from .cache import (
+    get_namespace_versions, get_response_cache, namespace_key, new_version,
+)
+
+membership_caches = {}
+
+
+class MembershipSet:
+    '''
+    Sorted set of the target ids of one user's relation rows, e.g. the
+    ids of the posts a user likes, mapped to the ids of the rows.
+
+    The target ids and the row ids are kept in two parallel arrays of
+    64-bit integers sorted by target id, so a set costs 16 bytes per
+    relation and lookups are binary searches.
+
+    Attributes:
+        keys (array): The sorted target ids.
+        ids (array): The relation row id of each target id.
+    '''
+
+    def __init__(self, keys, ids):
+        self.keys = keys
+        self.ids = ids
+
+    @classmethod
+    def from_rows(cls, rows):
+        '''
+        Builds the set from (target_id, relation_id) pairs sorted by
+        target_id.
+        '''
+        keys = array('q')
+        ids = array('q')
+        for key, relation_id in rows:
+            keys.append(key)
+            ids.append(relation_id)
+        return cls(keys, ids)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, key):
+        '''
+        Returns the relation id for key, or None.
+        '''
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return self.ids[position]
+        return None
+
+    def add(self, key, relation_id):
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            self.ids[position] = relation_id
+        else:
+            self.keys.insert(position, key)
+            self.ids.insert(position, relation_id)
+
+    def discard(self, key):
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+            del self.ids[position]
+
+    @property
+    def nbytes(self):
+        return (
+            self.keys.itemsize * len(self.keys)
+            + self.ids.itemsize * len(self.ids)
+        )
+
+
+class MembershipEntry:
+    def __init__(self, members, version, used_at):
+        self.members = members
+        self.version = version
+        self.used_at = used_at
+
+    @property
+    def size(self):
+        return 0 if self.members is None else len(self.members)
+
+
+class MembershipCache:
+    '''
+    Process-wide cache of the MembershipSet of each active user for one
+    relation, e.g. the posts each user likes.
+
+    A user's set is loaded from the primary with one query the first
+    time it is needed, and then answers every viewer lookup of that
+    user's requests. A replica could miss the latest writes. Each set is
+    stamped with a per-user version token kept in the shared response
+    cache. Every write of a relation row replaces the token,
+    so the sets held by other worker processes are reloaded on their
+    next use. The process that made the write updates its own set in
+    place once the transaction commits.
+
+    Memory is bounded by MEMBERSHIP_SETS: users idle for more than
+    MAX_IDLE seconds are evicted, as are the least recently used users
+    beyond MAX_USERS or while the sets hold more than MAX_TOTAL_ENTRIES
+    relations together. Users with more than MAX_ENTRIES relations are
+    not cached and fall back to per-request queries.
+
+    Attributes:
+        model (Model): The relation model. It must have an 'owner'
+            foreign key to the User model.
+        target_field (str): The relation's foreign key to the target,
+            e.g. 'post'.
+    '''
+
+    def __init__(self, model, target_field):
+        self.model = model
+        self.target_field = target_field
+        self.name = f'{model._meta.label_lower}.{target_field}'
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.total_entries = 0
+        membership_caches[(model, target_field)] = self
+
+    def reset(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_entries = 0
+
+    def put(self, user_id, entry):
+        self.pop(user_id)
+        self.entries[user_id] = entry
+        self.total_entries += entry.size
+
+    def pop(self, user_id=None):
+        '''
+        Removes and returns the entry of user_id, or of the least
+        recently used user if user_id is None. Returns None if there is
+        no such entry. The lock must be held.
+        '''
+        if user_id is None:
+            if not self.entries:
+                return None
+            _, entry = self.entries.popitem(last=False)
+        else:
+            entry = self.entries.pop(user_id, None)
+            if entry is None:
+                return None
+        self.total_entries -= entry.size
+        return entry
+
+    def namespace(self, user_id):
+        return f'membership:{self.name}:{user_id}'
+
+    def get(self, user_id):
+        '''
+        Returns the up to date MembershipSet of user_id, loading it if
+        needed, or None if the user has too many relations to cache.
+        '''
+        version = get_namespace_versions([self.namespace(user_id)])[0]
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry.version == version:
+                entry.used_at = now
+                self.entries.move_to_end(user_id)
+                return entry.members
+        members = self.load(user_id)
+        with self.lock:
+            self.put(user_id, MembershipEntry(members, version, now))
+            self.evict(now)
+        return members
+
+    def load(self, user_id):
+        options = settings.MEMBERSHIP_SETS
+        limit = min(options['MAX_ENTRIES'], options['MAX_TOTAL_ENTRIES'])
+        target = f'{self.target_field}_id'
+        rows = list(
+            self.model.objects.using(DEFAULT_DB_ALIAS)
+            .filter(owner_id=user_id)
+            .order_by(target).values_list(target, 'id')[:limit + 1])
+        if len(rows) > limit:
+            return None
+        return MembershipSet.from_rows(rows)
+
+    def evict(self, now):
+        options = settings.MEMBERSHIP_SETS
+        while (
+            len(self.entries) > options['MAX_USERS']
+            or self.total_entries > options['MAX_TOTAL_ENTRIES']
+        ):
+            self.pop()
+        while self.entries:
+            entry = next(iter(self.entries.values()))
+            if now - entry.used_at <= options['MAX_IDLE']:
+                break
+            self.pop()
+
+    def lookup(self, members, key):
+        with self.lock:
+            return members.get(key)
+
+    def replace_version(self, user_id):
+        '''
+        Replaces the version token of user_id's set.
+
+        Returns:
+            tuple: The previous token, or None, and the new token.
+        '''
+        cache = get_response_cache()
+        key = namespace_key(self.namespace(user_id))
+        previous = cache.get(key)
+        version = new_version()
+        cache.set(key, version, timeout=None)
+        return previous, version
+
+    def forget(self, user_id):
+        '''
+        Drops user_id's set in every process.
+        '''
+        self.replace_version(user_id)
+        with self.lock:
+            self.pop(user_id)
+
+    def change(self, user_id, key, relation_id):
+        '''
+        Records that user_id's relation row to key was created with id
+        relation_id, or deleted if relation_id is None.
+
+        The set is dropped right away, so nothing reads it while the
+        change is uncommitted. Once the transaction commits, the set is
+        put back with the change applied, unless it was reloaded or
+        another process changed it in the meantime.
+        '''
+        _, pending = self.replace_version(user_id)
+        with self.lock:
+            entry = self.pop(user_id)
+
+        def apply():
+            previous, version = self.replace_version(user_id)
+            if entry is None or entry.members is None or previous != pending:
+                return
+            with self.lock:
+                if user_id in self.entries:
+                    return
+                if relation_id is None:
+                    entry.members.discard(key)
+                else:
+                    entry.members.add(key, relation_id)
+                entry.version = version
+                self.put(user_id, entry)
+                self.evict(time.monotonic())
+        transaction.on_commit(apply)
+
+
+class MembershipLoader:
+    '''
+    Viewer relation loader answering from a user's MembershipSet, with
+    the same interface as ViewerRelationLoader.
+    '''
+
+    def __init__(self, cache, members):
+        self.cache = cache
+        self.members = members
+
+    def prime(self, keys):
+        pass
+
+    def load(self, key):
+        return self.cache.lookup(self.members, key)
+
+
+def get_membership_loader(model, target_field, user):
+    '''
+    Returns a MembershipLoader for the user's relation, or None if the
+    relation has no MembershipCache or the user's set is not cached.
+    '''
+    cache = membership_caches.get((model, target_field))
+    if cache is None:
+        return None
+    members = cache.get(user.id)
+    if members is None:
+        return None
+    return MembershipLoader(cache, members)
+
+
+def forget_user(user_id):
+    '''
+    Drops the sets of user_id from every MembershipCache.
+    '''
+    for cache in membership_caches.values():
+        cache.forget(user_id)
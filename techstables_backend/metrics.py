@@ -0,0 +1,224 @@
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    '''
+    Raised when a view runs more queries than its QUERY_BUDGETS entry
+    allows and REQUEST_METRICS['BUDGET_MODE'] is 'raise'.
+    '''
+
+
+class RequestMetrics:
+    '''
+    Timings of a single request, collected by RequestMetricsMiddleware.
+
+    Attributes:
+        queries (int): The number of SQL queries run.
+        durations (dict): Seconds spent per phase: 'db' in SQL queries,
+            'serializer' in serializers' to_representation and 'render'
+            in rendering the response.
+        active (set): The phases being timed, so nested timers of the
+            same phase are not counted twice.
+    '''
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.durations = {'db': 0.0, 'serializer': 0.0, 'render': 0.0}
+        self.active = set()
+
+    def execute(self, execute, sql, params, many, context):
+        '''
+        Database execute wrapper counting and timing every query.
+        '''
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.durations['db'] += time.perf_counter() - started
+
+    @contextmanager
+    def timed(self, phase):
+        if phase in self.active:
+            yield
+            return
+        self.active.add(phase)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[phase] += time.perf_counter() - started
+            self.active.discard(phase)
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, streaming=False):
+        '''
+        Returns the value of the Server-Timing header, without the render
+        entry for a streamed response.
+        '''
+        entries = [f'db;dur={self.durations["db"] * 1000:.1f};'
+                   f'desc="{self.queries} queries"']
+        entries += [
+            f'{phase};dur={self.durations[phase] * 1000:.1f}'
+            for phase in ('serializer', 'render')
+            if not (streaming and phase == 'render')
+        ]
+        entries.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(entries)
+
+
+@contextmanager
+def timed(phase):
+    '''
+    Adds the time spent in the block to the current request's phase, if
+    the request is being measured.
+    '''
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+    else:
+        with metrics.timed(phase):
+            yield
+
+
+class TimedSerializerMixin:
+    '''
+    Serializer mixin adding the time spent serializing to the current
+    request's 'serializer' phase.
+    '''
+
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+
+def get_view_name(request):
+    '''
+    Returns the dotted path of the view class or function that handled
+    the request, as used in QUERY_BUDGETS, or None.
+    '''
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = getattr(match.func, 'view_class', match.func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+class RequestMetricsMiddleware:
+    '''
+    Middleware measuring the queries, SQL time, serializer time and
+    render time of every request.
+
+    With REQUEST_METRICS['SERVER_TIMING'] the measurements are returned
+    in a Server-Timing header, which browsers show in their network
+    panel. With REQUEST_METRICS['LOG'] they are logged at debug level.
+
+    Read requests to the views listed in QUERY_BUDGETS are checked
+    against their query budget. A view over budget is logged as a
+    warning, or raises QueryBudgetExceeded if
+    REQUEST_METRICS['BUDGET_MODE'] is 'raise', which makes N+1
+    regressions fail the test suite.
+
+    Streamed responses, e.g. FileResponse, produce their body while it
+    is sent, after the header and the log are written. Their render time
+    is not measured: the Server-Timing header leaves the render entry out
+    and the log reports it as 0.
+
+    The middleware runs in both WSGI and ASGI mode. Under ASGI the
+    queries of a request run on the request's sync thread, so the query
+    counter is installed on that thread's connections.
+    '''
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def install(self, stack, metrics):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.execute))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                self.install(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            stack = ExitStack()
+            await sync_to_async(self.install)(stack, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            current_metrics.reset(token)
+        self.report(request, response, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                metrics.durations['render'] += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, metrics):
+        options = settings.REQUEST_METRICS
+        view_name = get_view_name(request)
+        if options['SERVER_TIMING']:
+            response['Server-Timing'] = metrics.server_timing(
+                getattr(response, 'streaming', False))
+        if options['LOG']:
+            logger.debug(
+                '%s %s (%s): %d queries, db %.1fms, serializer %.1fms, '
+                'render %.1fms, total %.1fms', request.method,
+                request.path, view_name, metrics.queries,
+                metrics.durations['db'] * 1000,
+                metrics.durations['serializer'] * 1000,
+                metrics.durations['render'] * 1000, metrics.total * 1000)
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None or request.method not in ('GET', 'HEAD'):
+            return
+        if metrics.queries <= budget:
+            return
+        message = (
+            f'{view_name} ran {metrics.queries} queries for '
+            f'{request.method} {request.get_full_path()}, over its budget '
+            f'of {budget}.')
+        if options['BUDGET_MODE'] == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
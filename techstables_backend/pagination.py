@@ -0,0 +1,215 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    '''
+    Forward-only keyset (cursor) pagination for infinite-scroll clients.
+
+    The cursor holds the ordering values of the last row of the page, and
+    the next page is read with a WHERE clause on those values instead of
+    an OFFSET, so every page costs the same however deep the client
+    scrolls. No COUNT(*) is run. The ordering must be unique, which is
+    why it normally ends with the primary key.
+
+    Attributes:
+        page_size (int): The number of rows returned per page by default.
+        page_size_query_param (str): The query parameter clients set to
+            ask for bigger or smaller pages.
+        max_page_size (int): The largest page size clients can ask for.
+        cursor_query_param (str): The query parameter carrying the cursor.
+        mode_query_param (str): The query parameter clients set to
+            'cursor' to opt in on the first page.
+        ordering (tuple): The fields the rows are ordered and keyed on,
+            with a '-' prefix for descending order.
+    '''
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def is_requested(cls, request):
+        '''
+        Returns True if the client opted in to cursor pagination.
+        '''
+        params = request.query_params
+        return (
+            cls.cursor_query_param in params
+            or params.get(cls.mode_query_param) == 'cursor'
+        )
+
+    def get_page_size(self, request):
+        '''
+        Returns the page size the request asks for, capped at
+        max_page_size, or the default page_size.
+        '''
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        rows = list(queryset[:self.page_size + 1])
+        return self.paginate_rows(rows)
+
+    def paginate_rows(self, rows):
+        '''
+        Trims rows fetched with a page_size + 1 limit down to one page
+        and records the position of the next page.
+        '''
+        has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.position_of(rows[-1]) if has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(
+            url, self.cursor_query_param,
+            self.encode_cursor(self.next_position))
+
+    def get_fields(self, ordering=None):
+        '''
+        Returns (field name, descending) pairs for the ordering, which
+        defaults to the paginator's own.
+        '''
+        return [
+            (field.lstrip('-'), field.startswith('-'))
+            for field in ordering or self.ordering
+        ]
+
+    def position_of(self, row):
+        '''
+        Returns the ordering values of a row, which become the cursor.
+        '''
+        return [getattr(row, name) for name, _ in self.get_fields()]
+
+    def after(self, position, ordering=None):
+        '''
+        Builds the filter selecting the rows that come after position in
+        the ordering, e.g. for ('-created_at', '-id'):
+        created_at < x OR (created_at = x AND id < y).
+
+        A different ordering with the same directions can be given to
+        apply the position to another table holding the same keys under
+        other names.
+        '''
+        condition = Q()
+        equal = {}
+        fields = self.get_fields(ordering)
+        for (name, descending), value in zip(fields, position):
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, position):
+        values = [
+            value.isoformat() if isinstance(value, datetime.datetime)
+            else value
+            for value in position
+        ]
+        data = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        '''
+        Returns the position carried by the request's cursor, or None for
+        the first page. Each value is parsed by the model field it is
+        ordered on, so a tampered cursor cannot reach the query.
+
+        Raises:
+            NotFound: If the cursor is malformed or holds values of the
+                wrong type.
+        '''
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded))
+        except (binascii.Error, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (
+            not isinstance(position, list)
+            or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                self.parse_value(model._meta.get_field(name), value)
+                for (name, _), value in zip(self.get_fields(), position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_value(self, field, value):
+        if value is None or isinstance(value, (dict, list)):
+            raise ValueError(value)
+        return field.to_python(value)
+
+
+class KeysetPaginationMixin:
+    '''
+    View mixin that switches a list view to keyset pagination when the
+    client opts in with ?pagination=cursor or sends a cursor, and keeps
+    the default page-number pagination for everyone else.
+
+    Attributes:
+        keyset_pagination_class (type): The KeysetPagination subclass
+            used for opted-in requests.
+    '''
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.keyset_pagination_class.is_requested(self.request):
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
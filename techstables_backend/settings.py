@@ -62,6 +62,9 @@ INSTALLED_APPS = [
     'comments',
     'likes',
     'followers',
+    'timelines',
+    'trending',
+    'benchmarks',
     'dj_rest_auth'
 ]
 
@@ -71,6 +74,10 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DATETIME_FORMAT': '%d %b %Y',
+    'DEFAULT_RENDERER_CLASSES': [
+        'techstables_backend.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [(
         'rest_framework.authentication.SessionAuthentication'
         if 'DEV' in os.environ
@@ -78,11 +85,114 @@ REST_FRAMEWORK = {
     )]
 }
 
+# JSON responses are encoded with orjson when it is installed, with output
+# identical to DRF's JSONRenderer.
 if 'DEV' not in os.environ:
     REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
-        'rest_framework.renderers.JSONRenderer',
+        'techstables_backend.renderers.FastJSONRenderer',
     ]
 
+# Home timelines: posts by authors with more followers than the limit are
+# read at query time instead of being fanned out; a new follow backfills
+# the follower's timeline with this many recent posts.
+TIMELINE_FANOUT_LIMIT = int(os.environ.get('TIMELINE_FANOUT_LIMIT', 5000))
+TIMELINE_BACKFILL_SIZE = int(os.environ.get('TIMELINE_BACKFILL_SIZE', 50))
+
+# Full-text post search keeps the ids of at most this many ranked matches.
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', 500))
+
+# Trending posts: engagement loses half its weight every half-life, and
+# scores that decayed more than TRENDING_PRUNE_HALF_LIVES half-lives below
+# a single fresh like are dropped on refresh. Each refresh rescans
+# TRENDING_ID_OVERLAP like and comment ids below the previous run's last id
+# for rows committed late.
+TRENDING_HALF_LIFE_HOURS = float(
+    os.environ.get('TRENDING_HALF_LIFE_HOURS', 24))
+TRENDING_WEIGHTS = {'likes': 1.0, 'comments': 2.0}
+TRENDING_PRUNE_HALF_LIVES = 20
+TRENDING_ID_OVERLAP = 1000
+
+# Follow suggestions are served from an in-memory follow graph in each
+# worker, loaded in the background on first use. The follows made by
+# other workers are added once it is older than MAX_AGE seconds,
+# rescanning UPDATE_OVERLAP ids for late commits, and the whole graph is
+# loaded again every RELOAD_AGE seconds for their unfollows. More than
+# COMPACT_THRESHOLD changes applied since are compacted in the
+# background too.
+FOLLOW_GRAPH = {
+    'MAX_AGE': int(os.environ.get('FOLLOW_GRAPH_MAX_AGE', 300)),
+    'RELOAD_AGE': int(os.environ.get('FOLLOW_GRAPH_RELOAD_AGE', 3600)),
+    'UPDATE_OVERLAP': 1000,
+    'COMPACT_THRESHOLD': 10000,
+}
+FOLLOW_SUGGESTIONS_LIMIT = 50
+
+# Like counters: 'immediate' updates Post.likes_count with every like;
+# 'write-behind' buffers the changes in memory and applies them in bulk
+# every FLUSH_INTERVAL seconds (0 disables the background flusher).
+LIKE_COUNTER = {
+    'MODE': os.environ.get('LIKE_COUNTER_MODE', 'immediate'),
+    'FLUSH_INTERVAL': float(os.environ.get('LIKE_COUNTER_FLUSH_INTERVAL', 5)),
+}
+
+# Per-user sets of liked posts and followed users held in each worker:
+# users idle for MAX_IDLE seconds are evicted, then the least recently
+# used beyond MAX_USERS or while the sets of a relation hold more than
+# MAX_TOTAL_ENTRIES relations (16 bytes each, so the default keeps both
+# relations under 32 MB per worker); users with more than MAX_ENTRIES
+# relations are looked up per request instead.
+MEMBERSHIP_SETS = {
+    'MAX_USERS': int(os.environ.get('MEMBERSHIP_SETS_MAX_USERS', 10000)),
+    'MAX_IDLE': 900,
+    'MAX_ENTRIES': 20000,
+    'MAX_TOTAL_ENTRIES': int(os.environ.get(
+        'MEMBERSHIP_SETS_MAX_TOTAL_ENTRIES', 1000000)),
+}
+
+# Request metrics: Server-Timing headers with the query count and the SQL,
+# serializer and render times of each response, optionally logged too.
+# Views running more queries than their QUERY_BUDGETS entry are logged,
+# or fail in DEV and the test suite.
+REQUEST_METRICS = {
+    'SERVER_TIMING': 'DEV' in os.environ or (
+        os.environ.get('REQUEST_METRICS_SERVER_TIMING') == '1'),
+    'LOG': os.environ.get('REQUEST_METRICS_LOG') == '1',
+    'BUDGET_MODE': 'raise' if 'DEV' in os.environ else 'log',
+}
+
+# Traffic capture: with a PATH, SAMPLE_RATE of the requests are appended as
+# sanitized JSONL records for the replay_traffic command. Query and body
+# values are redacted unless they are numeric or listed in KEEP_PARAMS.
+TRAFFIC_CAPTURE = {
+    'PATH': os.environ.get('TRAFFIC_CAPTURE_PATH'),
+    'SAMPLE_RATE': float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE_RATE', 1)),
+    'EXCLUDE': ('admin/', 'api-auth/', 'dj-rest-auth/'),
+    'KEEP_PARAMS': (
+        'cursor', 'pagination', 'page', 'ordering', 'timestamps', 'limit'),
+}
+QUERY_BUDGETS = {
+    'posts.views.PostList': 7,
+    'posts.views.PostDetail': 7,
+    'posts.views.PostSearch': 7,
+    'trending.views.TrendingPostList': 5,
+    'timelines.views.Timeline': 8,
+    'comments.views.CommentList': 6,
+    'comments.views.PostCommentList': 6,
+    'comments.views.CommentDetail': 7,
+    'profiles.views.ProfileList': 7,
+    'profiles.views.ProfileDetail': 7,
+    'likes.views.LikeList': 6,
+    'likes.views.LikeDetail': 5,
+    'likes.views.PostLikerList': 6,
+    'likes.views.LikedPostList': 7,
+    'likes.views.ViewerLikeList': 5,
+    'followers.views.FollowerList': 6,
+    'followers.views.FollowerDetail': 5,
+    'followers.views.ProfileFollowerList': 6,
+    'followers.views.ProfileFollowingList': 6,
+    'followers.views.FollowSuggestionList': 6,
+}
+
 REST_AUTH = {
     'USE_JWT': True,
     'JWT_AUTH_SECURE': True,
@@ -93,6 +203,9 @@ REST_AUTH = {
 }
 
 MIDDLEWARE = [
+    'techstables_backend.db_router.ReplicaRoutingMiddleware',
+    'techstables_backend.metrics.RequestMetricsMiddleware',
+    'techstables_backend.capture.TrafficCaptureMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -149,6 +262,66 @@ else:
         'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
     }
 
+# Read replicas: DATABASE_REPLICA_URLS lists extra database URLs, comma
+# or space separated, e.g. Postgres standbys or, in DEV, SQLite files.
+# Safe requests read from a replica that answers and lags at most
+# MAX_LAG_SECONDS, re-checked every CHECK_INTERVAL seconds. A client that
+# wrote reads from the primary for STICKY_SECONDS, which must cover
+# MAX_LAG_SECONDS. In tests the replicas mirror the test database.
+for n, url in enumerate(
+    os.environ.get('DATABASE_REPLICA_URLS', '').replace(',', ' ').split()
+):
+    DATABASES[f'replica_{n}'] = {
+        **dj_database_url.parse(url), 'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['techstables_backend.db_router.ReplicaRouter']
+DATABASE_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+    'MAX_LAG_SECONDS': float(
+        os.environ.get('DATABASE_REPLICA_MAX_LAG_SECONDS', 5)),
+    'STICKY_SECONDS': int(
+        os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', 10)),
+    'CHECK_INTERVAL': 5,
+    'COOKIE': 'primary_until',
+    'COOKIE_SECURE': 'DEV' not in os.environ,
+    'COOKIE_SAMESITE': 'Lax' if 'DEV' in os.environ else 'None',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The file-based cache is shared by every worker process on a dyno. Its
+# add() is not atomic, so the response cache takes its rebuild lock with
+# a lock file instead. DEV and the test suite use the local-memory cache.
+
+if 'DEV' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'CACHE_LOCATION', '/tmp/techstables_cache'),
+        }
+    }
+
+# Anonymous responses cached by techstables_backend.cache: seconds an
+# entry is fresh, extra seconds a stale entry may be served while one
+# worker rebuilds it, rebuild lock lifetime, and how long a cold miss
+# waits for another worker's rebuild.
+RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 60)),
+    'STALE_TIMEOUT': 300,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 2.0,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -191,8 +364,42 @@ CLOUDINARY_STORAGE = {
     'API_SECRET': os.environ.get('CLOUDINARY_API_SECRET')
 }
 
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Uploads go to Cloudinary when it is configured and to MEDIA_ROOT
+# otherwise, e.g. in development and tests. New images are first written
+# to the image_staging storage, a database table shared by every worker,
+# and moved by a background task; recover_image_uploads retries or fails
+# the ones left behind.
 MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': (
+            'cloudinary_storage.storage.MediaCloudinaryStorage'
+            if CLOUDINARY_STORAGE['CLOUD_NAME']
+            else 'django.core.files.storage.FileSystemStorage'
+        ),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'image_staging': {
+        'BACKEND': 'techstables_backend.images.DatabaseStagingStorage',
+    },
+}
+
+# Resized copies generated for uploaded images: (width, height, crop).
+IMAGE_VARIANT_SIZES = {
+    'feed': (1080, 1080, False),
+    'avatar': (256, 256, True),
+}
+
+# Background tasks run in a thread pool of the web process; EAGER runs
+# them inline once the request's transaction commits.
+BACKGROUND_TASKS = {
+    'WORKERS': int(os.environ.get('BACKGROUND_TASK_WORKERS', 2)),
+    'EAGER': 'BACKGROUND_TASKS_EAGER' in os.environ,
+}
 
 STATIC_URL = '/static/'
 
@@ -0,0 +1,59 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    '''
+    Returns the process-wide pool of background worker threads,
+    starting it on first use.
+    '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_TASKS['WORKERS'],
+                thread_name_prefix='background-task')
+        return _executor
+
+
+def run_task(func, args, kwargs):
+    '''
+    Runs a task in a worker thread, logging its failure and closing the
+    database connections the thread opened.
+    '''
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    '''
+    Runs func(*args, **kwargs) in a background worker right away.
+
+    With BACKGROUND_TASKS['EAGER'] the task runs inline instead, which
+    keeps tests deterministic.
+    '''
+    if settings.BACKGROUND_TASKS['EAGER']:
+        func(*args, **kwargs)
+    else:
+        get_executor().submit(run_task, func, args, kwargs)
+
+
+def enqueue(func, *args, **kwargs):
+    '''
+    Runs func(*args, **kwargs) with submit() once the current transaction
+    commits, so the task sees the rows written by the request.
+    '''
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
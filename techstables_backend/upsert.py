@@ -0,0 +1,123 @@
+from django.db import connections, router, transaction
+from django.db.models.signals import post_delete, post_save
+
+
+def convert_row(fields, row, connection):
+    '''
+    Converts the raw column values of a row returned by a cursor into
+    the Python values of the given fields, as a queryset would.
+    '''
+    values = []
+    for field, value in zip(fields, row):
+        column = field.get_col(field.model._meta.db_table)
+        converters = (
+            connection.ops.get_db_converters(column)
+            + column.get_db_converters(connection)
+        )
+        for converter in converters:
+            value = converter(value, column, connection)
+        values.append(value)
+    return values
+
+
+def insert_ignore(model, conflict_fields, **values):
+    '''
+    Inserts a row with INSERT ... ON CONFLICT DO NOTHING RETURNING and
+    sends post_save for it, all in one transaction.
+
+    Unlike Model.save, a duplicate does not raise IntegrityError or abort
+    the transaction; nothing is inserted and None is returned instead.
+
+    Args:
+        model (type): The model to insert into.
+        conflict_fields (list): The fields of the unique constraint that
+            detects duplicates.
+        **values: The field values of the new row, as for the model's
+            constructor.
+
+    Returns:
+        Model: The inserted instance, or None if it already existed.
+    '''
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    instance = model(**values)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    params = [
+        field.get_db_prep_save(field.pre_save(instance, True), connection)
+        for field in fields
+    ]
+    sql = (
+        f'INSERT INTO {quote(model._meta.db_table)} '
+        f'({", ".join(quote(field.column) for field in fields)}) '
+        f'VALUES ({", ".join(["%s"] * len(fields))}) '
+        f'ON CONFLICT ('
+        f'{", ".join(quote(model._meta.get_field(name).column) for name in conflict_fields)}'
+        f') DO NOTHING '
+        f'RETURNING {quote(model._meta.pk.column)}'
+    )
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        instance.pk = row[0]
+        instance._state.adding = False
+        instance._state.db = using
+        post_save.send(
+            sender=model, instance=instance, created=True,
+            update_fields=None, raw=False, using=using)
+    return instance
+
+
+def delete_returning(model, **lookup):
+    '''
+    Deletes the rows matching lookup with a single DELETE ... RETURNING
+    and sends post_delete for each of them, in one transaction.
+
+    The rows are not read beforehand, so pre_delete is not sent and
+    related objects are not collected; only use it for models that
+    nothing else references.
+
+    Args:
+        model (type): The model to delete from.
+        **lookup: Column values the rows must match, by field name or
+            attname, e.g. owner_id=1.
+
+    Returns:
+        list: The deleted instances.
+    '''
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = model._meta.concrete_fields
+    conditions = []
+    params = []
+    for name, value in lookup.items():
+        field = model._meta.get_field(name)
+        conditions.append(f'{quote(field.column)} = %s')
+        params.append(field.get_db_prep_value(
+            getattr(value, 'pk', value), connection))
+    sql = (
+        f'DELETE FROM {quote(model._meta.db_table)} '
+        f'WHERE {" AND ".join(conditions)} '
+        f'RETURNING {", ".join(quote(field.column) for field in fields)}'
+    )
+    attnames = [field.attname for field in fields]
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        deleted = []
+        for row in rows:
+            instance = model.from_db(
+                using, attnames, convert_row(fields, row, connection))
+            post_delete.send(
+                sender=model, instance=instance, using=using,
+                origin=instance)
+            deleted.append(instance)
+    return deleted
@@ -29,4 +29,6 @@ urlpatterns = [
     path('', include('comments.urls')),
     path('', include('likes.urls')),
     path('', include('followers.urls')),
+    path('', include('timelines.urls')),
+    path('', include('trending.urls')),
 ]
@@ -0,0 +1,59 @@
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from followers.models import Follower
+from timelines.models import (
+    TimelineEntry, high_fanout_user_ids, recent_posts
+)
+
+
+class Command(BaseCommand):
+    '''
+    Rebuilds every materialized home timeline from the Follower table.
+
+    Each follow is backfilled with the followed user's most recent posts,
+    skipping authors above TIMELINE_FANOUT_LIMIT, whose posts are read at
+    query time. The follows are walked grouped by followed user, so the
+    recent posts of each author are read once, and the entries are
+    written in batches. Run it once after deploying the timelines app
+    and after bulk imports that bypass signals.
+    '''
+    help = 'Rebuilds the materialized home timelines from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        follows = Follower.objects.order_by('followed_id').values_list(
+            'followed_id', 'owner_id')
+        high_fanout_ids = high_fanout_user_ids(
+            Follower.objects.values('followed'))
+        count = 0
+
+        def entries():
+            nonlocal count
+            for followed_id, group in groupby(
+                follows.iterator(), key=itemgetter(0)
+            ):
+                if followed_id in high_fanout_ids:
+                    continue
+                posts = recent_posts(followed_id)
+                for _, owner_id in group:
+                    count += 1
+                    for post_id, created_at in posts:
+                        yield TimelineEntry(
+                            owner_id=owner_id, post_id=post_id,
+                            author_id=followed_id,
+                            post_created_at=created_at)
+
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            TimelineEntry.objects.all().delete()
+            rows = entries()
+            while batch := list(islice(rows, batch_size)):
+                TimelineEntry.objects.bulk_create(
+                    batch, batch_size=batch_size, ignore_conflicts=True)
+        self.stdout.write(
+            self.style.SUCCESS(f'Backfilled timelines for {count} follows.'))
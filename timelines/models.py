@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.models import User
+from posts.models import Post
+from followers.models import Follower
+from profiles.models import Profile
+
+
+class TimelineEntry(models.Model):
+    '''
+    A post materialized into the home timeline of one of its
+    author's followers.
+
+    Entries are written when a post is created (fan-out on write) and
+    when a follow starts, and pruned when a follow ends, so reading a
+    timeline is a single range scan over the reader's entries.
+
+    Attributes:
+        owner (ForeignKey): The user whose timeline holds the entry.
+        post (ForeignKey): The post shown in the timeline.
+        author (ForeignKey): The author of the post, kept so entries can
+                            be pruned on unfollow without a join.
+        post_created_at (DateTimeField): Copy of the post's creation time,
+                                        used as the timeline ordering key.
+
+    Meta:
+        ordering (list): Orders entries from the newest post to the oldest.
+        unique_together (list): Ensures a post appears once per timeline.
+        indexes (list): Backs the keyset reads of a user's timeline.
+    '''
+    owner = models.ForeignKey(
+        User, related_name='timeline', on_delete=models.CASCADE)
+    post = models.ForeignKey(
+        Post, related_name='+', on_delete=models.CASCADE)
+    author = models.ForeignKey(
+        User, related_name='+', on_delete=models.CASCADE)
+    post_created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-post_created_at', '-post_id']
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(
+                fields=['owner', '-post_created_at', '-post'],
+                name='timeline_owner_created_idx'),
+            models.Index(
+                fields=['owner', 'author'],
+                name='timeline_owner_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.owner} {self.post_id}'
+
+
+def high_fanout_user_ids(user_ids):
+    """
+    Returns the ids among user_ids whose follower count exceeds
+    TIMELINE_FANOUT_LIMIT.
+
+    Posts by these users are not fanned out; timelines read them at
+    query time instead.
+    """
+    return set(
+        Profile.objects.filter(
+            owner__in=user_ids,
+            followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+        ).values_list('owner_id', flat=True)
+    )
+
+
+def recent_posts(author_id):
+    """
+    Returns the (id, created_at) pairs of the author's most recent posts
+    that belong in a new follower's timeline, up to
+    TIMELINE_BACKFILL_SIZE posts.
+    """
+    return list(Post.objects.filter(owner_id=author_id).order_by(
+        '-created_at', '-id'
+    ).values_list('id', 'created_at')[:settings.TIMELINE_BACKFILL_SIZE])
+
+
+def backfill_timeline(owner_id, followed_id):
+    """
+    Copies the most recent posts of followed_id into the timeline of
+    owner_id, up to TIMELINE_BACKFILL_SIZE posts.
+    """
+    posts = recent_posts(followed_id)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                owner_id=owner_id, post_id=post_id, author_id=followed_id,
+                post_created_at=created_at)
+            for post_id, created_at in posts
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def fan_out_post(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that writes a new post into the timeline of every
+    follower of its author, unless the author has too many followers.
+    """
+    if not created or raw or high_fanout_user_ids([instance.owner_id]):
+        return
+    follower_ids = Follower.objects.filter(
+        followed_id=instance.owner_id
+    ).values_list('owner_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                owner_id=follower_id, post_id=instance.id,
+                author_id=instance.owner_id,
+                post_created_at=instance.created_at)
+            for follower_id in follower_ids.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_on_follow(sender, instance, created, raw=False, **kwargs):
+    """
+    Signal receiver that backfills the follower's timeline with the
+    recent posts of the newly followed user.
+    """
+    if not created or raw or high_fanout_user_ids([instance.followed_id]):
+        return
+    backfill_timeline(instance.owner_id, instance.followed_id)
+
+
+def prune_on_unfollow(sender, instance, **kwargs):
+    """
+    Signal receiver that removes the unfollowed user's posts from
+    the former follower's timeline.
+    """
+    TimelineEntry.objects.filter(
+        owner_id=instance.owner_id, author_id=instance.followed_id
+    ).delete()
+
+
+post_save.connect(fan_out_post, sender=Post)
+post_save.connect(backfill_on_follow, sender=Follower)
+post_delete.connect(prune_on_unfollow, sender=Follower)
@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from followers.models import Follower
+from .models import TimelineEntry
+
+
+class TimelineTests(APITestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(
+            username="reader", password="pass1234")
+        self.author = User.objects.create_user(
+            username="author", password="pass1234")
+        self.stranger = User.objects.create_user(
+            username="stranger", password="pass1234")
+
+    def timeline_ids(self, url="/timeline/"):
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in resp.data["results"]], resp.data["next"]
+
+    def test_requires_authentication(self):
+        resp = self.client.get("/timeline/")
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_new_posts_are_fanned_out_to_followers(self):
+        Follower.objects.create(owner=self.reader, followed=self.author)
+        post = Post.objects.create(owner=self.author, title="New", content="c")
+        Post.objects.create(owner=self.stranger, title="Other", content="c")
+
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.reader, post=post).exists())
+        self.client.login(username="reader", password="pass1234")
+        ids, _ = self.timeline_ids()
+        self.assertEqual(ids, [post.id])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        old = Post.objects.create(owner=self.author, title="Old", content="c")
+        follow = Follower.objects.create(owner=self.reader, followed=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.reader, post=old).exists())
+
+        follow.delete()
+        self.assertFalse(TimelineEntry.objects.filter(owner=self.reader).exists())
+
+    def test_keyset_pages_cover_the_timeline(self):
+        Follower.objects.create(owner=self.reader, followed=self.author)
+        posts = [
+            Post.objects.create(owner=self.author, title=f"P{i}", content="c")
+            for i in range(13)
+        ]
+        self.client.login(username="reader", password="pass1234")
+        first, next_url = self.timeline_ids()
+        second, last = self.timeline_ids(next_url)
+        self.assertIsNone(last)
+        self.assertEqual(first + second, [post.id for post in reversed(posts)])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_high_fanout_authors_are_read_at_query_time(self):
+        Follower.objects.create(owner=self.reader, followed=self.author)
+        Follower.objects.create(owner=self.stranger, followed=self.author)
+        Follower.objects.create(owner=self.reader, followed=self.stranger)
+        popular = Post.objects.create(
+            owner=self.author, title="Popular", content="c")
+        regular = Post.objects.create(
+            owner=self.stranger, title="Regular", content="c")
+
+        self.assertFalse(TimelineEntry.objects.filter(post=popular).exists())
+        self.client.login(username="reader", password="pass1234")
+        ids, _ = self.timeline_ids()
+        self.assertEqual(ids, [regular.id, popular.id])
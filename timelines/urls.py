@@ -0,0 +1,6 @@
+from django.urls import path
+from timelines import views
+
+urlpatterns = [
+    path('timeline/', views.Timeline.as_view()),
+]
@@ -0,0 +1,64 @@
+from rest_framework import generics, permissions
+from techstables_backend.pagination import KeysetPagination
+from posts.models import Post
+from posts.serializers import PostSerializer
+from followers.models import Follower
+from .models import TimelineEntry, high_fanout_user_ids
+
+
+class Timeline(generics.ListAPIView):
+    '''
+    API view for the requesting user's home timeline: the posts of the
+    users they follow, newest first.
+
+    Posts are read from the materialized TimelineEntry rows. Posts by
+    followed users with more than TIMELINE_FANOUT_LIMIT followers are not
+    fanned out and are merged in at query time. Both sources are read
+    with keyset pagination on the post's (created_at, id).
+
+    Attributes:
+        serializer_class (PostSerializer): The serializer used for the posts.
+        permission_classes (list): Only authenticated users have a timeline.
+        pagination_class (KeysetPagination): Keyset pagination on
+            (created_at, id) of the posts.
+        entry_ordering (tuple): The same keys under the TimelineEntry names.
+    '''
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    entry_ordering = ('-post_created_at', '-post_id')
+
+    def get_queryset(self):
+        return Post.objects.select_related('owner__profile').order_by(
+            '-created_at', '-id')
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        paginator.request = request
+        paginator.page_size = paginator.get_page_size(request)
+        position = paginator.decode_cursor(request, Post)
+        limit = paginator.page_size + 1
+
+        entries = TimelineEntry.objects.filter(owner=request.user)
+        if position is not None:
+            entries = entries.filter(
+                paginator.after(position, self.entry_ordering))
+        keys = list(
+            entries.order_by(*self.entry_ordering)
+            .values_list('post_created_at', 'post_id')[:limit])
+
+        high_fanout_ids = high_fanout_user_ids(
+            Follower.objects.filter(owner=request.user).values('followed'))
+        if high_fanout_ids:
+            posts = self.get_queryset().filter(owner__in=high_fanout_ids)
+            if position is not None:
+                posts = posts.filter(paginator.after(position))
+            keys = sorted(
+                set(keys) | set(posts.values_list('created_at', 'id')[:limit]),
+                reverse=True)[:limit]
+
+        posts = self.get_queryset().in_bulk([post_id for _, post_id in keys])
+        page = paginator.paginate_rows(
+            [posts[post_id] for _, post_id in keys if post_id in posts])
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from trending.models import refresh_trending_scores
+
+
+class Command(BaseCommand):
+    '''
+    Refreshes the trending post scores.
+
+    By default only the posts liked or commented on since the previous
+    run are rescored. Schedule it every few minutes, plus a daily --full
+    run to account for removed likes and comments.
+    '''
+    help = 'Refreshes the precomputed trending post scores.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every score instead of only the newly engaged '
+                 'posts.')
+
+    def handle(self, *args, **options):
+        refresh = refresh_trending_scores(full=options['full'])
+        kind = 'full' if refresh.full else 'incremental'
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {refresh.posts_updated} trending scores '
+            f'({kind} refresh).'))
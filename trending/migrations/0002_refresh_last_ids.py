@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trending', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingrefresh',
+            name='gap_ids',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='trendingrefresh',
+            name='last_ids',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,194 @@
+import datetime
+import math
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from techstables_backend.cache import invalidate
+from posts.models import Post
+from likes.models import Like
+from comments.models import Comment
+
+
+class TrendingScore(models.Model):
+    '''
+    The precomputed trending score of a post with engagement.
+
+    The score is the base-2 logarithm of the post's forward-decayed
+    engagement: every like and comment contributes its weight times
+    2 ** ((created_at - TRENDING_EPOCH) / half-life). Because every
+    score decays at the same rate, comparing these values ranks posts
+    exactly as time-decayed scores evaluated now would, without ever
+    rewriting the scores of posts that got no new engagement.
+
+    Attributes:
+        post (OneToOneField): The scored post, also the primary key.
+        score (FloatField): The log2 of the forward-decayed engagement.
+        updated_at (DateTimeField): When the score was last refreshed.
+
+    Meta:
+        ordering (list): Orders posts from the highest score down.
+        indexes (list): Backs the range scans of the trending endpoint.
+    '''
+    post = models.OneToOneField(
+        Post, primary_key=True, related_name='trending',
+        on_delete=models.CASCADE)
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-score', '-post_id']
+        indexes = [
+            models.Index(
+                fields=['-score', '-post'], name='trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} {self.score}'
+
+
+class TrendingRefresh(models.Model):
+    '''
+    A run of the refresh_trending command.
+
+    Likes and comments are read by id, not by created_at: a row committed
+    after a run can carry an id or a created_at below what that run read.
+    Each run rescans TRENDING_ID_OVERLAP ids below the previous last id
+    and scores only the ids above it plus the gaps left in that window.
+
+    Attributes:
+        started_at (DateTimeField): When the run started.
+        high_water (DateTimeField): When the run read the engagement.
+        last_ids (JSONField): The highest like and comment ids read, by
+            TRENDING_WEIGHTS key.
+        gap_ids (JSONField): The ids missing below last_ids within the
+            overlap window, scored if they show up in a later run.
+        posts_updated (IntegerField): The number of scores written.
+        full (BooleanField): Whether every score was rebuilt.
+    '''
+    started_at = models.DateTimeField(auto_now_add=True)
+    high_water = models.DateTimeField()
+    last_ids = models.JSONField(default=dict)
+    gap_ids = models.JSONField(default=dict)
+    posts_updated = models.IntegerField(default=0)
+    full = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['-high_water']
+
+    def __str__(self):
+        return f'{self.high_water} {self.posts_updated}'
+
+
+TRENDING_EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def decayed_log_weight(created_at, weight):
+    '''
+    Returns the log2 of the forward-decayed weight of an engagement
+    created at created_at: log2(weight) plus the number of half-lives
+    between TRENDING_EPOCH and created_at.
+    '''
+    hours = (created_at - TRENDING_EPOCH).total_seconds() / 3600
+    return math.log2(weight) + hours / settings.TRENDING_HALF_LIFE_HOURS
+
+
+def log2_add(a, b):
+    '''
+    Returns log2(2 ** a + 2 ** b) without leaving the log domain, where
+    the decayed weights of recent engagement would overflow a float.
+    '''
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def collect_engagement(previous=None):
+    '''
+    Returns a dict mapping post ids to the log2 of the summed decayed
+    weights of the likes and comments not scored by the previous
+    TrendingRefresh, or of all of them without one, followed by the
+    last_ids and gap_ids to record for this run.
+    '''
+    sources = {'likes': Like, 'comments': Comment}
+    overlap = settings.TRENDING_ID_OVERLAP
+    scores, last_ids, gap_ids = {}, {}, {}
+    for key, model in sources.items():
+        weight = settings.TRENDING_WEIGHTS[key]
+        last_id = previous.last_ids.get(key, 0) if previous else 0
+        pending = set(previous.gap_ids.get(key, ())) if previous else set()
+        rows = model.objects.filter(id__gt=max(last_id - overlap, 0))
+        seen = set()
+        high = last_id
+        for event_id, post_id, created_at in (
+            rows.order_by().values_list('id', 'post_id', 'created_at')
+            .iterator(chunk_size=2000)
+        ):
+            seen.add(event_id)
+            high = max(high, event_id)
+            if event_id > last_id or event_id in pending:
+                scores[post_id] = log2_add(
+                    scores.get(post_id),
+                    decayed_log_weight(created_at, weight))
+        last_ids[key] = high
+        gap_ids[key] = [
+            event_id
+            for event_id in range(max(high - overlap, 0) + 1, high + 1)
+            if event_id not in seen
+            and (event_id > last_id or event_id in pending)
+        ]
+    return scores, last_ids, gap_ids
+
+
+def refresh_trending_scores(full=False, batch_size=500):
+    '''
+    Brings TrendingScore up to date and returns the TrendingRefresh
+    recorded for the run.
+
+    An incremental run reads only the likes and comments the previous run
+    did not score, by id, and adds their weights to the scores of the
+    posts they belong to. Deleted likes and comments are
+    not subtracted until the next full run, which recomputes every score
+    from scratch. Scores that decayed below TRENDING_PRUNE_HALF_LIVES
+    half-lives of a single fresh like are dropped to keep the table small.
+    '''
+    previous = None if full else TrendingRefresh.objects.first()
+    if previous is not None and not previous.last_ids:
+        previous = None
+    high_water = timezone.now()
+    engagement, last_ids, gap_ids = collect_engagement(previous)
+
+    with transaction.atomic():
+        if previous is None:
+            TrendingScore.objects.all().delete()
+        post_ids = list(engagement)
+        updated = 0
+        for start in range(0, len(post_ids), batch_size):
+            batch = post_ids[start:start + batch_size]
+            existing = dict(
+                TrendingScore.objects.filter(post_id__in=batch)
+                .values_list('post_id', 'score'))
+            live_ids = Post.objects.filter(id__in=batch).values_list(
+                'id', flat=True)
+            scores = [
+                TrendingScore(
+                    post_id=post_id,
+                    score=log2_add(existing.get(post_id), engagement[post_id]))
+                for post_id in live_ids
+            ]
+            TrendingScore.objects.bulk_create(
+                scores, update_conflicts=True, unique_fields=['post'],
+                update_fields=['score', 'updated_at'])
+            updated += len(scores)
+
+        floor = (
+            decayed_log_weight(high_water, settings.TRENDING_WEIGHTS['likes'])
+            - settings.TRENDING_PRUNE_HALF_LIVES
+        )
+        TrendingScore.objects.filter(score__lt=floor).delete()
+        refresh = TrendingRefresh.objects.create(
+            high_water=high_water, last_ids=last_ids, gap_ids=gap_ids,
+            posts_updated=updated, full=previous is None)
+    invalidate('trending')
+    return refresh
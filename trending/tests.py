@@ -0,0 +1,132 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from likes.models import Like
+from comments.models import Comment
+from .models import TrendingRefresh, TrendingScore
+
+
+class TrendingTests(APITestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass1234")
+            for i in range(4)
+        ]
+        self.author = self.users[0]
+
+    def like_all(self, post, users):
+        for user in users:
+            Like.objects.create(owner=user, post=post)
+
+    def refresh(self, *args):
+        call_command("refresh_trending", *args, stdout=StringIO())
+
+    def trending_ids(self, url="/posts/trending/"):
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in resp.data["results"]], resp.data["next"]
+
+    def test_recent_engagement_outranks_older_engagement(self):
+        old = Post.objects.create(owner=self.author, title="Old", content="c")
+        new = Post.objects.create(owner=self.author, title="New", content="c")
+        quiet = Post.objects.create(owner=self.author, title="Quiet", content="c")
+        self.like_all(old, self.users)
+        Like.objects.filter(post=old).update(
+            created_at=timezone.now() - timedelta(days=3))
+        self.like_all(new, self.users[:2])
+
+        self.refresh()
+
+        ids, _ = self.trending_ids()
+        self.assertEqual(ids, [new.id, old.id])
+        self.assertNotIn(quiet.id, ids)
+
+    def test_comments_weigh_more_than_likes(self):
+        liked = Post.objects.create(owner=self.author, title="L", content="c")
+        discussed = Post.objects.create(owner=self.author, title="D", content="c")
+        Like.objects.create(owner=self.users[1], post=liked)
+        Comment.objects.create(owner=self.users[1], post=discussed, content="x")
+
+        self.refresh()
+
+        ids, _ = self.trending_ids()
+        self.assertEqual(ids, [discussed.id, liked.id])
+
+    def test_incremental_refresh_only_touches_newly_engaged_posts(self):
+        first = Post.objects.create(owner=self.author, title="A", content="c")
+        second = Post.objects.create(owner=self.author, title="B", content="c")
+        Like.objects.create(owner=self.users[1], post=first)
+        self.refresh()
+        before = TrendingScore.objects.get(post=first)
+
+        self.like_all(second, self.users[1:3])
+        self.refresh()
+
+        refresh = TrendingRefresh.objects.first()
+        self.assertFalse(refresh.full)
+        self.assertEqual(refresh.posts_updated, 1)
+        after = TrendingScore.objects.get(post=first)
+        self.assertEqual(after.updated_at, before.updated_at)
+        self.assertEqual(self.trending_ids()[0], [second.id, first.id])
+
+    def test_incremental_scores_match_a_full_refresh(self):
+        post = Post.objects.create(owner=self.author, title="A", content="c")
+        Like.objects.create(owner=self.users[1], post=post)
+        self.refresh()
+        Like.objects.create(owner=self.users[2], post=post)
+        Comment.objects.create(owner=self.users[3], post=post, content="x")
+        self.refresh()
+        incremental = TrendingScore.objects.get(post=post).score
+
+        self.refresh("--full")
+
+        full = TrendingScore.objects.get(post=post).score
+        self.assertAlmostEqual(incremental, full)
+
+    def test_rows_committed_late_with_lower_ids_are_scored_once(self):
+        post = Post.objects.create(owner=self.author, title="A", content="c")
+        self.like_all(post, self.users[1:])
+        late_id = Like.objects.get(owner=self.users[2]).id
+        Like.objects.filter(id=late_id).delete()
+        self.refresh()
+        self.assertEqual(
+            TrendingRefresh.objects.first().gap_ids["likes"], [late_id])
+
+        Like.objects.create(
+            id=late_id, owner=self.users[2], post=post,
+            created_at=timezone.now() - timedelta(minutes=5))
+        self.refresh()
+        refresh = TrendingRefresh.objects.first()
+        self.assertEqual(refresh.posts_updated, 1)
+        self.assertEqual(refresh.gap_ids["likes"], [])
+        self.refresh()
+        self.assertEqual(TrendingRefresh.objects.first().posts_updated, 0)
+        incremental = TrendingScore.objects.get(post=post).score
+
+        self.refresh("--full")
+
+        full = TrendingScore.objects.get(post=post).score
+        self.assertAlmostEqual(incremental, full)
+
+    def test_keyset_pages_cover_the_ranking(self):
+        posts = [
+            Post.objects.create(owner=self.author, title=f"P{i}", content="c")
+            for i in range(12)
+        ]
+        for post in posts:
+            Like.objects.create(owner=self.users[1], post=post)
+        self.refresh()
+
+        with self.assertNumQueries(1):
+            first, next_url = self.trending_ids()
+        second, last = self.trending_ids(next_url)
+        self.assertIsNone(last)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(sorted(first + second), [post.id for post in posts])
@@ -0,0 +1,6 @@
+from django.urls import path
+from trending import views
+
+urlpatterns = [
+    path('posts/trending/', views.TrendingPostList.as_view()),
+]
@@ -0,0 +1,40 @@
+from rest_framework import generics
+from techstables_backend.cache import AnonymousResponseCacheMixin
+from techstables_backend.pagination import KeysetPagination
+from posts.serializers import PostSerializer
+from .models import TrendingScore
+
+
+class TrendingPagination(KeysetPagination):
+    '''
+    Keyset pagination on the (score, post id) of TrendingScore rows.
+    '''
+    ordering = ('-score', '-post_id')
+
+
+class TrendingPostList(AnonymousResponseCacheMixin, generics.ListAPIView):
+    '''
+    API view listing the trending posts, highest score first.
+
+    Scores are precomputed by the refresh_trending command, so each page
+    is a single range scan over the score index joined to its posts.
+
+    Attributes:
+        serializer_class (PostSerializer): The serializer used for the posts.
+        pagination_class (TrendingPagination): Keyset pagination on the
+            (score, post id) of the rows.
+        cache_namespaces (tuple): Namespaces of the cached anonymous
+            responses.
+    '''
+    serializer_class = PostSerializer
+    pagination_class = TrendingPagination
+    cache_namespaces = ('trending', 'posts', 'authors')
+
+    def get_queryset(self):
+        return TrendingScore.objects.select_related('post__owner__profile')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(
+            [score.post for score in page], many=True)
+        return self.get_paginated_response(serializer.data)